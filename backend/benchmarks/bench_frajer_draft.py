@@ -0,0 +1,64 @@
+"""Scaling benchmark for ``draft_engine_json_from_text``.
+
+Spustenie z priecinka ``backend``::
+
+    python -m benchmarks.bench_frajer_draft
+    python -m benchmarks.bench_frajer_draft --sizes 10 100 1000 10000
+
+Pre kazdu velkost vypise celkovy cas a cas na vetu. Pri linearnom skalovani
+ostava cas na vetu priblizne konstantny.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List
+
+from services.frajer_services import draft_engine_json_from_text
+
+SENTENCES = [
+    "Sales: prijme dopyt",
+    "Skontroluje dostupnosť tovaru",
+    "Ak je suma > 1000, potom schváli manažér, inak pokračuj",
+    "Backoffice: vystaví faktúru",
+    "Systém odošle potvrdenie zákazníkovi",
+    "Operátor: zapíše poznámku",
+]
+
+
+def build_text(size: int) -> str:
+    return " ".join(
+        f"{SENTENCES[idx % len(SENTENCES)]} {idx}." for idx in range(size)
+    )
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    print(f"{'sentences':>10} {'nodes':>8} {'total ms':>10} {'us/sentence':>12}")
+    for size in sizes:
+        text = build_text(size)
+        best = float("inf")
+        nodes = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            engine_json = draft_engine_json_from_text(text)
+            best = min(best, time.perf_counter() - started)
+            nodes = len(engine_json["nodes"])
+        print(
+            f"{size:>10} {nodes:>8} {best * 1000:>10.1f} "
+            f"{best / size * 1_000_000:>12.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Size and latency benchmark for compressed model storage.
+
+Spustenie z priecinka ``backend``::
+
+    python -m benchmarks.bench_model_storage
+    python -m benchmarks.bench_model_storage --models 200 --sentences 5 20 80
+
+Korpus su modely z ``draft_engine_json_from_text`` s BPMN XML z
+``generate_bpmn_from_json`` (rovnaky tvar ako ukladaju pouzivatelia). Pre kazdy
+dostupny kodek vypise velkost casti na disku, usporu voci ``none`` a priemerny
+cas zapisu a citania jedneho modelu.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from services.bpmn_svc import generate_bpmn_from_json
+from services.frajer_services import draft_engine_json_from_text
+from services.blob_store import CODECS, iter_blobs, zstandard
+from services.model_parts import read_model, write_model
+
+SENTENCES = [
+    "Sales: prijme dopyt",
+    "Skontroluje dostupnosť tovaru",
+    "Ak je suma > 1000, potom schváli manažér, inak pokračuj",
+    "Backoffice: vystaví faktúru",
+    "Systém odošle potvrdenie zákazníkovi",
+    "Operátor: zapíše poznámku",
+]
+
+
+def build_corpus(count: int, sizes: List[int]) -> List[Dict[str, Any]]:
+    corpus = []
+    for idx in range(count):
+        size = sizes[idx % len(sizes)]
+        text = " ".join(f"{SENTENCES[(idx + step) % len(SENTENCES)]} {step}." for step in range(size))
+        engine_json = draft_engine_json_from_text(text)
+        corpus.append(
+            {
+                "id": f"model-{idx:05d}",
+                "name": f"Model {idx}",
+                "engine_json": engine_json,
+                "diagram_xml": generate_bpmn_from_json(engine_json),
+            }
+        )
+    return corpus
+
+
+def _parts_bytes(directory: Path) -> int:
+    return sum(blob.stat().st_size for blob in iter_blobs(directory))
+
+
+def run(corpus: List[Dict[str, Any]]) -> None:
+    codecs = [codec for codec in CODECS if codec != "zstd" or zstandard is not None]
+    print(f"{'codec':>6} {'parts KiB':>10} {'saved':>7} {'write ms':>9} {'read ms':>8}")
+    baseline = None
+    for codec in codecs:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            started = time.perf_counter()
+            for model in corpus:
+                write_model(directory / f"{model['id']}.json", model, codec=codec)
+            write_s = time.perf_counter() - started
+            started = time.perf_counter()
+            for model in corpus:
+                read_model(directory / f"{model['id']}.json")
+            read_s = time.perf_counter() - started
+            size = _parts_bytes(directory)
+        baseline = baseline or size
+        print(
+            f"{codec:>6} {size / 1024:>10.1f} {1 - size / baseline:>6.0%} "
+            f"{write_s / len(corpus) * 1000:>9.2f} {read_s / len(corpus) * 1000:>8.2f}"
+        )
+    if zstandard is None:
+        print("zstd: skipped (zstandard not installed)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=100)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[5, 20, 80])
+    args = parser.parse_args()
+    run(build_corpus(args.models, args.sentences))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from services.architect.normalize import normalize_engine_payload, postprocess_engine_json
+from services.frajer_services import draft_engine_json_from_text
+from services.kb_loader import get_kb, kb_source_paths
+from services.latency_stats import summarize_latencies
+
+from .rule_engine import run_rules
+
+KB_DIR = Path(__file__).resolve().parent.parent / "kb"
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_CONCURRENT = 2
+# Locale a nazov variantu idu do nazvov suborov v KB_DIR.
+_LOCALE_RE = re.compile(r"^[a-z]{2}(-[A-Z]{2})?$")
+_VARIANT_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class CorpusNotFoundError(FileNotFoundError):
+    pass
+
+
+class EvaluationBusyError(RuntimeError):
+    """Too many A/B evaluations are already running."""
+
+
+def _check_locale(locale: str) -> None:
+    if not _LOCALE_RE.match(locale or ""):
+        raise ValueError(f"Invalid locale: {locale!r}")
+
+
+def _corpus_path(locale: str) -> Path:
+    _check_locale(locale)
+    raw = os.getenv("MENTOR_AB_CORPUS")
+    return Path(raw) if raw else KB_DIR / f"ab_corpus.{locale}.yaml"
+
+
+def load_corpus(locale: str = "sk", window: Optional[int] = None) -> List[Dict[str, str]]:
+    """Return the last ``window`` corpus texts as ``{"id", "text"}`` items."""
+    path = _corpus_path(locale)
+    if not path.exists():
+        raise CorpusNotFoundError(f"Evaluation corpus not found for locale={locale}")
+    with path.open("r", encoding="utf-8") as handle:
+        data = yaml.safe_load(handle) or {}
+    items: List[Dict[str, str]] = []
+    seen = set()
+    for idx, entry in enumerate(data.get("texts") or []):
+        if isinstance(entry, str):
+            entry = {"text": entry}
+        if not isinstance(entry, dict) or not str(entry.get("text") or "").strip():
+            continue
+        item_id = str(entry.get("id") or f"text_{idx}")
+        if item_id in seen:
+            # vysledky sa paruju podla id, duplicita by ticho prepisala iny text
+            raise ValueError(f"Duplicate corpus id {item_id!r} in {path.name}")
+        seen.add(item_id)
+        items.append({"id": item_id, "text": str(entry["text"])})
+    if window is not None:
+        items = items[-window:]
+    return items
+
+
+def _worker_count(requested: Optional[int]) -> int:
+    if requested is None:
+        try:
+            requested = int(os.getenv("MENTOR_AB_WORKERS", DEFAULT_WORKERS))
+        except ValueError:
+            requested = DEFAULT_WORKERS
+    return max(1, min(requested, os.cpu_count() or 1))
+
+
+def has_variant(variant: str, locale: str = "sk") -> bool:
+    """Whether ``variant`` has a KB file of its own (otherwise it resolves to ``main``)."""
+    if not variant or variant == "main" or not _VARIANT_RE.match(variant):
+        return False
+    return any(f".{variant}." in path.name and path.exists() for path in kb_source_paths(locale, variant))
+
+
+# Jeden pool na proces (spawn: server bezi vo vlaknach, fork by kopiroval ich zamky)
+# a obmedzeny pocet subeznych evaluacii.
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_SIZE = 0
+_POOL_LOCK = threading.Lock()
+_SLOTS: Optional[threading.BoundedSemaphore] = None
+
+
+def _max_concurrent() -> int:
+    try:
+        return max(1, int(os.getenv("MENTOR_AB_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)))
+    except ValueError:
+        return DEFAULT_MAX_CONCURRENT
+
+
+def _slots() -> threading.BoundedSemaphore:
+    global _SLOTS
+    with _POOL_LOCK:
+        if _SLOTS is None:
+            _SLOTS = threading.BoundedSemaphore(_max_concurrent())
+        return _SLOTS
+
+
+def _pool(size: int) -> ProcessPoolExecutor:
+    """Shared worker pool with at least ``size`` processes, created on first use."""
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_SIZE < size:
+            if _POOL is not None:
+                # bezne mapy na starom poole dobehnu, len sa uz nic nove neprijme
+                _POOL.shutdown(wait=False)
+            _POOL = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+            _POOL_SIZE = size
+        return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        pool, _POOL, _POOL_SIZE = _POOL, None, 0
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def summarize_engine(engine_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Structural fingerprint of an engine_json that does not depend on node ids."""
+    nodes = engine_json.get("nodes") or []
+    lane_names = {
+        str(lane.get("id")): str(lane.get("name") or lane.get("id"))
+        for lane in engine_json.get("lanes") or []
+    }
+    node_types = Counter(str(node.get("type") or "") for node in nodes)
+    lanes_by_name: Dict[str, str] = {}
+    for node in nodes:
+        name = str(node.get("name") or node.get("label") or "").strip()
+        lane_id = str(node.get("laneId") or "")
+        if name:
+            lanes_by_name[name] = lane_names.get(lane_id, lane_id)
+    findings = Counter(finding.id.split(":", 1)[0] for finding in run_rules(engine_json))
+    return {
+        "node_count": len(nodes),
+        "flow_count": len(engine_json.get("flows") or []),
+        "lane_count": len(lane_names),
+        "gateway_count": sum(
+            count for ntype, count in node_types.items() if ntype.lower().endswith("gateway")
+        ),
+        "node_types": dict(node_types),
+        "lanes_by_name": lanes_by_name,
+        "findings": dict(findings),
+    }
+
+
+def _replay(job: Tuple[str, str, str, str, str]) -> Tuple[str, str, Dict[str, Any]]:
+    """Worker entry point: draft + postprocess one text with one KB variant."""
+    item_id, side, text, locale, variant = job
+    started = time.perf_counter()
+    draft = draft_engine_json_from_text(text, locale=locale, kb_variant=variant)
+    engine_json = postprocess_engine_json(normalize_engine_payload(draft), locale=locale)
+    latency_ms = (time.perf_counter() - started) * 1000
+    summary = summarize_engine(engine_json)
+    summary["latency_ms"] = latency_ms
+    return item_id, side, summary
+
+
+def _diff_item(item_id: str, base: Dict[str, Any], candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    diff: Dict[str, Any] = {"id": item_id}
+    for key in ("node_count", "flow_count", "lane_count", "gateway_count"):
+        if base[key] != candidate[key]:
+            diff[key] = {"base": base[key], "candidate": candidate[key]}
+    lane_changes = {
+        name: {"base": lane, "candidate": candidate["lanes_by_name"].get(name)}
+        for name, lane in base["lanes_by_name"].items()
+        if candidate["lanes_by_name"].get(name) != lane
+    }
+    for name, lane in candidate["lanes_by_name"].items():
+        if name not in base["lanes_by_name"]:
+            lane_changes[name] = {"base": None, "candidate": lane}
+    if lane_changes:
+        diff["lane_changes"] = lane_changes
+    findings_delta = {
+        rule_id: candidate["findings"].get(rule_id, 0) - base["findings"].get(rule_id, 0)
+        for rule_id in set(base["findings"]) | set(candidate["findings"])
+    }
+    findings_delta = {rule_id: delta for rule_id, delta in findings_delta.items() if delta}
+    if findings_delta:
+        diff["findings_delta"] = findings_delta
+    return diff if len(diff) > 1 else None
+
+
+def _totals(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    findings: Counter = Counter()
+    for summary in summaries:
+        findings.update(summary["findings"])
+    return {
+        "nodes": sum(s["node_count"] for s in summaries),
+        "gateways": sum(s["gateway_count"] for s in summaries),
+        "findings": sum(findings.values()),
+        "findings_by_rule": dict(findings),
+    }
+
+
+def evaluate_ab(
+    base: str,
+    candidate: str,
+    *,
+    window: int = 20,
+    locale: str = "sk",
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Replay the corpus through two KB variants and report structural and latency deltas."""
+    _check_locale(locale)
+    variants = {"base": base or "main", "candidate": candidate or "main"}
+    for variant in variants.values():
+        if not _VARIANT_RE.match(variant):
+            raise ValueError(f"Invalid KB variant: {variant!r}")
+    corpus = load_corpus(locale, window)
+    jobs = [
+        (item["id"], side, item["text"], locale, variant)
+        for item in corpus
+        for side, variant in variants.items()
+    ]
+    worker_count = _worker_count(workers)
+
+    slots = _slots()
+    if not slots.acquire(blocking=False):
+        raise EvaluationBusyError("Too many A/B evaluations are running, try again later")
+    try:
+        started = time.perf_counter()
+        if worker_count > 1 and len(jobs) > 1:
+            pool = _pool(worker_count)
+            try:
+                results = list(pool.map(_replay, jobs, chunksize=max(1, len(jobs) // (worker_count * 4))))
+            except BrokenProcessPool:
+                shutdown_pool()
+                raise
+        else:
+            results = [_replay(job) for job in jobs]
+        wall_s = time.perf_counter() - started
+    finally:
+        slots.release()
+
+    by_item: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for item_id, side, summary in results:
+        by_item.setdefault(item_id, {})[side] = summary
+
+    items = []
+    for item in corpus:
+        sides = by_item[item["id"]]
+        diff = _diff_item(item["id"], sides["base"], sides["candidate"])
+        if diff:
+            items.append(diff)
+
+    per_side = {
+        side: [by_item[item["id"]][side] for item in corpus] for side in variants
+    }
+    base_totals = _totals(per_side["base"])
+    candidate_totals = _totals(per_side["candidate"])
+    return {
+        "locale": locale,
+        "window": window,
+        "corpus_size": len(corpus),
+        "workers": worker_count,
+        "variants": {
+            side: {
+                "requested": variant,
+                "resolved": get_kb(locale, variant=variant)["_meta"]["variant_resolved"],
+            }
+            for side, variant in variants.items()
+        },
+        "changed": len(items),
+        "totals": {"base": base_totals, "candidate": candidate_totals},
+        "findings_delta": candidate_totals["findings"] - base_totals["findings"],
+        "latency_ms": {
+            side: summarize_latencies(s["latency_ms"] for s in summaries)
+            for side, summaries in per_side.items()
+        },
+        "throughput_per_s": round(len(jobs) / wall_s, 2) if wall_s > 0 else None,
+        "wall_ms": round(wall_s * 1000, 3),
+        "items": items,
+    }
@@ -1,16 +1,16 @@
 ﻿from __future__ import annotations
 
 import copy
-import subprocess
 from datetime import datetime
 from pathlib import Path
-from subprocess import CalledProcessError
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 
+from .json_patch import apply_json_patch_with_stats
+from .kb_index import FullLintJob, KbIndex
+from .kb_write_queue import KbWriteQueue
 from .models import MentorApplyAudit, MentorApplyRequest, MentorApplyResponse, Proposal
-from .validator import detect_conflicts, lint_kb
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 KB_DIR = REPO_ROOT / "kb"
@@ -45,17 +45,6 @@ def _read_yaml(path: Path, default: Any) -> Any:
     return data
 
 
-def _write_yaml(path: Path, data: Any) -> None:
-    with path.open("w", encoding="utf-8") as handle:
-        yaml.safe_dump(  # type: ignore[no-untyped-call]
-            data,
-            handle,
-            sort_keys=False,
-            allow_unicode=True,
-            indent=2,
-        )
-
-
 def _normalize_alias_token(value: str) -> str:
     normalized = (value or "").strip()
     return normalized.lower()
@@ -76,143 +65,6 @@ def _deduplicate_aliases(values: Iterable[str]) -> List[str]:
     return result
 
 
-def _decode_pointer(path: str) -> List[str]:
-    if path == "":
-        return []
-    if not path.startswith("/"):
-        raise ValueError(f"Invalid JSON pointer '{path}'")
-    tokens = path.lstrip("/").split("/") if path != "/" else [""]
-    return [
-        token.replace("~1", "/").replace("~0", "~") for token in tokens if token != ""
-    ]
-
-
-def _parse_index(token: str, length: int, allow_end: bool = False) -> int:
-    if token == "-":
-        if allow_end:
-            return length
-        raise ValueError("'-' is only permitted for appending to arrays")
-    try:
-        index = int(token)
-    except ValueError as exc:  # pragma: no cover
-        raise ValueError(f"Invalid array index '{token}'") from exc
-    if index < 0 or index > length or (index == length and not allow_end):
-        raise ValueError(f"Array index out of range: {token}")
-    return index
-
-
-def _traverse(doc: Any, tokens: List[str]) -> Any:
-    current = doc
-    for raw in tokens:
-        token = raw.replace("~1", "/").replace("~0", "~")
-        if isinstance(current, list):
-            idx = _parse_index(token, len(current))
-            current = current[idx]
-        elif isinstance(current, dict):
-            if token not in current:
-                raise ValueError(f"Path segment '{token}' not found")
-            current = current[token]
-        else:
-            raise ValueError(f"Cannot traverse into non-container at '{token}'")
-    return current
-
-
-def _get_parent(doc: Any, tokens: List[str]) -> tuple[Any, str]:
-    if not tokens:
-        raise ValueError("JSON pointer must not be empty for this operation")
-    parent_tokens = tokens[:-1]
-    parent = _traverse(doc, parent_tokens) if parent_tokens else doc
-    last = tokens[-1].replace("~1", "/").replace("~0", "~")
-    return parent, last
-
-
-def _add_value(doc: Any, tokens: List[str], value: Any) -> Any:
-    if not tokens:
-        return copy.deepcopy(value)
-    parent, key = _get_parent(doc, tokens)
-    if isinstance(parent, list):
-        idx = _parse_index(key, len(parent), allow_end=True)
-        if idx == len(parent):
-            parent.append(copy.deepcopy(value))
-        else:
-            parent.insert(idx, copy.deepcopy(value))
-    elif isinstance(parent, dict):
-        parent[key] = copy.deepcopy(value)
-    else:
-        raise ValueError("Cannot add to non-container parent")
-    return doc
-
-
-def _replace_value(doc: Any, tokens: List[str], value: Any) -> Any:
-    if not tokens:
-        return copy.deepcopy(value)
-    parent, key = _get_parent(doc, tokens)
-    if isinstance(parent, list):
-        idx = _parse_index(key, len(parent))
-        parent[idx] = copy.deepcopy(value)
-    elif isinstance(parent, dict):
-        if key not in parent:
-            raise ValueError(f"Path '{'/'.join(tokens)}' not found for replace")
-        parent[key] = copy.deepcopy(value)
-    else:
-        raise ValueError("Cannot replace in non-container parent")
-    return doc
-
-
-def _remove_value(doc: Any, tokens: List[str]) -> Any:
-    if not tokens:
-        raise ValueError("Cannot remove the document root")
-    parent, key = _get_parent(doc, tokens)
-    if isinstance(parent, list):
-        idx = _parse_index(key, len(parent))
-        parent.pop(idx)
-    elif isinstance(parent, dict):
-        if key not in parent:
-            raise ValueError(f"Path '{'/'.join(tokens)}' not found for remove")
-        parent.pop(key)
-    else:
-        raise ValueError("Cannot remove from non-container parent")
-    return doc
-
-
-def _apply_json_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
-    doc = copy.deepcopy(document)
-    for op in operations:
-        operation = op.get("op")
-        path = op.get("path")
-        if operation is None or path is None:
-            raise ValueError("Patch operation missing op or path")
-        tokens = _decode_pointer(path)
-        if operation == "add":
-            doc = _add_value(doc, tokens, op.get("value"))
-        elif operation == "replace":
-            doc = _replace_value(doc, tokens, op.get("value"))
-        elif operation == "remove":
-            doc = _remove_value(doc, tokens)
-        elif operation == "move":
-            from_path = op.get("from")
-            if not from_path:
-                raise ValueError('move operation requires "from" field')
-            from_tokens = _decode_pointer(from_path)
-            value = copy.deepcopy(_traverse(doc, from_tokens))
-            doc = _remove_value(doc, from_tokens)
-            doc = _add_value(doc, tokens, value)
-        elif operation == "copy":
-            from_path = op.get("from")
-            if not from_path:
-                raise ValueError('copy operation requires "from" field')
-            value = copy.deepcopy(_traverse(doc, _decode_pointer(from_path)))
-            doc = _add_value(doc, tokens, value)
-        elif operation == "test":
-            value = op.get("value")
-            current = _traverse(doc, tokens)
-            if current != value:
-                raise ValueError(f"test operation failed at path '{path}'")
-        else:
-            raise ValueError(f"Unsupported patch operation '{operation}'")
-    return doc
-
-
 def _ensure_proposal_identity(proposal: Proposal, idx: int) -> None:
     if not proposal.id:
         stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
@@ -261,6 +113,7 @@ def _apply_label_rule(
     label_rules: Dict[str, Any],
     proposal: Proposal,
     normalized_targets: List[Dict[str, str]],
+    id_taken: Optional[Callable[[str], bool]] = None,
 ) -> None:
     locale = proposal.match.locale or "sk"
     labels = (
@@ -291,7 +144,11 @@ def _apply_label_rule(
     }
 
     existing = label_rules.setdefault("label_rules", [])
-    if any(item.get("id") == entry["id"] for item in existing):
+    if id_taken is not None:
+        duplicate = id_taken(entry["id"])
+    else:
+        duplicate = any(item.get("id") == entry["id"] for item in existing)
+    if duplicate:
         raise MentorApplyConflict([f"Label rule id {entry['id']} already exists."])
     existing.append(entry)
 
@@ -300,7 +157,7 @@ def _apply_alias(
     aliases_data: Dict[str, Any],
     proposal: Proposal,
     normalized_targets: List[Dict[str, str]],
-) -> None:
+) -> str:
     meta_locale = aliases_data.setdefault("locale", "sk")
     if not meta_locale:
         aliases_data["locale"] = "sk"
@@ -326,6 +183,7 @@ def _apply_alias(
     existing_values = alias_map.get(role, []) or []
     merged = _deduplicate_aliases(list(existing_values) + alias_values)
     alias_map[role] = merged
+    return role
 
 
 def _load_state() -> Dict[str, Any]:
@@ -342,21 +200,67 @@ def _load_state() -> Dict[str, Any]:
     return {"label_rules": label_rules, "aliases": aliases}
 
 
-def _save_state(state: Dict[str, Any], touched: Iterable[Path]) -> None:
-    if LABEL_RULES_FILE in touched:
-        _write_yaml(LABEL_RULES_FILE, state["label_rules"])
-    if ALIASES_FILE in touched:
-        _write_yaml(ALIASES_FILE, state["aliases"])
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy only the containers apply mutates; rules and alias lists are shared."""
+    label_rules = dict(state["label_rules"])
+    if isinstance(label_rules.get("label_rules"), list):
+        label_rules["label_rules"] = list(label_rules["label_rules"])
+    aliases = dict(state["aliases"])
+    if isinstance(aliases.get("aliases"), dict):
+        aliases["aliases"] = dict(aliases["aliases"])
+    return {"label_rules": label_rules, "aliases": aliases}
 
 
-def _run_git(*args: str) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(  # type: ignore[no-any-unimported]
-        ["git", *args],
-        cwd=str(REPO_ROOT),
-        check=True,
-        capture_output=True,
-        text=True,
-    )
+KB_QUEUE = KbWriteQueue(
+    REPO_ROOT,
+    {"label_rules": LABEL_RULES_FILE, "aliases": ALIASES_FILE},
+    _load_state,
+    copier=_copy_state,
+)
+FULL_LINT = FullLintJob()
+_KB_INDEX: Optional[KbIndex] = None
+
+
+def _index_for(state: Dict[str, Any]) -> KbIndex:
+    """Index of the queue state; rebuilt (full lint) only when the state was reloaded."""
+    global _KB_INDEX
+    if _KB_INDEX is None or _KB_INDEX.state is not state:
+        _KB_INDEX = KbIndex.build(state)
+    return _KB_INDEX
+
+
+def kb_validation_status() -> Tuple[List[str], Dict[str, Any]]:
+    """Issues known for the current KB state and the last full-lint job status.
+
+    ``KB_QUEUE`` nacita subory znova, ked sa na disku zmenili, a index sa
+    potom prebuduje, takze validacia vidi aj rucne upravy a ine workery.
+    """
+    issues: List[str] = []
+
+    def _read(current: Dict[str, Any]) -> None:
+        issues.extend(_index_for(current).issues)
+
+    KB_QUEUE.inspect(_read)
+    return issues, FULL_LINT.status()
+
+
+def start_full_lint() -> Dict[str, Any]:
+    """Lint the KB files as they are on disk, not the in-memory queue state."""
+    return FULL_LINT.start(_load_state())
+
+
+def kb_commit_status(pending_commit_id: str) -> Optional[Dict[str, Any]]:
+    """State of a queued KB commit: pending, committed (with commit_id) or failed."""
+    return KB_QUEUE.status(pending_commit_id)
+
+
+def _patch_engine(
+    engine_document: Dict[str, Any], operations: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    try:
+        return apply_json_patch_with_stats(engine_document, operations)
+    except ValueError as exc:
+        raise MentorApplyConflict([f"Failed to apply engine patch: {exc}"])
 
 
 def apply_proposals(request: MentorApplyRequest) -> MentorApplyResponse:
@@ -364,9 +268,8 @@ def apply_proposals(request: MentorApplyRequest) -> MentorApplyResponse:
     if not proposals:
         raise MentorApplyConflict(["No proposals to apply."])
 
-    engine_document = (
-        copy.deepcopy(request.engine_json) if request.engine_json is not None else None
-    )
+    # Patch zdiela nezmenene casti s request.engine_json, netreba deepcopy.
+    engine_document = request.engine_json
     accumulated_patch_ops: List[Dict[str, Any]] = []
     engine_only = all(proposal.type == "engine_patch" for proposal in proposals)
 
@@ -387,16 +290,14 @@ def apply_proposals(request: MentorApplyRequest) -> MentorApplyResponse:
                     accumulated_patch_ops.append(dict(op))
         if not accumulated_patch_ops:
             raise MentorApplyConflict(["No engine changes to apply."])
-        try:
-            patched_engine_json = _apply_json_patch(
-                engine_document, accumulated_patch_ops
-            )
-        except ValueError as exc:
-            raise MentorApplyConflict([f"Failed to apply engine patch: {exc}"])
+        patched_engine_json, patch_timings = _patch_engine(
+            engine_document, accumulated_patch_ops
+        )
         return MentorApplyResponse(
             new_kb_version=request.base_kb_version or "engine_patch",
             audit=MentorApplyAudit(commit_id=None, pr_url=None),
             patched_engine_json=patched_engine_json,
+            patch_timings=patch_timings,
         )
 
     normalized_targets_cache: Dict[str, List[Dict[str, str]]] = {}
@@ -417,70 +318,68 @@ def apply_proposals(request: MentorApplyRequest) -> MentorApplyResponse:
         if not proposal.source:
             proposal.source = DEFAULT_SOURCE
 
-    current_state = _load_state()
-    lint_issues = lint_kb(current_state["label_rules"], current_state["aliases"])
-    if lint_issues:
-        raise MentorApplyConflict(lint_issues)
-
-    preview_state = {
-        "label_rules": copy.deepcopy(current_state["label_rules"]),
-        "aliases": copy.deepcopy(current_state["aliases"]),
-    }
+    def _mutate(
+        current_state: Dict[str, Any], preview_state: Dict[str, Any]
+    ) -> Tuple[List[str], List[str]]:
+        index = _index_for(current_state)
+        if index.issues:
+            raise MentorApplyConflict(list(index.issues))
 
-    touched: List[Path] = []
-    for proposal in proposals:
-        targets = normalized_targets_cache.get(proposal.id, [])
-        if proposal.type == "label_rule":
-            _apply_label_rule(preview_state["label_rules"], proposal, targets)
-            if LABEL_RULES_FILE not in touched:
-                touched.append(LABEL_RULES_FILE)
-        elif proposal.type == "alias":
-            _apply_alias(preview_state["aliases"], proposal, targets)
-            if ALIASES_FILE not in touched:
-                touched.append(ALIASES_FILE)
-
-    if not touched:
-        raise MentorApplyConflict(["No changes to apply."])
-
-    post_lint = lint_kb(preview_state["label_rules"], preview_state["aliases"])
-    if post_lint:
-        raise MentorApplyConflict(post_lint)
-
-    conflict_messages = detect_conflicts(preview_state["aliases"])
-    if conflict_messages:
-        raise MentorApplyConflict(conflict_messages)
-
-    if (
-        preview_state["label_rules"] == current_state["label_rules"]
-        and preview_state["aliases"] == current_state["aliases"]
-    ):
-        raise MentorApplyConflict(["No changes to apply."])
-
-    _save_state(preview_state, touched)
-
-    for path in touched:
-        _run_git("add", str(path.relative_to(REPO_ROOT)))
-
-    proposal_ids = ", ".join(proposal.id for proposal in proposals)
-    try:
-        _run_git("commit", "--no-verify", "-m", f"mentor: apply {proposal_ids}")
-    except CalledProcessError as exc:
-        raise RuntimeError(exc.stderr.strip() or exc.stdout.strip()) from exc
+        touched: List[str] = []
+        new_ids: set = set()
+        changed_roles: Dict[str, Any] = {}
 
-    commit = _run_git("rev-parse", "HEAD")
-    commit_id = commit.stdout.strip()
-    new_version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    audit = MentorApplyAudit(commit_id=commit_id, pr_url=None)
+        def _id_taken(rule_id: str) -> bool:
+            return rule_id in index.rule_ids or rule_id in new_ids
 
+        for proposal in proposals:
+            targets = normalized_targets_cache.get(proposal.id, [])
+            if proposal.type == "label_rule":
+                _apply_label_rule(preview_state["label_rules"], proposal, targets, _id_taken)
+                new_ids.add(proposal.id)
+                if "label_rules" not in touched:
+                    touched.append("label_rules")
+            elif proposal.type == "alias":
+                role = _apply_alias(preview_state["aliases"], proposal, targets)
+                changed_roles[role] = preview_state["aliases"]["aliases"][role]
+                if "aliases" not in touched:
+                    touched.append("aliases")
+
+        if not touched:
+            raise MentorApplyConflict(["No changes to apply."])
+
+        # Validuje sa len delta: pridane pravidla a prepisane role.
+        new_rules = preview_state["label_rules"]["label_rules"][index.rule_count:]
+        delta_issues = index.check_delta(new_rules, changed_roles)
+        if delta_issues:
+            raise MentorApplyConflict(delta_issues)
+
+        current_aliases = current_state["aliases"].get("aliases") or {}
+        if not new_rules and all(
+            current_aliases.get(role) == values for role, values in changed_roles.items()
+        ):
+            raise MentorApplyConflict(["No changes to apply."])
+        index.advance(preview_state, new_rules, changed_roles)
+        return touched, [proposal.id for proposal in proposals]
+
+    # Engine patch ide pred zmenou KB, aby chybny patch nenechal KB zmenenu.
     patched_engine_json = None
+    patch_timings = None
     if engine_document is not None and accumulated_patch_ops:
-        try:
-            patched_engine_json = _apply_json_patch(
-                engine_document, accumulated_patch_ops
-            )
-        except ValueError as exc:
-            raise MentorApplyConflict([f"Failed to apply engine patch: {exc}"])
+        patched_engine_json, patch_timings = _patch_engine(
+            engine_document, accumulated_patch_ops
+        )
+
+    # Stav KB sa meni hned, YAML a git commit dobehnu v KB_QUEUE na pozadi.
+    pending_commit_id = KB_QUEUE.update(_mutate)
+    new_version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    audit = MentorApplyAudit(
+        commit_id=None, pending_commit_id=pending_commit_id, pr_url=None
+    )
 
     return MentorApplyResponse(
-        new_kb_version=new_version, audit=audit, patched_engine_json=patched_engine_json
+        new_kb_version=new_version,
+        audit=audit,
+        patched_engine_json=patched_engine_json,
+        patch_timings=patch_timings,
     )
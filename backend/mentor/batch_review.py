@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .rule_engine import run_rules
+from .rules import RULE_MODULES
+
+DEFAULT_WORKERS = 2
+DEFAULT_CACHE_SIZE = 2048
+
+ModelLoader = Callable[[str], Dict[str, Any]]
+
+
+# Mimo balika rules: MentorIndex a beh pravidiel, tvar nalezov.
+_RULESET_MODULES = ("rule_engine.py", "models.py")
+
+
+@lru_cache(maxsize=1)
+def ruleset_version() -> str:
+    """Hash of every rule source, shared helpers included; any change invalidates cached findings."""
+    digest = hashlib.sha256()
+    for module in RULE_MODULES:
+        digest.update(module.RULE_ID.encode("utf-8"))
+    mentor_dir = Path(__file__).parent
+    sources = sorted((mentor_dir / "rules").glob("*.py")) + [mentor_dir / name for name in _RULESET_MODULES]
+    for path in sources:
+        digest.update(path.relative_to(mentor_dir).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def engine_hash(engine_json: Dict[str, Any]) -> str:
+    payload = json.dumps(engine_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """Thread-safe LRU of findings keyed by (ruleset, engine hash).
+
+    ``ttl_s`` obmedzuje zivotnost zaznamu (None = bez expiracie).
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl_s: Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._items: "OrderedDict[Tuple[str, str], Tuple[float, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl_s is not None and time.monotonic() - stored_at > self.ttl_s:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str], findings: List[Any]) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), findings)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def _cache_size() -> int:
+    try:
+        return int(os.getenv("MENTOR_REVIEW_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    except ValueError:
+        return DEFAULT_CACHE_SIZE
+
+
+REVIEW_CACHE = ReviewCache(_cache_size())
+
+
+def _worker_count(requested: Optional[int]) -> int:
+    if requested is None:
+        try:
+            requested = int(os.getenv("MENTOR_BATCH_WORKERS", DEFAULT_WORKERS))
+        except ValueError:
+            requested = DEFAULT_WORKERS
+    return max(1, min(requested, os.cpu_count() or 1))
+
+
+def _review_job(job: Tuple[str, Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Worker entry point: findings for one engine_json as plain dicts."""
+    model_id, engine_json = job
+    return model_id, [finding.model_dump() for finding in run_rules(engine_json)]
+
+
+def _result_line(
+    model_id: str, model: Dict[str, Any], digest: str, findings: List[Dict[str, Any]], cached: bool
+) -> Dict[str, Any]:
+    return {
+        "model_id": model_id,
+        "name": model.get("name"),
+        "tree_node_id": model.get("tree_node_id"),
+        "engine_hash": digest,
+        "cached": cached,
+        "counts": dict(Counter(finding["severity"] for finding in findings)),
+        "findings": findings,
+    }
+
+
+def review_models(
+    model_ids: Iterable[str],
+    load_model: ModelLoader,
+    *,
+    workers: Optional[int] = None,
+    cache: Optional[ReviewCache] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one result per model (cache hits first), then a summary record.
+
+    Modely sa nacitavaju postupne a do poolu ide naraz najviac
+    ``4 * workers`` modelov, aby audit velkej organizacie nedrzal vsetky
+    engine_json v pamati.
+    """
+    cache = REVIEW_CACHE if cache is None else cache
+    version = ruleset_version()
+    worker_count = _worker_count(workers)
+    max_in_flight = worker_count * 4
+    totals: Counter = Counter()
+    stats = {"models": 0, "cached": 0, "reviewed": 0, "errors": 0}
+    pending: Dict[Future, Tuple[str, Dict[str, Any], str]] = {}
+    pool = ProcessPoolExecutor(max_workers=worker_count) if worker_count > 1 else None
+
+    def _finish(model_id: str, model: Dict[str, Any], digest: str, findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        cache.put((version, digest), findings)
+        stats["reviewed"] += 1
+        line = _result_line(model_id, model, digest, findings, cached=False)
+        totals.update(line["counts"])
+        return line
+
+    def _drain(block_until: int) -> Iterator[Dict[str, Any]]:
+        while len(pending) > block_until:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                model_id, model, digest = pending.pop(future)
+                try:
+                    _, findings = future.result()
+                except Exception as exc:
+                    stats["errors"] += 1
+                    yield {"model_id": model_id, "error": f"{type(exc).__name__}: {exc}"}
+                    continue
+                yield _finish(model_id, model, digest, findings)
+
+    try:
+        seen: Set[str] = set()
+        for model_id in model_ids:
+            if model_id in seen:
+                continue
+            seen.add(model_id)
+            stats["models"] += 1
+            try:
+                model = load_model(model_id)
+            except Exception as exc:
+                stats["errors"] += 1
+                yield {"model_id": model_id, "error": f"{type(exc).__name__}: {exc}"}
+                continue
+            engine_json = model.get("engine_json") if isinstance(model.get("engine_json"), dict) else {}
+            digest = engine_hash(engine_json)
+            findings = cache.get((version, digest))
+            if findings is not None:
+                stats["cached"] += 1
+                line = _result_line(model_id, model, digest, findings, cached=True)
+                totals.update(line["counts"])
+                yield line
+                continue
+            summary = {key: model.get(key) for key in ("name", "tree_node_id")}
+            if pool is None:
+                _, findings = _review_job((model_id, engine_json))
+                yield _finish(model_id, summary, digest, findings)
+                continue
+            pending[pool.submit(_review_job, (model_id, engine_json))] = (model_id, summary, digest)
+            yield from _drain(max_in_flight - 1)
+        yield from _drain(0)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    yield {
+        "summary": {
+            **stats,
+            "ruleset_version": version,
+            "workers": worker_count,
+            "findings_by_severity": dict(totals),
+        }
+    }
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for record in records:
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
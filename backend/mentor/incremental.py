@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .json_patch import apply_json_patch, decode_pointer
+from .models import MentorFinding
+from .rule_engine import (
+    SUBPROCESS_PARENT_KEYS,
+    MentorIndex,
+    _flow_endpoints,
+    _normalize_flow_type,
+    _normalize_node_type,
+    _pick_first,
+    build_index,
+    run_rules,
+)
+from .rules import RULE_MODULES
+
+_COLLECTIONS = ("nodes", "flows", "lanes")
+# Top-level kluce, od ktorych zavisi default pool vsetkych uzlov.
+_POOL_KEYS = ("defaultPoolId", "processId")
+_STRUCTURAL_OPS = ("add", "remove", "move", "copy")
+
+ElementPair = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def _element_id(element: Optional[Dict[str, Any]]) -> str:
+    return str(element.get("id") or "") if isinstance(element, dict) else ""
+
+
+def _group_by_id(items: Sequence[Any]) -> Dict[str, List[Any]]:
+    grouped: Dict[str, List[Any]] = {}
+    for item in items:
+        grouped.setdefault(_element_id(item), []).append(item)
+    return grouped
+
+
+@dataclass
+class PatchScope:
+    """Which parts of engine_json a patch touches, derived from its paths only."""
+
+    full: bool = False
+    reordered: Set[str] = field(default_factory=set)
+    positions: Dict[str, Set[int]] = field(
+        default_factory=lambda: {name: set() for name in _COLLECTIONS}
+    )
+    # kolekcie, v ktorych patch meni polia prvkov (nie len zoznam)
+    deep: Set[str] = field(default_factory=set)
+    other_keys: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class EngineDelta:
+    """Elements changed by a patch, as ``(before, after)`` pairs per collection."""
+
+    full: bool = False
+    reordered: Set[str] = field(default_factory=set)
+    pairs: Dict[str, List[ElementPair]] = field(
+        default_factory=lambda: {name: [] for name in _COLLECTIONS}
+    )
+
+
+def scan_patch(patch: Sequence[Dict[str, Any]]) -> PatchScope:
+    scope = PatchScope()
+    for op in patch:
+        operation = op.get("op")
+        paths = [(op.get("path"), operation in _STRUCTURAL_OPS)]
+        if operation == "move":
+            paths.append((op.get("from"), True))
+        for path, structural in paths:
+            if path is None:
+                continue
+            tokens = decode_pointer(path)
+            if not tokens or tokens[0] in _POOL_KEYS:
+                scope.full = True
+                return scope
+            head = tokens[0]
+            if head not in _COLLECTIONS:
+                scope.other_keys.add(head)
+                continue
+            if len(tokens) >= 3:
+                scope.deep.add(head)
+            if len(tokens) == 1 or (len(tokens) == 2 and structural):
+                scope.reordered.add(head)
+                continue
+            try:
+                scope.positions[head].add(int(tokens[1]))
+            except ValueError:
+                scope.reordered.add(head)
+    return scope
+
+
+def _diff_by_id(before: Sequence[Any], after: Sequence[Any]) -> List[ElementPair]:
+    old_groups = _group_by_id(before)
+    new_groups = _group_by_id(after)
+    pairs: List[ElementPair] = []
+    for element_id in {**old_groups, **new_groups}:
+        old_items = old_groups.get(element_id, [])
+        new_items = new_groups.get(element_id, [])
+        if old_items == new_items:
+            continue
+        pairs.extend((item, None) for item in old_items)
+        pairs.extend((None, item) for item in new_items)
+    return pairs
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+def compute_delta(
+    before: Dict[str, Any], after: Dict[str, Any], scope: PatchScope
+) -> EngineDelta:
+    """Derive changed elements from patch paths instead of diffing whole models.
+
+    Operacie na poli prvkov (``/nodes/3/name``) menia len prvok na danej
+    pozicii. Ak patch pridava, maze alebo presuva prvky kolekcie, pozicie sa
+    posuvaju a kolekcia sa porovna podla id.
+    """
+    delta = EngineDelta(full=scope.full, reordered=set(scope.reordered))
+    if scope.full:
+        return delta
+    for name in _COLLECTIONS:
+        old_items = _as_list(before.get(name))
+        new_items = _as_list(after.get(name))
+        if name in delta.reordered:
+            delta.pairs[name] = _diff_by_id(old_items, new_items)
+            continue
+        for pos in sorted(scope.positions[name]):
+            old = old_items[pos] if pos < len(old_items) else None
+            new = new_items[pos] if pos < len(new_items) else None
+            if old != new:
+                delta.pairs[name].append((old, new))
+    return delta
+
+
+def _node_signature(node: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str, str]]:
+    if node is None:
+        return None
+    return (
+        _element_id(node),
+        _normalize_node_type(node.get("type")),
+        str(node.get("laneId") or ""),
+    )
+
+
+def _flow_signature(flow: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    if flow is None:
+        return None
+    return (
+        _element_id(flow),
+        _flow_endpoints(flow),
+        _normalize_flow_type(flow.get("type") or flow.get("flowType")),
+    )
+
+
+@dataclass
+class DirtySet:
+    nodes: Set[str] = field(default_factory=set)
+    flows: Set[str] = field(default_factory=set)
+    lanes: Set[str] = field(default_factory=set)
+    topology: bool = False
+
+
+def _incident_flows(index: MentorIndex, node_ids: Iterable[str]) -> Set[str]:
+    flow_ids: Set[str] = set()
+    for node_id in node_ids:
+        flow_ids.update(index.incoming.get(node_id, ()))
+        flow_ids.update(index.outgoing.get(node_id, ()))
+    return flow_ids
+
+
+def dirty_elements(delta: EngineDelta, index: MentorIndex) -> DirtySet:
+    """Expand changed elements to everything whose findings may differ."""
+    dirty = DirtySet(topology=bool(delta.reordered & {"nodes", "flows"}))
+
+    changed_nodes: Set[str] = set()
+    retyped: Set[str] = set()
+    for old, new in delta.pairs["nodes"]:
+        for node in (old, new):
+            if node is None:
+                continue
+            if not _element_id(node):
+                dirty.topology = True
+            changed_nodes.add(_element_id(node))
+            lane_id = str(node.get("laneId") or "")
+            if lane_id:
+                dirty.lanes.add(lane_id)
+        old_sig, new_sig = _node_signature(old), _node_signature(new)
+        if old_sig != new_sig:
+            dirty.topology = True
+            if old_sig is None or new_sig is None or old_sig[:2] != new_sig[:2]:
+                retyped.update(sig[0] for sig in (old_sig, new_sig) if sig)
+
+    # node_subprocess_id dietata zavisi od existencie a typu rodica
+    children: Set[str] = set()
+    if retyped:
+        for node_id, node in index.nodes_by_id.items():
+            parent = _pick_first(node, SUBPROCESS_PARENT_KEYS)
+            if parent and str(parent) in retyped:
+                children.add(node_id)
+
+    changed_flows: Set[str] = set()
+    for old, new in delta.pairs["flows"]:
+        for flow in (old, new):
+            if flow is None:
+                continue
+            changed_flows.add(_element_id(flow))
+            src, tgt = _flow_endpoints(flow)
+            dirty.nodes.update(node_id for node_id in (src, tgt) if node_id)
+        if _flow_signature(old) != _flow_signature(new):
+            dirty.topology = True
+
+    changed_lanes: Set[str] = set()
+    for old, new in delta.pairs["lanes"]:
+        changed_lanes.update(_element_id(lane) for lane in (old, new) if lane is not None)
+    dirty.lanes |= changed_lanes
+
+    dirty.nodes |= changed_nodes | children
+    pool_nodes = set(changed_nodes | children)
+    for lane_id in changed_lanes:
+        pool_nodes.update(index.lane_node_ids.get(lane_id, ()))
+    dirty.flows = changed_flows | _incident_flows(index, pool_nodes)
+    dirty.nodes.discard("")
+    dirty.flows.discard("")
+    dirty.lanes.discard("")
+    return dirty
+
+
+class _Positions:
+    def __init__(self, index: MentorIndex) -> None:
+        self.index = index
+        self.node = {node_id: pos for pos, node_id in enumerate(index.nodes_by_id)}
+        self.flow = {flow_id: pos for pos, flow_id in enumerate(index.flows_by_id)}
+        self.lane = {_element_id(lane): pos for pos, lane in enumerate(index.lanes)}
+
+    def owner(self, scope: str, finding: MentorFinding) -> Optional[str]:
+        target_id = finding.target.id
+        if scope == "node" and finding.target.type == "sequenceFlow":
+            flow = self.index.flows_by_id.get(target_id)
+            return str(flow.get("source") or "") if flow else None
+        return target_id
+
+    def key(self, scope: str, finding: MentorFinding) -> Tuple[int, int]:
+        owner = self.owner(scope, finding) or ""
+        if scope == "flow":
+            return self.flow[owner], 0
+        if scope == "lane":
+            return self.lane[owner], 0
+        if finding.target.type == "sequenceFlow":
+            outgoing = [
+                flow_id
+                for flow_id in self.index.outgoing.get(owner, [])
+                if self.index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
+            ]
+            return self.node[owner], outgoing.index(finding.target.id)
+        return self.node[owner], 0
+
+    def exists(self, scope: str, owner: Optional[str]) -> bool:
+        if owner is None:
+            return False
+        table = {"node": self.node, "flow": self.flow, "lane": self.lane}[scope]
+        return owner in table
+
+
+def _has_duplicate_ids(index: MentorIndex) -> bool:
+    """Duplicitne id nemaju jednoznacneho vlastnika ani poradie findingov."""
+    for items in (index.nodes, index.flows, index.lanes):
+        ids = [element_id for element_id in map(_element_id, items) if element_id]
+        if len(ids) != len(set(ids)):
+            return True
+    return False
+
+
+def review_delta(
+    engine_json: Dict[str, Any],
+    index: MentorIndex,
+    dirty: DirtySet,
+    previous: Sequence[MentorFinding],
+) -> List[MentorFinding]:
+    """Re-run scoped rules on dirty elements and merge with untouched findings."""
+    previous_by_rule: Dict[str, List[MentorFinding]] = {}
+    for finding in previous:
+        previous_by_rule.setdefault(finding.id.split(":", 1)[0], []).append(finding)
+
+    positions = _Positions(index)
+    views = {
+        "node": index.restricted(node_ids=dirty.nodes),
+        "flow": index.restricted(flow_ids=dirty.flows),
+        "lane": index.restricted(lane_ids=dirty.lanes),
+    }
+    dirty_ids = {"node": dirty.nodes, "flow": dirty.flows, "lane": dirty.lanes}
+
+    findings: List[MentorFinding] = []
+    for module in RULE_MODULES:
+        scope = module.SCOPE
+        prior = previous_by_rule.get(module.RULE_ID, [])
+        if scope == "global":
+            findings.extend(module.check(engine_json, index) if dirty.topology else prior)
+            continue
+        kept = []
+        for finding in prior:
+            owner = positions.owner(scope, finding)
+            if positions.exists(scope, owner) and owner not in dirty_ids[scope]:
+                kept.append(finding)
+        fresh = module.check(engine_json, views[scope])
+        findings.extend(sorted(kept + fresh, key=lambda f: positions.key(scope, f)))
+    return findings
+
+
+def review_incremental(
+    engine_json: Dict[str, Any],
+    patch: Sequence[Dict[str, Any]],
+    previous_findings: Optional[Sequence[MentorFinding]],
+) -> Tuple[Dict[str, Any], List[MentorFinding], Dict[str, Any]]:
+    """Apply ``patch`` and return ``(patched, findings, stats)``.
+
+    ``engine_json`` je model, ku ktoremu patria ``previous_findings``. Vysledok
+    je zhodny s plnym ``run_rules`` nad patchnutym modelom.
+    """
+    scope = scan_patch(patch)
+    patched = apply_json_patch(engine_json, patch)
+    delta = compute_delta(engine_json, patched, scope)
+    if previous_findings is None or delta.full:
+        return patched, run_rules(patched), {"mode": "full"}
+
+    index = build_index(patched)
+    if _has_duplicate_ids(index):
+        return patched, run_rules(patched), {"mode": "full"}
+    dirty = dirty_elements(delta, index)
+    findings = review_delta(patched, index, dirty, previous_findings)
+    stats = {
+        "mode": "incremental",
+        "dirty_nodes": len(dirty.nodes),
+        "dirty_flows": len(dirty.flows),
+        "dirty_lanes": len(dirty.lanes),
+        "global_rerun": dirty.topology,
+    }
+    return patched, findings, stats
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import copy
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_OPS = {"add", "remove", "replace", "move", "copy", "test"}
+
+
+def decode_pointer(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer '{path}'")
+    tokens = path.lstrip("/").split("/") if path != "/" else [""]
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in tokens if token != ""
+    ]
+
+
+@dataclass(frozen=True)
+class CompiledOp:
+    op: str
+    path: str
+    tokens: Tuple[str, ...]
+    from_tokens: Optional[Tuple[str, ...]] = None
+    value: Any = None
+
+
+def compile_patch(operations: Sequence[Dict[str, Any]]) -> List[CompiledOp]:
+    """Validate every op and decode its pointers before anything is applied."""
+    compiled: List[CompiledOp] = []
+    for op in operations:
+        operation = op.get("op")
+        path = op.get("path")
+        if operation is None or path is None:
+            raise ValueError("Patch operation missing op or path")
+        if operation not in _OPS:
+            raise ValueError(f"Unsupported patch operation '{operation}'")
+        tokens = tuple(decode_pointer(path))
+        if operation == "remove" and not tokens:
+            raise ValueError("Cannot remove the document root")
+        from_tokens = None
+        if operation in {"move", "copy"}:
+            from_path = op.get("from")
+            if not from_path:
+                raise ValueError(f'{operation} operation requires "from" field')
+            from_tokens = tuple(decode_pointer(from_path))
+            if operation == "move" and tokens[: len(from_tokens)] == from_tokens and tokens != from_tokens:
+                raise ValueError(f"Cannot move '{from_path}' into its own child '{path}'")
+        compiled.append(CompiledOp(operation, path, tokens, from_tokens, op.get("value")))
+    return compiled
+
+
+def _parse_index(token: str, length: int, allow_end: bool = False) -> int:
+    if token == "-":
+        if allow_end:
+            return length
+        raise ValueError("'-' is only permitted for appending to arrays")
+    try:
+        index = int(token)
+    except ValueError as exc:  # pragma: no cover
+        raise ValueError(f"Invalid array index '{token}'") from exc
+    if index < 0 or index > length or (index == length and not allow_end):
+        raise ValueError(f"Array index out of range: {token}")
+    return index
+
+
+def _child(container: Any, token: str) -> Tuple[Any, Any]:
+    if isinstance(container, list):
+        idx = _parse_index(token, len(container))
+        return idx, container[idx]
+    if isinstance(container, dict):
+        if token not in container:
+            raise ValueError(f"Path segment '{token}' not found")
+        return token, container[token]
+    raise ValueError(f"Cannot traverse into non-container at '{token}'")
+
+
+class _Workspace:
+    """Path-copying view of a document.
+
+    Kontajnery sa kopiruju (plytko) az pri prvom zapise cez ne; vsetko
+    ostatne zdiela struktura s povodnym dokumentom, ktory sa nikdy nemeni.
+    ``_owned`` drzi referencie na vlastne kopie, aby sa ich ``id`` nerecyklovali.
+    """
+
+    def __init__(self, document: Any) -> None:
+        self.root = document
+        self._owned: Dict[int, Any] = {}
+
+    def _own(self, value: Any) -> Any:
+        if isinstance(value, (dict, list)) and id(value) not in self._owned:
+            value = value.copy()
+            self._owned[id(value)] = value
+        return value
+
+    def get(self, tokens: Sequence[str]) -> Any:
+        current = self.root
+        for token in tokens:
+            _, current = _child(current, token)
+        return current
+
+    def writable_parent(self, tokens: Sequence[str]) -> Tuple[Any, str]:
+        self.root = self._own(self.root)
+        current = self.root
+        for token in tokens[:-1]:
+            key, child = _child(current, token)
+            owned = self._own(child)
+            if owned is not child:
+                current[key] = owned
+            current = owned
+        return current, tokens[-1]
+
+    def add(self, tokens: Sequence[str], value: Any) -> None:
+        if not tokens:
+            self.root = value
+            return
+        parent, key = self.writable_parent(tokens)
+        if isinstance(parent, list):
+            idx = _parse_index(key, len(parent), allow_end=True)
+            parent.insert(idx, value)
+        elif isinstance(parent, dict):
+            parent[key] = value
+        else:
+            raise ValueError("Cannot add to non-container parent")
+
+    def replace(self, tokens: Sequence[str], value: Any) -> None:
+        if not tokens:
+            self.root = value
+            return
+        parent, key = self.writable_parent(tokens)
+        if isinstance(parent, list):
+            parent[_parse_index(key, len(parent))] = value
+        elif isinstance(parent, dict):
+            if key not in parent:
+                raise ValueError(f"Path '{'/'.join(tokens)}' not found for replace")
+            parent[key] = value
+        else:
+            raise ValueError("Cannot replace in non-container parent")
+
+    def remove(self, tokens: Sequence[str]) -> Any:
+        parent, key = self.writable_parent(tokens)
+        if isinstance(parent, list):
+            return parent.pop(_parse_index(key, len(parent)))
+        if isinstance(parent, dict):
+            if key not in parent:
+                raise ValueError(f"Path '{'/'.join(tokens)}' not found for remove")
+            return parent.pop(key)
+        raise ValueError("Cannot remove from non-container parent")
+
+
+def _apply(workspace: _Workspace, op: CompiledOp) -> None:
+    if op.op == "add":
+        workspace.add(op.tokens, copy.deepcopy(op.value))
+    elif op.op == "replace":
+        workspace.replace(op.tokens, copy.deepcopy(op.value))
+    elif op.op == "remove":
+        workspace.remove(op.tokens)
+    elif op.op == "move":
+        # presunuta hodnota ostava zdielana, kopiruje sa az pri zapise do nej
+        workspace.add(op.tokens, workspace.remove(op.from_tokens or ()))
+    elif op.op == "copy":
+        workspace.add(op.tokens, copy.deepcopy(workspace.get(op.from_tokens or ())))
+    elif workspace.get(op.tokens) != op.value:
+        raise ValueError(f"test operation failed at path '{op.path}'")
+
+
+def apply_json_patch_with_stats(
+    document: Any, operations: Sequence[Dict[str, Any]]
+) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Apply a patch atomically; returns ``(patched, per-op timings)``.
+
+    Vysledok zdiela nezmenene casti s ``document``, ktory ostava nedotknuty
+    aj pri chybe (napr. neuspesny ``test``), takze rollback je zadarmo.
+    """
+    compiled = compile_patch(operations)
+    workspace = _Workspace(document)
+    timings: List[Dict[str, Any]] = []
+    for op in compiled:
+        started = time.perf_counter()
+        _apply(workspace, op)
+        timings.append(
+            {"op": op.op, "path": op.path, "ms": round((time.perf_counter() - started) * 1000, 3)}
+        )
+    return workspace.root, timings
+
+
+def apply_json_patch(document: Any, operations: Sequence[Dict[str, Any]]) -> Any:
+    compiled = compile_patch(operations)
+    workspace = _Workspace(document)
+    for op in compiled:
+        _apply(workspace, op)
+    return workspace.root
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .validator import _lint_label_rule, _lint_role, _normalize_alias_token, detect_conflicts, lint_kb
+
+
+class KbIndex:
+    """Rule-id and alias-ownership index over one KB state.
+
+    Plny lint bezi raz pri ``build``; dalsie zmeny sa validuju cez
+    ``check_delta`` len v rozsahu pridanych pravidiel a zmenenych roli a
+    index sa posunie na novy stav cez ``advance``.
+    """
+
+    def __init__(self, state: Dict[str, Any]) -> None:
+        self.state = state
+        self.rule_ids: Set[str] = set()
+        self.rule_count = 0
+        self.alias_owner: Dict[str, str] = {}
+        self.issues: List[str] = []
+
+    @classmethod
+    def build(cls, state: Dict[str, Any]) -> "KbIndex":
+        index = cls(state)
+        label_rules = state["label_rules"].get("label_rules")
+        if isinstance(label_rules, list):
+            index.rule_count = len(label_rules)
+            index.rule_ids = {
+                str(entry["id"]) for entry in label_rules if isinstance(entry, dict) and entry.get("id")
+            }
+        aliases = state["aliases"].get("aliases")
+        if isinstance(aliases, dict):
+            for role, alias_list in aliases.items():
+                if isinstance(alias_list, list):
+                    index._own(role, alias_list)
+        index.issues = lint_kb(state["label_rules"], state["aliases"]) + detect_conflicts(state["aliases"])
+        return index
+
+    def _own(self, role: str, alias_list: List[Any]) -> None:
+        for alias in alias_list:
+            token = _normalize_alias_token(str(alias))
+            if token:
+                self.alias_owner.setdefault(token, role)
+
+    def check_delta(self, new_rules: List[Any], changed_roles: Dict[str, Any]) -> List[str]:
+        """Lint and conflict issues introduced by appended rules and rewritten roles."""
+        issues: List[str] = []
+        seen_ids: Set[str] = set()
+        for offset, entry in enumerate(new_rules):
+            issues.extend(
+                _lint_label_rule(self.rule_count + offset, entry, seen_ids, self.rule_ids)
+            )
+        claimed: Dict[str, str] = {}
+        for role, alias_list in changed_roles.items():
+            role_issues = _lint_role(role, alias_list)
+            issues.extend(role_issues)
+            if role_issues:
+                continue
+            for alias in alias_list:
+                token = _normalize_alias_token(str(alias))
+                owner = self.alias_owner.get(token)
+                if owner is None or owner in changed_roles:
+                    owner = claimed.get(token)
+                if owner and owner != role:
+                    issues.append(
+                        f"Alias '{alias}' already assigned to role '{owner}' and cannot also belong to '{role}'"
+                    )
+                else:
+                    claimed[token] = role
+        return issues
+
+    def advance(
+        self, state: Dict[str, Any], new_rules: List[Any], changed_roles: Dict[str, Any]
+    ) -> None:
+        """Move the index to ``state`` (the result of an already checked delta)."""
+        self.state = state
+        self.rule_count += len(new_rules)
+        self.rule_ids.update(str(entry["id"]) for entry in new_rules)
+        for role, alias_list in changed_roles.items():
+            for token in [token for token, owner in self.alias_owner.items() if owner == role]:
+                del self.alias_owner[token]
+            self._own(role, alias_list)
+
+
+class FullLintJob:
+    """Full ``lint_kb`` + ``detect_conflicts`` over a KB snapshot in a background thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.result: Dict[str, Any] = {"state": "idle"}
+
+    def start(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return dict(self.result)
+            self.result = {"state": "running", "started_at": time.time()}
+            self._thread = threading.Thread(target=self._run, args=(state,), daemon=True)
+            self._thread.start()
+            return dict(self.result)
+
+    def _run(self, state: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        issues = lint_kb(state["label_rules"], state["aliases"]) + detect_conflicts(state["aliases"])
+        with self._lock:
+            self.result = {
+                **self.result,
+                "state": "done",
+                "issues": issues,
+                "ms": round((time.perf_counter() - started) * 1000, 3),
+                "finished_at": time.time(),
+            }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.result)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
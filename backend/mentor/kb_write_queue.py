@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import itertools
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from subprocess import CalledProcessError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+from services.file_versions import file_lock
+from services.storage_io import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COALESCE_S = 0.2
+COMMIT_ATTEMPTS = 3
+RETRY_DELAY_S = 0.5
+# Kolko dokoncenych ticketov si fronta pamata pre ``status``.
+MAX_FINISHED = 1024
+
+StateLoader = Callable[[], Dict[str, Any]]
+StateCopier = Callable[[Dict[str, Any]], Dict[str, Any]]
+StateUpdate = Callable[[Dict[str, Any], Dict[str, Any]], Tuple[Iterable[str], Iterable[str]]]
+FileStamps = Tuple[Optional[Tuple[int, int]], ...]
+
+
+@dataclass
+class _Update:
+    ticket: str
+    mutate: StateUpdate
+    touched: Set[str]
+    proposal_ids: List[str]
+    attempts: int = 0
+
+
+def _coalesce_s() -> float:
+    try:
+        return max(0.0, float(os.getenv("MENTOR_KB_COALESCE_S", DEFAULT_COALESCE_S)))
+    except ValueError:
+        return DEFAULT_COALESCE_S
+
+
+def dump_yaml(data: Any) -> str:
+    return yaml.safe_dump(  # type: ignore[no-untyped-call]
+        data,
+        sort_keys=False,
+        allow_unicode=True,
+        indent=2,
+    )
+
+
+class KbWriteQueue:
+    """In-memory KB state with coalesced YAML writes and git commits.
+
+    ``update`` meni stav okamzite (pod zamkom) a vrati ticket; zapis suborov
+    a ``git commit`` robi vlakno na pozadi po davkach. Stav sa nikdy nemeni
+    na mieste, kazdy update vymeni cely slovnik, takze worker moze zapisovat
+    zachyteny snapshot bez drzania zamku.
+
+    Subory mozu menit aj ine procesy (dalsi uvicorn worker, rucna uprava).
+    Kym nic necaka na zapis, zmena mtime/velkosti znamena nove nacitanie z
+    disku. Zapis a commit bezia pod ``file_lock``; ak sa subory medzicasom
+    zmenili, davka sa znova prehra (``mutate``) nad stavom z disku. Neuspesny
+    commit sa opakuje ``COMMIT_ATTEMPTS`` krat, potom je ticket ``failed`` a
+    fronta ``dirty``: dalsi commit zapise a prida vsetky subory.
+    """
+
+    def __init__(
+        self,
+        repo_root: Path,
+        files: Dict[str, Path],
+        loader: StateLoader,
+        *,
+        coalesce_s: Optional[float] = None,
+        copier: StateCopier = copy.deepcopy,
+        lock_file: Optional[Path] = None,
+        retry_delay_s: float = RETRY_DELAY_S,
+    ) -> None:
+        self.repo_root = repo_root
+        self.files = files
+        self.coalesce_s = _coalesce_s() if coalesce_s is None else coalesce_s
+        self.lock_file = lock_file or repo_root / ".kb-write"
+        self.retry_delay_s = retry_delay_s
+        self.dirty = False
+        self._loader = loader
+        self._copier = copier
+        self._state: Optional[Dict[str, Any]] = None
+        self._disk_stamps: FileStamps = ()
+        self._pending: List[_Update] = []
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._finished: deque = deque()
+        self._in_flight = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+        self._atexit_registered = False
+        self._flush_now = threading.Event()
+
+    def _stamps(self) -> FileStamps:
+        stamps = []
+        for name in sorted(self.files):
+            try:
+                stat = self.files[name].stat()
+            except OSError:
+                stamps.append(None)
+                continue
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def _load(self) -> Dict[str, Any]:
+        # Peciatky pred citanim: zmena pocas citania vyvola dalsie nacitanie.
+        self._disk_stamps = self._stamps()
+        self._state = self._loader()
+        return self._state
+
+    def _current(self) -> Dict[str, Any]:
+        if self._state is None:
+            return self._load()
+        if not self._pending and not self._in_flight and self._stamps() != self._disk_stamps:
+            logger.info("KB files changed on disk, reloading")
+            return self._load()
+        return self._state
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._current())
+
+    def inspect(self, reader: Callable[[Dict[str, Any]], None]) -> None:
+        """Run ``reader`` on the live state under the lock (read only, no copy)."""
+        with self._lock:
+            reader(self._current())
+
+    def update(self, mutate: StateUpdate) -> str:
+        """Apply ``mutate(current, preview)`` and queue the commit.
+
+        ``mutate`` upravuje ``preview`` (kopiu stavu cez ``copier``),
+        ``current`` len cita.
+        Vracia (zmenene dokumenty, id navrhov) alebo vyhodi vynimku, vtedy sa
+        stav nemeni a nic sa nezapisuje. Ak sa KB subory pred zapisom zmenia
+        inde, ``mutate`` sa zavola znova nad novym stavom.
+        """
+        with self._lock:
+            current = self._current()
+            preview = self._copier(current)
+            touched, proposal_ids = mutate(current, preview)
+            touched = {name for name in touched if name in self.files}
+            ticket = f"kbq_{next(self._ids):06d}"
+            self._state = preview
+            self._pending.append(_Update(ticket, mutate, touched, list(proposal_ids)))
+            self._results[ticket] = {"state": "pending", "commit_id": None}
+            self._ensure_worker()
+            self._wakeup.notify()
+        return ticket
+
+    def status(self, ticket: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._results.get(ticket)
+            return dict(result) if result is not None else None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued update is committed (or failed)."""
+        with self._lock:
+            if self._pending:
+                self._flush_now.set()
+                self._wakeup.notify()
+            return self._idle.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout=timeout
+            )
+
+    def reload(self) -> None:
+        """Drop the cached state so the next update rereads YAML from disk."""
+        self.flush()
+        with self._lock:
+            self._state = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name="kb-write-queue", daemon=True)
+        self._worker.start()
+        if not self._atexit_registered:
+            atexit.register(self.flush, 5.0)
+            self._atexit_registered = True
+
+    def _finish(self, update: _Update, outcome: Dict[str, Any]) -> None:
+        self._results[update.ticket] = outcome
+        self._finished.append(update.ticket)
+        while len(self._finished) > MAX_FINISHED:
+            self._results.pop(self._finished.popleft(), None)
+
+    def _rebase(self, batch: List[_Update]) -> List[_Update]:
+        """Reload the files changed elsewhere and replay ``batch`` on top of them."""
+        logger.info("KB files changed on disk, replaying tickets=%s", [item.ticket for item in batch])
+        state = self._load()
+        kept: List[_Update] = []
+        for item in batch:
+            preview = self._copier(state)
+            try:
+                touched, _ = item.mutate(state, preview)
+            except Exception as exc:
+                self._finish(item, {"state": "failed", "commit_id": None, "error": f"Conflict with KB on disk: {exc}"})
+                continue
+            item.touched = {name for name in touched if name in self.files}
+            state = preview
+            kept.append(item)
+        self._state = state
+        return kept
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                self._wakeup.wait_for(lambda: bool(self._pending))
+            if self.coalesce_s:
+                # Kratke okno, aby sa viac navrhov dostalo do jedneho commitu.
+                self._flush_now.wait(self.coalesce_s)
+            self._flush_now.clear()
+            retry = False
+            with file_lock(self.lock_file):
+                with self._lock:
+                    batch, self._pending = self._pending, []
+                    self._in_flight = len(batch)
+                    if self._stamps() != self._disk_stamps:
+                        batch = self._rebase(batch)
+                    state = self._state or {}
+                    dirty = self.dirty
+                try:
+                    commit_id = self._commit(batch, state, dirty) if batch else None
+                    error = None
+                except Exception as exc:  # pragma: no cover - depends on git setup
+                    logger.warning("KB commit failed: tickets=%s error=%s", [b.ticket for b in batch], exc)
+                    error = str(exc)
+                with self._lock:
+                    # Vlastny zapis (pod file_lock) sa pri dalsom porovnani neberie ako cudzi.
+                    self._disk_stamps = self._stamps()
+                    if error is None:
+                        self.dirty = False
+                    for item in batch:
+                        if error is None:
+                            self._finish(item, {"state": "committed", "commit_id": commit_id, "batch_size": len(batch)})
+                            continue
+                        item.attempts += 1
+                        if item.attempts < COMMIT_ATTEMPTS:
+                            self._results[item.ticket] = {"state": "retrying", "commit_id": None, "error": error}
+                            retry = True
+                        else:
+                            # Stav v pamati aj subory uz zmenu maju, do gitu sa
+                            # dostane s dalsim uspesnym commitom.
+                            self.dirty = True
+                            self._finish(item, {"state": "failed", "commit_id": None, "error": error})
+                    if retry:
+                        self._pending[:0] = [item for item in batch if item.attempts < COMMIT_ATTEMPTS]
+                    self._in_flight = 0
+                    self._idle.notify_all()
+            if retry:
+                time.sleep(self.retry_delay_s)
+
+    def _commit(self, batch: List[_Update], state: Dict[str, Any], dirty: bool = False) -> str:
+        names = set(self.files) if dirty else {name for item in batch for name in item.touched}
+        touched = sorted(name for name in names if name in state)
+        for name in touched:
+            atomic_write_text(self.files[name], dump_yaml(state[name]))
+        paths = [str(self.files[name].relative_to(self.repo_root)) for name in touched]
+        if paths:
+            self._run_git("add", *paths)
+        if self._run_git("diff", "--cached", "--quiet", check=False).returncode == 0:
+            return self._run_git("rev-parse", "HEAD").stdout.strip()
+        proposal_ids = ", ".join(pid for item in batch for pid in item.proposal_ids)
+        try:
+            self._run_git("commit", "--no-verify", "-m", f"mentor: apply {proposal_ids}")
+        except CalledProcessError as exc:
+            raise RuntimeError(exc.stderr.strip() or exc.stdout.strip()) from exc
+        return self._run_git("rev-parse", "HEAD").stdout.strip()
+
+    def _run_git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(  # type: ignore[no-any-unimported]
+            ["git", *args],
+            cwd=str(self.repo_root),
+            check=check,
+            capture_output=True,
+            text=True,
+        )
@@ -107,6 +107,8 @@ class MentorReviewRequest(BaseModel):
     kb_version: Optional[str] = None
     telemetry: Optional[Telemetry] = None
     telemetry_id: Optional[str] = None
+    rules: Optional[List[str]] = None
+    min_severity: Optional[Literal["HARD", "SOFT", "INFO"]] = None
 
 
 class MentorReviewResponse(BaseModel):
@@ -114,6 +116,16 @@ class MentorReviewResponse(BaseModel):
     meta: Dict[str, Any] = Field(default_factory=dict)
 
 
+class MentorIncrementalReviewRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    engine_json: Dict[str, Any]
+    patch: List[JsonPatchOp] = Field(default_factory=list)
+    previous_findings: Optional[List[MentorFinding]] = Field(
+        default=None, alias="previousFindings"
+    )
+
+
 class MentorEngineApplyAuditEntry(BaseModel):
     id: str
     action: str
@@ -146,6 +158,7 @@ class MentorApplyRequest(BaseModel):
 
 class MentorApplyAudit(BaseModel):
     commit_id: Optional[str] = None
+    pending_commit_id: Optional[str] = None
     pr_url: Optional[str] = None
 
 
@@ -153,10 +166,12 @@ class MentorApplyResponse(BaseModel):
     new_kb_version: str
     audit: MentorApplyAudit
     patched_engine_json: Optional[Dict[str, Any]] = None
+    patch_timings: Optional[List[Dict[str, Any]]] = None
 
 
 class ValidationRequest(BaseModel):
     kb_version: Optional[str] = None
+    full_lint: bool = False
 
 
 class ValidationResponse(BaseModel):
@@ -165,11 +180,12 @@ class ValidationResponse(BaseModel):
     pass_state: bool = Field(alias="pass")
     kpi_delta: Dict[str, Any] = Field(default_factory=dict)
     conflicts: List[Dict[str, Any]] = Field(default_factory=list)
+    full_lint: Optional[Dict[str, Any]] = None
 
 
 class ABEvaluationResponse(BaseModel):
-    base: int
-    candidate: int
+    base: str
+    candidate: str
     delta: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -182,3 +198,5 @@ class TelemetrySubmission(BaseModel):
 
 class TelemetrySubmitResponse(BaseModel):
     status: str = "ok"
+    accepted: int = 0
+    dropped: int = 0
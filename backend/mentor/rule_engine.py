@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from functools import cached_property
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.latency_stats import HistogramRegistry
 
 from .models import MentorFinding
-from .rules import RULES
+from .rules import RULE_MODULES
 
 
 def _tokenize(value: str) -> str:
@@ -32,6 +38,21 @@ def _pick_first(mapping: Dict[str, Any], keys: Iterable[str]) -> Optional[Any]:
     return None
 
 
+SUBPROCESS_PARENT_KEYS = (
+    "subProcessId",
+    "subprocessId",
+    "sub_process_id",
+    "parentId",
+    "parent_id",
+)
+
+
+def _flow_endpoints(flow: Dict[str, Any]) -> Tuple[str, str]:
+    src = str(flow.get("source") or flow.get("sourceRef") or flow.get("sourceId") or "")
+    tgt = str(flow.get("target") or flow.get("targetRef") or flow.get("targetId") or "")
+    return src, tgt
+
+
 @dataclass
 class MentorIndex:
     nodes: List[Dict[str, Any]]
@@ -48,6 +69,189 @@ class MentorIndex:
     node_type_token: Dict[str, str]
     flow_type_token: Dict[str, str]
 
+    def restricted(
+        self,
+        *,
+        node_ids: Optional[Iterable[str]] = None,
+        flow_ids: Optional[Iterable[str]] = None,
+        lane_ids: Optional[Iterable[str]] = None,
+    ) -> "MentorIndex":
+        """View limited to the given elements for scoped rule runs.
+
+        Iterovane kolekcie (``nodes_by_id``, ``flows_by_id``, ``lanes``) su
+        zuzene, lookup tabulky a analyzy ostavaju pre cely graf.
+        """
+        view = replace(self)
+        view.__dict__["lane_node_ids"] = self.lane_node_ids
+        if node_ids is not None:
+            view.nodes_by_id = {
+                node_id: self.nodes_by_id[node_id]
+                for node_id in node_ids
+                if node_id in self.nodes_by_id
+            }
+        if flow_ids is not None:
+            view.flows_by_id = {
+                flow_id: self.flows_by_id[flow_id]
+                for flow_id in flow_ids
+                if flow_id in self.flows_by_id
+            }
+        if lane_ids is not None:
+            wanted = set(lane_ids)
+            view.lanes = [lane for lane in self.lanes if str(lane.get("id") or "") in wanted]
+        return view
+
+    # --------- Lazy analyzy: kazda sa pocita najviac raz za review ----------
+    def _is_seq(self, flow_id: str) -> bool:
+        return self.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
+
+    @cached_property
+    def seq_incoming(self) -> Dict[str, List[str]]:
+        """Incoming flow ids per node, restricted to sequence flows."""
+        return {
+            node_id: [flow_id for flow_id in self.incoming.get(node_id, []) if self._is_seq(flow_id)]
+            for node_id in self.nodes_by_id
+        }
+
+    @cached_property
+    def seq_outgoing(self) -> Dict[str, List[str]]:
+        """Outgoing flow ids per node, restricted to sequence flows."""
+        return {
+            node_id: [flow_id for flow_id in self.outgoing.get(node_id, []) if self._is_seq(flow_id)]
+            for node_id in self.nodes_by_id
+        }
+
+    @cached_property
+    def gateway_degrees(self) -> Dict[str, Tuple[int, int]]:
+        """``(incoming, outgoing)`` sequence-flow degree for every gateway."""
+        return {
+            node_id: (
+                len(self.seq_incoming.get(node_id, [])),
+                len(self.seq_outgoing.get(node_id, [])),
+            )
+            for node_id in self.nodes_by_id
+            if self.node_type_token.get(node_id, "").endswith("gateway")
+        }
+
+    @cached_property
+    def lane_node_ids(self) -> Dict[str, List[str]]:
+        grouped: Dict[str, List[str]] = {}
+        for node_id in self.nodes_by_id:
+            lane_id = self.node_lane_id.get(node_id)
+            if lane_id:
+                grouped.setdefault(lane_id, []).append(node_id)
+        return grouped
+
+    @cached_property
+    def start_event_ids(self) -> List[str]:
+        return [
+            node_id
+            for node_id, token in self.node_type_token.items()
+            if "start" in token and "event" in token
+        ]
+
+    @cached_property
+    def _edges(self) -> List[Tuple[str, str, bool]]:
+        """``(source, target, is_sequence)`` for flows between known nodes."""
+        edges: List[Tuple[str, str, bool]] = []
+        for flow in self.flows:
+            src, tgt = _flow_endpoints(flow)
+            if src not in self.nodes_by_id or tgt not in self.nodes_by_id:
+                continue
+            is_seq = _normalize_flow_type(flow.get("type") or flow.get("flowType")) == "sequenceflow"
+            edges.append((src, tgt, is_seq))
+        return edges
+
+    @cached_property
+    def seq_successors(self) -> Dict[str, List[str]]:
+        successors: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes_by_id}
+        for src, tgt, is_seq in self._edges:
+            if is_seq:
+                successors[src].append(tgt)
+        return successors
+
+    @cached_property
+    def components(self) -> List[Set[str]]:
+        """Weakly connected components over sequence flows, in node order."""
+        neighbors: Dict[str, Set[str]] = {node_id: set() for node_id in self.nodes_by_id}
+        for src, tgt, is_seq in self._edges:
+            if is_seq:
+                neighbors[src].add(tgt)
+                neighbors[tgt].add(src)
+
+        visited: Set[str] = set()
+        components: List[Set[str]] = []
+        for node_id in self.nodes_by_id:
+            if node_id in visited:
+                continue
+            comp: Set[str] = set()
+            queue = deque([node_id])
+            visited.add(node_id)
+            while queue:
+                cur = queue.popleft()
+                comp.add(cur)
+                for nxt in neighbors[cur]:
+                    if nxt not in visited:
+                        visited.add(nxt)
+                        queue.append(nxt)
+            components.append(comp)
+        return components
+
+    @cached_property
+    def component_of(self) -> Dict[str, int]:
+        return {
+            node_id: idx for idx, comp in enumerate(self.components) for node_id in comp
+        }
+
+    @cached_property
+    def reachable_from_start(self) -> Set[str]:
+        """Nodes reachable from any start event along sequence flows."""
+        seen: Set[str] = set(self.start_event_ids)
+        queue = deque(self.start_event_ids)
+        while queue:
+            cur = queue.popleft()
+            for nxt in self.seq_successors[cur]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+    @cached_property
+    def topological_levels(self) -> Dict[str, int]:
+        """Longest-path level per node (all flow types, Kahn's algorithm).
+
+        Uzly v cykloch alebo mimo topologickeho poradia dostanu postupne
+        levely za aktualnym maximom.
+        """
+        outgoing: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes_by_id}
+        indegree = {node_id: 0 for node_id in self.nodes_by_id}
+        for src, tgt, _ in self._edges:
+            outgoing[src].append(tgt)
+            indegree[tgt] += 1
+
+        levels = {node_id: 0 for node_id in self.nodes_by_id}
+        queue = deque(node_id for node_id, deg in indegree.items() if deg == 0)
+        processed: Set[str] = set()
+        while queue:
+            node_id = queue.popleft()
+            if node_id in processed:
+                continue
+            processed.add(node_id)
+            next_level = levels[node_id] + 1
+            for tgt in outgoing[node_id]:
+                if next_level > levels[tgt]:
+                    levels[tgt] = next_level
+                indegree[tgt] -= 1
+                if indegree[tgt] == 0:
+                    queue.append(tgt)
+
+        if len(processed) < len(self.nodes_by_id):
+            max_level = max(levels.values(), default=0)
+            for node_id in self.nodes_by_id:
+                if node_id not in processed:
+                    max_level += 1
+                    levels[node_id] = max_level
+        return levels
+
 
 def build_index(engine_json: Dict[str, Any]) -> MentorIndex:
     nodes = list(engine_json.get("nodes") or [])
@@ -124,16 +328,7 @@ def build_index(engine_json: Dict[str, Any]) -> MentorIndex:
 
     node_subprocess_id: Dict[str, Optional[str]] = {}
     for node_id, node in nodes_by_id.items():
-        candidate = _pick_first(
-            node,
-            [
-                "subProcessId",
-                "subprocessId",
-                "sub_process_id",
-                "parentId",
-                "parent_id",
-            ],
-        )
+        candidate = _pick_first(node, SUBPROCESS_PARENT_KEYS)
         candidate_id = str(candidate) if candidate else None
         if candidate_id and candidate_id in nodes_by_id:
             parent_type = _normalize_node_type(nodes_by_id[candidate_id].get("type"))
@@ -158,9 +353,55 @@ def build_index(engine_json: Dict[str, Any]) -> MentorIndex:
     )
 
 
-def run_rules(engine_json: Dict[str, Any]) -> List[MentorFinding]:
+SEVERITY_RANK = {"INFO": 0, "SOFT": 1, "HARD": 2}
+RULE_IDS = tuple(module.RULE_ID for module in RULE_MODULES)
+
+# Cas jednotlivych pravidiel v ms, agregovany za zivot procesu.
+RULE_HISTOGRAMS = HistogramRegistry()
+
+
+def select_rules(
+    rule_ids: Optional[Iterable[str]] = None, min_severity: Optional[str] = None
+) -> List[ModuleType]:
+    """Rule modules in evaluation order, filtered by allowlist and severity."""
+    modules = list(RULE_MODULES)
+    if rule_ids is not None:
+        wanted = set(rule_ids)
+        unknown = wanted.difference(RULE_IDS)
+        if unknown:
+            raise ValueError(f"Unknown rule ids: {', '.join(sorted(unknown))}")
+        modules = [module for module in modules if module.RULE_ID in wanted]
+    if min_severity is not None:
+        threshold = SEVERITY_RANK[min_severity]
+        modules = [module for module in modules if SEVERITY_RANK[module.SEVERITY] >= threshold]
+    return modules
+
+
+def run_rules_with_stats(
+    engine_json: Dict[str, Any],
+    *,
+    rule_ids: Optional[Iterable[str]] = None,
+    min_severity: Optional[str] = None,
+) -> Tuple[List[MentorFinding], Dict[str, Dict[str, Any]]]:
+    """Run selected rules; return findings and ``{rule_id: {"ms", "findings"}}``."""
+    modules = select_rules(rule_ids, min_severity)
     index = build_index(engine_json)
     findings: List[MentorFinding] = []
-    for rule in RULES:
-        findings.extend(rule(engine_json, index))
+    stats: Dict[str, Dict[str, Any]] = {}
+    for module in modules:
+        started = time.perf_counter()
+        produced = module.check(engine_json, index)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        RULE_HISTOGRAMS.observe(module.RULE_ID, elapsed_ms)
+        stats[module.RULE_ID] = {"ms": round(elapsed_ms, 3), "findings": len(produced)}
+        findings.extend(produced)
+    return findings, stats
+
+
+def run_rules(engine_json: Dict[str, Any]) -> List[MentorFinding]:
+    findings, _ = run_rules_with_stats(engine_json)
     return findings
+
+
+def rule_histograms() -> Dict[str, Dict[str, Any]]:
+    return RULE_HISTOGRAMS.snapshot()
@@ -1,24 +1,49 @@
 from __future__ import annotations
 
-import copy
-from typing import Any, Dict, List, Tuple
+import os
+from typing import Any, Dict, List, Set, Tuple
 
+from .batch_review import ReviewCache, engine_hash, ruleset_version
+from .incremental import review_incremental
 from .models import (
     MentorEngineApplyAuditEntry,
     MentorFinding,
+    MentorIncrementalReviewRequest,
     MentorReviewRequest,
 )
-from .rule_engine import run_rules
+from .rule_engine import run_rules, run_rules_with_stats
 
 
 class MentorRuleError(Exception):
     pass
 
 
-def _set_node_name(engine_json: Dict[str, Any], node_id: str, value: str) -> bool:
-    for node in engine_json.get("nodes", []):
+def _ttl_s() -> float:
+    try:
+        return float(os.getenv("MENTOR_FINDINGS_TTL_S", "300"))
+    except ValueError:
+        return 300.0
+
+
+# Findings z posledneho /mentor/review, aby /mentor/apply nespustal pravidla znova.
+FINDINGS_CACHE = ReviewCache(max_size=256, ttl_s=_ttl_s())
+
+
+def _findings_key(engine_json: Dict[str, Any]) -> Tuple[str, str]:
+    return ruleset_version(), engine_hash(engine_json)
+
+
+def _set_node_name(
+    engine_json: Dict[str, Any], node_id: str, value: str, copied: Set[int]
+) -> bool:
+    """Rename a node copy-on-write; ``copied`` holds indexes already detached."""
+    nodes = engine_json.get("nodes") or []
+    for idx, node in enumerate(nodes):
         if str(node.get("id")) == str(node_id):
-            node["name"] = value
+            if idx not in copied:
+                nodes[idx] = dict(node)
+                copied.add(idx)
+            nodes[idx]["name"] = value
             return True
     return False
 
@@ -28,18 +53,41 @@ class MentorRuleService:
         self, payload: MentorReviewRequest
     ) -> Tuple[List[MentorFinding], Dict[str, object]]:
         engine_json = payload.engine_json or {}
-        nodes = engine_json.get("nodes") or []
-        flows = engine_json.get("flows") or []
-        lanes = engine_json.get("lanes") or []
-        findings = run_rules(engine_json)
-        meta: Dict[str, object] = {
+        try:
+            findings, rule_stats = run_rules_with_stats(
+                engine_json, rule_ids=payload.rules, min_severity=payload.min_severity
+            )
+        except ValueError as exc:
+            raise MentorRuleError(str(exc)) from exc
+        if payload.rules is None and payload.min_severity is None:
+            FINDINGS_CACHE.put(_findings_key(engine_json), findings)
+        meta = self._review_meta(engine_json, findings)
+        meta["rule_stats"] = rule_stats
+        return findings, meta
+
+    def review_incremental(
+        self, payload: MentorIncrementalReviewRequest
+    ) -> Tuple[List[MentorFinding], Dict[str, object]]:
+        """Review ``engine_json`` after ``patch``, reusing ``previous_findings``."""
+        patch = [op.model_dump(by_alias=True) for op in payload.patch]
+        patched, findings, stats = review_incremental(
+            payload.engine_json, patch, payload.previous_findings
+        )
+        meta = self._review_meta(patched, findings)
+        meta["incremental"] = stats
+        return findings, meta
+
+    @staticmethod
+    def _review_meta(
+        engine_json: Dict[str, Any], findings: List[MentorFinding]
+    ) -> Dict[str, object]:
+        return {
             "rule_count": len(findings),
             "engine": "mentor_rules_v1",
-            "node_count": len(nodes),
-            "flow_count": len(flows),
-            "lane_count": len(lanes),
+            "node_count": len(engine_json.get("nodes") or []),
+            "flow_count": len(engine_json.get("flows") or []),
+            "lane_count": len(engine_json.get("lanes") or []),
         }
-        return findings, meta
 
     def apply(
         self,
@@ -48,9 +96,17 @@ class MentorRuleService:
         fix_payload_overrides: Dict[str, Dict[str, Any]],
         findings: List[MentorFinding] | None = None,
     ) -> Tuple[Dict[str, Any], List[MentorEngineApplyAuditEntry]]:
-        current = copy.deepcopy(engine_json)
+        # Shallow copy: menene uzly sa kopiruju az v _set_node_name.
+        current = dict(engine_json)
+        if isinstance(current.get("nodes"), list):
+            current["nodes"] = list(current["nodes"])
+        copied: Set[int] = set()
         if findings is None:
-            findings = run_rules(engine_json)
+            key = _findings_key(engine_json)
+            findings = FINDINGS_CACHE.get(key)
+            if findings is None:
+                findings = run_rules(engine_json)
+                FINDINGS_CACHE.put(key, findings)
 
         findings_by_id = {finding.id: finding for finding in findings}
         audit_log: List[MentorEngineApplyAuditEntry] = []
@@ -67,7 +123,7 @@ class MentorRuleService:
                 value = payload.get("value")
                 if not node_id or value is None:
                     continue
-                if _set_node_name(current, str(node_id), str(value)):
+                if _set_node_name(current, str(node_id), str(value), copied):
                     audit_log.append(
                         MentorEngineApplyAuditEntry(
                             id=finding_id,
@@ -6,6 +6,7 @@ from .common import is_activity_token, make_finding, target_type_for_node
 
 RULE_ID = "activity_is_isolated"
 SEVERITY = "SOFT"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
@@ -14,17 +15,7 @@ def check(_: Dict[str, Any], index: Any) -> List[object]:
         token = index.node_type_token.get(node_id, "")
         if not is_activity_token(token):
             continue
-        incoming_seq = [
-            flow_id
-            for flow_id in index.incoming.get(node_id, [])
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
-        outgoing_seq = [
-            flow_id
-            for flow_id in index.outgoing.get(node_id, [])
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
-        if incoming_seq or outgoing_seq:
+        if index.seq_incoming.get(node_id) or index.seq_outgoing.get(node_id):
             continue
         findings.append(
             make_finding(
@@ -6,6 +6,7 @@ from .common import is_activity_token, make_finding, target_type_for_node
 
 RULE_ID = "activity_requires_name"
 SEVERITY = "SOFT"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
@@ -6,6 +6,7 @@ from .common import is_boundary_event, make_finding
 
 RULE_ID = "boundary_event_no_incoming"
 SEVERITY = "HARD"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
@@ -14,13 +15,7 @@ def check(_: Dict[str, Any], index: Any) -> List[object]:
         token = index.node_type_token.get(node_id, "")
         if not is_boundary_event(node, token):
             continue
-        incoming = index.incoming.get(node_id, [])
-        seq_incoming = [
-            flow_id
-            for flow_id in incoming
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
-        if not seq_incoming:
+        if not index.seq_incoming.get(node_id):
             continue
         findings.append(
             make_finding(
@@ -6,6 +6,7 @@ from .common import is_boundary_event, make_finding
 
 RULE_ID = "boundary_event_max_one_outgoing"
 SEVERITY = "HARD"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
@@ -14,13 +15,7 @@ def check(_: Dict[str, Any], index: Any) -> List[object]:
         token = index.node_type_token.get(node_id, "")
         if not is_boundary_event(node, token):
             continue
-        outgoing = index.outgoing.get(node_id, [])
-        seq_outgoing = [
-            flow_id
-            for flow_id in outgoing
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
-        if len(seq_outgoing) <= 1:
+        if len(index.seq_outgoing.get(node_id, [])) <= 1:
             continue
         findings.append(
             make_finding(
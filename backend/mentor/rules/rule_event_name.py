@@ -6,6 +6,7 @@ from .common import is_event_token, make_finding
 
 RULE_ID = "event_requires_name"
 SEVERITY = "SOFT"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
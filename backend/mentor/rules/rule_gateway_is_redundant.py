@@ -2,29 +2,17 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
-from .common import is_gateway_token, make_finding
+from .common import make_finding
 
 RULE_ID = "gateway_is_redundant"
 SEVERITY = "SOFT"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
     findings: List[object] = []
-    for node_id in index.nodes_by_id:
-        token = index.node_type_token.get(node_id, "")
-        if not is_gateway_token(token):
-            continue
-        incoming_seq = [
-            flow_id
-            for flow_id in index.incoming.get(node_id, [])
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
-        outgoing_seq = [
-            flow_id
-            for flow_id in index.outgoing.get(node_id, [])
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
-        if len(incoming_seq) != 1 or len(outgoing_seq) != 1:
+    for node_id, degree in index.gateway_degrees.items():
+        if degree != (1, 1):
             continue
         findings.append(
             make_finding(
@@ -6,21 +6,16 @@ from .common import make_finding
 
 RULE_ID = "lane_is_empty"
 SEVERITY = "SOFT"
+SCOPE = "lane"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
     findings: List[object] = []
-    nodes_by_lane: Dict[str, int] = {}
-    for node_id, lane_id in index.node_lane_id.items():
-        if not lane_id:
-            continue
-        nodes_by_lane[lane_id] = nodes_by_lane.get(lane_id, 0) + 1
-
     for lane in index.lanes:
         lane_id = str(lane.get("id") or "")
         if not lane_id:
             continue
-        if nodes_by_lane.get(lane_id, 0) > 0:
+        if index.lane_node_ids.get(lane_id):
             continue
         findings.append(
             make_finding(
@@ -6,6 +6,7 @@ from .common import make_finding
 
 RULE_ID = "lane_missing_name"
 SEVERITY = "HARD"
+SCOPE = "lane"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
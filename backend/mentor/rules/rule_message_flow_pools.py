@@ -6,6 +6,7 @@ from .common import make_finding
 
 RULE_ID = "message_flow_between_pools"
 SEVERITY = "HARD"
+SCOPE = "flow"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
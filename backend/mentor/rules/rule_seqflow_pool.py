@@ -6,6 +6,7 @@ from .common import make_finding
 
 RULE_ID = "seqflow_no_cross_pool"
 SEVERITY = "HARD"
+SCOPE = "flow"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
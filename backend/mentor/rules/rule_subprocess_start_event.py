@@ -6,6 +6,7 @@ from .common import make_finding
 
 RULE_ID = "subprocess_start_event_none"
 SEVERITY = "HARD"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
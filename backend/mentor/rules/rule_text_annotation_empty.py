@@ -6,6 +6,7 @@ from .common import make_finding
 
 RULE_ID = "text_annotation_empty"
 SEVERITY = "SOFT"
+SCOPE = "node"
 
 
 def check(_: Dict[str, Any], index: Any) -> List[object]:
@@ -13,13 +14,7 @@ def check(_: Dict[str, Any], index: Any) -> List[object]:
     for node_id, node in index.nodes_by_id.items():
         token = index.node_type_token.get(node_id, "")
         meta = node.get("meta") or {}
-        raw_type = str(node.get("type") or "")
-        is_annotation = (
-            token.endswith("textannotation")
-            or "textannotation" in token
-            or "textAnnotation" in raw_type
-            or meta.get("note") == "textAnnotation"
-        )
+        is_annotation = "textannotation" in token or meta.get("note") == "textAnnotation"
         if not is_annotation:
             continue
         text = (node.get("text") or node.get("name") or node.get("label") or "").strip()
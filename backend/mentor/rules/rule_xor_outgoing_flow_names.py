@@ -6,6 +6,7 @@ from .common import is_gateway_token, make_finding
 
 RULE_ID = "xor_outgoing_flows_require_names"
 SEVERITY = "SOFT"
+SCOPE = "node"
 
 
 def _is_xor_gateway(node: Dict[str, Any], token: str) -> bool:
@@ -46,11 +47,7 @@ def check(_: Dict[str, Any], index: Any) -> List[object]:
             continue
         if not _is_xor_gateway(node, token):
             continue
-        outgoing_seq = [
-            flow_id
-            for flow_id in index.outgoing.get(node_id, [])
-            if index.flow_type_token.get(flow_id, "sequenceflow") == "sequenceflow"
-        ]
+        outgoing_seq = index.seq_outgoing.get(node_id, [])
         if len(outgoing_seq) < 2:
             continue
         for flow_id in outgoing_seq:
@@ -1,7 +1,245 @@
 from __future__ import annotations
 
-from .models import TelemetrySubmitResponse, TelemetrySubmission
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.latency_stats import summarize_latencies
+
+from .models import TelemetrySubmission, TelemetrySubmitResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 10_000
+DEFAULT_FLUSH_S = 2.0
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+# Retencia segmentov: /telemetry/query cita vsetky, preto sa stare mazu.
+DEFAULT_MAX_SEGMENTS = 200
+DEFAULT_RETENTION_S = 7 * 24 * 3600.0
+LATENCY_KEYS = ("latency_ms", "duration_ms", "ms")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _telemetry_dir() -> Path:
+    return Path(os.getenv("TELEMETRY_DIR", "data/telemetry"))
+
+
+def _latency_ms(name: str, value: Any, metadata: Dict[str, Any]) -> Optional[float]:
+    for key in LATENCY_KEYS:
+        if isinstance(metadata.get(key), (int, float)):
+            return float(metadata[key])
+    if name.endswith("_ms") and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def submission_records(payload: TelemetrySubmission, ts: float) -> List[Dict[str, Any]]:
+    """Flatten a submission into one ``run`` record plus one record per event."""
+    base = {"ts": ts, "run_id": payload.run_id, "kb_version": payload.kb_version}
+    records = [
+        {
+            **base,
+            "type": "run",
+            "metrics": payload.telemetry.metrics,
+            "tags": payload.telemetry.tags,
+        }
+    ]
+    for event in payload.telemetry.events:
+        records.append(
+            {
+                **base,
+                "type": event.name,
+                "value": event.value,
+                "latency_ms": _latency_ms(event.name, event.value, event.metadata),
+                "metadata": event.metadata,
+            }
+        )
+    return records
+
+
+class TelemetrySink:
+    """Bounded in-memory buffer flushed to rotated append-only JSONL segments.
+
+    ``offer`` nikdy neblokuje na disku: ak je buffer plny, nove zaznamy sa
+    zahodia a zapocitaju do ``dropped``. Vlakno na pozadi zapisuje davky
+    kazdych ``flush_s`` sekund alebo hned, ked sa buffer naplni do polovice.
+
+    Kazdy proces zapisuje do vlastnych segmentov (pid v nazve) a davku jednym
+    ``os.write`` s ``O_APPEND``, takze sa riadky workerov neprekryvaju. Pri
+    rotacii sa zmazu segmenty nad ``max_segments`` a starsie ako
+    ``retention_s``.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_buffer: int = DEFAULT_BUFFER_SIZE,
+        flush_s: float = DEFAULT_FLUSH_S,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+        retention_s: Optional[float] = DEFAULT_RETENTION_S,
+    ) -> None:
+        self.directory = directory
+        self.max_buffer = max_buffer
+        self.flush_s = flush_s
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.retention_s = retention_s
+        self._seq = itertools.count()
+        self.dropped = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._segment: Optional[Path] = None
+        self._worker: Optional[threading.Thread] = None
+
+    def offer(self, records: List[Dict[str, Any]]) -> int:
+        """Buffer as many records as fit; returns how many were accepted."""
+        with self._lock:
+            room = max(0, self.max_buffer - len(self._buffer))
+            accepted = records[:room]
+            self._buffer.extend(accepted)
+            self.dropped += len(records) - len(accepted)
+            if len(self._buffer) * 2 >= self.max_buffer:
+                self._wakeup.notify()
+            self._ensure_worker()
+        return len(accepted)
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._write(batch)
+        return len(batch)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name="telemetry-sink", daemon=True)
+        self._worker.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                self._wakeup.wait(timeout=self.flush_s)
+            try:
+                self.flush()
+            except Exception as exc:  # pragma: no cover - disk errors
+                logger.warning("Telemetry flush failed: dir=%s error=%s", self.directory, exc)
+
+    def _segment_path(self) -> Path:
+        segment = self._segment
+        if segment is None or not segment.exists() or segment.stat().st_size >= self.segment_bytes:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+            segment = self.directory / f"events-{stamp}-{os.getpid()}-{next(self._seq):04d}.jsonl"
+            self._segment = segment
+            self._prune(keep=segment)
+        return segment
+
+    def _prune(self, keep: Path) -> None:
+        """Drop segments beyond ``max_segments`` (oldest first) or older than ``retention_s``."""
+        segments = sorted(path for path in self.directory.glob("events-*.jsonl") if path != keep)
+        excess = max(0, len(segments) + 1 - self.max_segments)
+        cutoff = time.time() - self.retention_s if self.retention_s is not None else None
+        for idx, path in enumerate(segments):
+            try:
+                if idx < excess or (cutoff is not None and path.stat().st_mtime < cutoff):
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch).encode("utf-8")
+        with self._write_lock:
+            fd = os.open(self._segment_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    def _iter_records(self, since: Optional[float]) -> Iterator[Dict[str, Any]]:
+        with self._write_lock:
+            segments = sorted(self.directory.glob("events-*.jsonl")) if self.directory.exists() else []
+        for segment in segments:
+            if since is not None and segment.stat().st_mtime < since:
+                continue
+            with segment.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # rozpisany riadok pri pade procesu
+        with self._lock:
+            pending = list(self._buffer)
+        yield from pending
+
+    def query(self, event_type: Optional[str] = None, since: Optional[float] = None) -> Dict[str, Any]:
+        """Counts and latency percentiles per event type (flushed + buffered)."""
+        counts: Dict[str, int] = defaultdict(int)
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        for record in self._iter_records(since):
+            rtype = str(record.get("type") or "")
+            if event_type is not None and rtype != event_type:
+                continue
+            if since is not None and float(record.get("ts") or 0) < since:
+                continue
+            counts[rtype] += 1
+            if isinstance(record.get("latency_ms"), (int, float)):
+                latencies[rtype].append(float(record["latency_ms"]))
+        return {
+            "events": {
+                rtype: {"count": count, "latency_ms": summarize_latencies(latencies[rtype])}
+                for rtype, count in sorted(counts.items())
+            },
+            "dropped": self.dropped,
+        }
+
+
+_SINK: Optional[TelemetrySink] = None
+_SINK_LOCK = threading.Lock()
+
+
+def get_sink() -> TelemetrySink:
+    global _SINK
+    with _SINK_LOCK:
+        if _SINK is None:
+            _SINK = TelemetrySink(
+                _telemetry_dir(),
+                max_buffer=int(_env_number("TELEMETRY_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)),
+                flush_s=_env_number("TELEMETRY_FLUSH_S", DEFAULT_FLUSH_S),
+                segment_bytes=int(_env_number("TELEMETRY_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES)),
+                max_segments=int(_env_number("TELEMETRY_MAX_SEGMENTS", DEFAULT_MAX_SEGMENTS)),
+                retention_s=_env_number("TELEMETRY_RETENTION_S", DEFAULT_RETENTION_S),
+            )
+        return _SINK
 
 
 def submit_telemetry(payload: TelemetrySubmission) -> TelemetrySubmitResponse:
-    return TelemetrySubmitResponse()
+    records = submission_records(payload, time.time())
+    accepted = get_sink().offer(records)
+    dropped = len(records) - accepted
+    return TelemetrySubmitResponse(
+        status="ok" if not dropped else "dropped", accepted=accepted, dropped=dropped
+    )
+
+
+def query_telemetry(event_type: Optional[str] = None, window_s: Optional[float] = None) -> Dict[str, Any]:
+    since = time.time() - window_s if window_s is not None else None
+    return get_sink().query(event_type=event_type, since=since)
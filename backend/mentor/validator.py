@@ -1,22 +1,77 @@
 ﻿from __future__ import annotations
 
-from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import yaml
+from typing import AbstractSet, Any, Dict, List, Optional, Set
 
+from .ab_eval import CorpusNotFoundError, EvaluationBusyError, evaluate_ab, has_variant
 from .models import ValidationRequest, ValidationResponse
 
-KB_DIR = Path(__file__).resolve().parent.parent / "kb"
-LABEL_RULES_FILE = KB_DIR / "label_rules.sk.yaml"
-ALIASES_FILE = KB_DIR / "aliases.sk.yaml"
-
 
 def _normalize_alias_token(value: str) -> str:
     normalized = (value or "").strip()
     return normalized.lower()
 
 
+def _lint_label_rule(
+    idx: int, entry: Any, seen_ids: Set[str], known_ids: AbstractSet[str] = frozenset()
+) -> List[str]:
+    """Issues of one label rule; ``seen_ids`` sa doplna o jeho id."""
+    if not isinstance(entry, dict):
+        return [f"label_rules[{idx}] must be an object"]
+    issues: List[str] = []
+    entry_id = entry.get("id")
+    if not entry_id:
+        issues.append(f"label_rules[{idx}] missing id")
+    elif entry_id in seen_ids or entry_id in known_ids:
+        issues.append(f"label_rules duplicate id {entry_id}")
+    else:
+        seen_ids.add(entry_id)
+    if not entry.get("locale"):
+        issues.append(f"label_rules[{idx}] missing locale")
+    patterns = entry.get("patterns")
+    if not isinstance(patterns, list) or not patterns:
+        issues.append(f"label_rules[{idx}] missing patterns")
+    else:
+        for p_idx, pattern in enumerate(patterns):
+            if not isinstance(pattern, dict):
+                issues.append(f"label_rules[{idx}].patterns[{p_idx}] must be an object")
+                continue
+            if not pattern.get("value"):
+                issues.append(f"label_rules[{idx}].patterns[{p_idx}] missing value")
+            mode = pattern.get("mode")
+            if mode not in {"plain", "regex"}:
+                issues.append(f"label_rules[{idx}].patterns[{p_idx}] has invalid mode {mode}")
+    labels = entry.get("labels")
+    if not isinstance(labels, dict):
+        issues.append(f"label_rules[{idx}] missing labels")
+    else:
+        if not labels.get("positive"):
+            issues.append(f"label_rules[{idx}] labels.positive missing")
+        if not labels.get("negative"):
+            issues.append(f"label_rules[{idx}] labels.negative missing")
+    if not entry.get("gateway"):
+        issues.append(f"label_rules[{idx}] missing gateway")
+    return issues
+
+
+def _lint_role(role: Any, alias_list: Any) -> List[str]:
+    if not isinstance(role, str) or not role.strip():
+        return ["alias role names must be non-empty strings"]
+    if not isinstance(alias_list, list) or not alias_list:
+        return [f"aliases[{role}] must be a non-empty list"]
+    issues: List[str] = []
+    seen_role_aliases = set()
+    for alias in alias_list:
+        token = _normalize_alias_token(str(alias))
+        if not token:
+            issues.append(f"aliases[{role}] contains empty alias")
+            continue
+        if token in seen_role_aliases:
+            issues.append(f"aliases[{role}] contains duplicate alias '{alias}'")
+            continue
+        seen_role_aliases.add(token)
+    return issues
+
+
 def lint_kb(label_rules_data: Dict[str, Any], aliases_data: Dict[str, Any]) -> List[str]:
     issues: List[str] = []
 
@@ -28,43 +83,9 @@ def lint_kb(label_rules_data: Dict[str, Any], aliases_data: Dict[str, Any]) -> L
         issues.append("label_rules must be a list")
         label_rules = []
 
-    seen_ids = set()
+    seen_ids: Set[str] = set()
     for idx, entry in enumerate(label_rules):
-        if not isinstance(entry, dict):
-            issues.append(f"label_rules[{idx}] must be an object")
-            continue
-        entry_id = entry.get("id")
-        if not entry_id:
-            issues.append(f"label_rules[{idx}] missing id")
-        elif entry_id in seen_ids:
-            issues.append(f"label_rules duplicate id {entry_id}")
-        else:
-            seen_ids.add(entry_id)
-        if not entry.get("locale"):
-            issues.append(f"label_rules[{idx}] missing locale")
-        patterns = entry.get("patterns")
-        if not isinstance(patterns, list) or not patterns:
-            issues.append(f"label_rules[{idx}] missing patterns")
-        else:
-            for p_idx, pattern in enumerate(patterns):
-                if not isinstance(pattern, dict):
-                    issues.append(f"label_rules[{idx}].patterns[{p_idx}] must be an object")
-                    continue
-                if not pattern.get("value"):
-                    issues.append(f"label_rules[{idx}].patterns[{p_idx}] missing value")
-                mode = pattern.get("mode")
-                if mode not in {"plain", "regex"}:
-                    issues.append(f"label_rules[{idx}].patterns[{p_idx}] has invalid mode {mode}")
-        labels = entry.get("labels")
-        if not isinstance(labels, dict):
-            issues.append(f"label_rules[{idx}] missing labels")
-        else:
-            if not labels.get("positive"):
-                issues.append(f"label_rules[{idx}] labels.positive missing")
-            if not labels.get("negative"):
-                issues.append(f"label_rules[{idx}] labels.negative missing")
-        if not entry.get("gateway"):
-            issues.append(f"label_rules[{idx}] missing gateway")
+        issues.extend(_lint_label_rule(idx, entry, seen_ids))
 
     aliases = aliases_data.get("aliases")
     if aliases is None:
@@ -75,22 +96,7 @@ def lint_kb(label_rules_data: Dict[str, Any], aliases_data: Dict[str, Any]) -> L
         aliases = {}
 
     for role, alias_list in aliases.items():
-        if not isinstance(role, str) or not role.strip():
-            issues.append("alias role names must be non-empty strings")
-            continue
-        if not isinstance(alias_list, list) or not alias_list:
-            issues.append(f"aliases[{role}] must be a non-empty list")
-            continue
-        seen_role_aliases = set()
-        for alias in alias_list:
-            token = _normalize_alias_token(str(alias))
-            if not token:
-                issues.append(f"aliases[{role}] contains empty alias")
-                continue
-            if token in seen_role_aliases:
-                issues.append(f"aliases[{role}] contains duplicate alias '{alias}'")
-                continue
-            seen_role_aliases.add(token)
+        issues.extend(_lint_role(role, alias_list))
 
     return issues
 
@@ -119,30 +125,47 @@ def detect_conflicts(aliases_data: Dict[str, Any]) -> List[str]:
     return conflicts
 
 
-def kpi_delta(base_version: Optional[str], candidate_version: Optional[str]) -> Dict[str, Any]:
-    return {"base_version": base_version, "candidate_version": candidate_version, "delta": 0}
-
-
-def _load_yaml(path: Path, default: Any) -> Any:
-    if not path.exists():
-        return default
-    with path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle)  # type: ignore[no-untyped-call]
-    return data if data is not None else default
-
-
-def validate_kb_version(_: Optional[str]) -> ValidationResponse:
-    label_rules = _load_yaml(LABEL_RULES_FILE, {"label_rules": []})
-    aliases = _load_yaml(ALIASES_FILE, {"locale": "sk", "source": "mentor", "aliases": {}})
-    lint_issues = lint_kb(
-        label_rules if isinstance(label_rules, dict) else {"label_rules": []},
-        aliases if isinstance(aliases, dict) else {"aliases": {}},
-    )
-    conflicts = detect_conflicts(aliases if isinstance(aliases, dict) else {"aliases": {}})
-    passed = not lint_issues and not conflicts
+def kpi_delta(
+    base_version: Optional[str],
+    candidate_version: Optional[str],
+    *,
+    window: int = 20,
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        "base_version": base_version,
+        "candidate_version": candidate_version,
+        "delta": 0,
+    }
+    if not base_version or not candidate_version or base_version == candidate_version:
+        return result
+    # kb_version moze byt aj casova znacka apply; A/B ma zmysel len pre skutocny variant
+    if not has_variant(candidate_version):
+        return result
+    try:
+        evaluation = evaluate_ab(base_version, candidate_version, window=window)
+    except (CorpusNotFoundError, EvaluationBusyError) as exc:
+        result["skipped"] = str(exc)
+        return result
+    result["delta"] = evaluation["changed"]
+    result["findings_delta"] = evaluation["findings_delta"]
+    result["corpus_size"] = evaluation["corpus_size"]
+    return result
+
+
+def validate_kb_version(kb_version: Optional[str], *, full_lint: bool = False) -> ValidationResponse:
+    """Validate the live KB from the apply index; ``full_lint`` re-lints the files on disk in the background.
+
+    When ``kb_version`` names a KB variant, ``kpi_delta`` compares it against ``main`` on the corpus.
+    """
+    from .applier import kb_validation_status, start_full_lint
+
+    if full_lint:
+        start_full_lint()
+    issues, full_lint_status = kb_validation_status()
     resp = ValidationResponse(
-        pass_state=passed,
-        kpi_delta=kpi_delta(None, None),
-        conflicts=lint_issues + conflicts,
+        pass_state=not issues,
+        kpi_delta=kpi_delta("main", kb_version),
+        conflicts=[{"message": issue} for issue in issues],
+        full_lint=full_lint_status,
     )
     return resp
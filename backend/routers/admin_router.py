@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import os
 from pathlib import Path
 
@@ -9,6 +8,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from auth.db import get_connection
 from auth.deps import is_super_admin_email, require_super_admin
 from auth.service import delete_user_by_admin, get_user_by_id
+from services.model_parts import CODECS, collect_garbage, migrate_storage, zstandard
+from services.org_models_storage import list_org_models
 
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_super_admin)])
@@ -26,18 +27,14 @@ def _org_model_items() -> list[dict]:
     for org_dir in base_dir.iterdir():
         if not org_dir.is_dir():
             continue
-        models_dir = org_dir / "models"
-        if not models_dir.exists():
+        if not (org_dir / "models").exists():
             continue
-        for file in models_dir.glob("*.json"):
-            try:
-                data = json.loads(file.read_text(encoding="utf-8"))
-            except Exception:
-                continue
+        # sumare z indexu modelov, bez parsovania engine/diagramu
+        for data in list_org_models(org_dir.name):
             items.append(
                 {
-                    "id": data.get("id") or file.stem,
-                    "name": data.get("name") or file.stem,
+                    "id": data.get("id"),
+                    "name": data.get("name") or data.get("id"),
                     "org_id": org_dir.name,
                     "created_at": data.get("created_at"),
                     "updated_at": data.get("updated_at"),
@@ -167,3 +164,20 @@ def list_admin_models():
         org_id = str(item.get("org_id") or "")
         item["org_name"] = org_names.get(org_id)
     return {"count": len(items), "items": items}
+
+
+@router.post("/storage/migrate")
+def migrate_model_storage(limit: int = 500, compression: str | None = None):
+    """Rewrite up to ``limit`` models into the split layout (and ``compression`` codec); call until remaining is 0."""
+    if compression is not None and compression not in CODECS:
+        raise HTTPException(status_code=400, detail=f"compression musi byt jedno z: {', '.join(CODECS)}.")
+    if compression == "zstd" and zstandard is None:
+        raise HTTPException(status_code=400, detail="zstd nie je na serveri dostupny.")
+    root = Path(os.getenv("BPMN_MODELS_DIR", "data/models"))
+    return migrate_storage(root, limit=max(0, limit), codec=compression)
+
+
+@router.post("/storage/gc")
+def collect_model_blobs():
+    """Delete content blobs no model record points to (older than the GC grace period)."""
+    return collect_garbage(Path(os.getenv("BPMN_MODELS_DIR", "data/models")))
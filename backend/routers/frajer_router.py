@@ -15,6 +15,7 @@ from services.architect.normalize import (
 from services.bpmn_svc import generate_bpmn_from_json
 from services.frajer_kb_engine import FrajerKB
 from services.frajer_services import draft_engine_json_from_text
+from services.stage_timing import StageTimer, stage_histograms
 
 router = APIRouter(prefix="/frajer", tags=["Frajer"])
 
@@ -178,25 +179,34 @@ async def _resolve_preview_params(request: Request) -> tuple[str, bool, str, str
 def _build_preview_artifacts(
     *, text: str, use_kb: bool, locale: str, kb_variant: str
 ) -> dict:
-    if use_kb:
-        draft, kb_meta = _build_engine_json_with_kb(
-            text, locale=locale, kb_variant=kb_variant
-        )
-    else:
-        draft = draft_engine_json_from_text(text, locale=locale, kb_variant=kb_variant)
-        kb_meta = {
-            "variant_requested": kb_variant,
-            "variant_resolved": "main",
-            "meta": {},
-        }
-    draft = _normalize_node_names(draft)
-    normalized = normalize_engine_payload(draft)
-    processed = postprocess_engine_json(normalized, locale=locale)
+    timer = StageTimer("frajer.preview")
+    with timer.stage("draft"):
+        if use_kb:
+            draft, kb_meta = _build_engine_json_with_kb(
+                text, locale=locale, kb_variant=kb_variant
+            )
+        else:
+            draft = draft_engine_json_from_text(
+                text, locale=locale, kb_variant=kb_variant
+            )
+            kb_meta = {
+                "variant_requested": kb_variant,
+                "variant_resolved": "main",
+                "meta": {},
+            }
+    with timer.stage("names"):
+        draft = _normalize_node_names(draft)
+    with timer.stage("normalize"):
+        normalized = normalize_engine_payload(draft)
+    with timer.stage("postprocess"):
+        processed = postprocess_engine_json(normalized, locale=locale)
     prepared = dict(processed)
     prepared.setdefault("processId", normalized.get("processId"))
     prepared.setdefault("name", normalized.get("name") or "Frajer Preview")
     prepared["locale"] = locale
-    xml_payload = generate_bpmn_from_json(prepared)
+    with timer.stage("bpmn"):
+        xml_payload = generate_bpmn_from_json(prepared)
+    timings = timer.finish()
     return {
         "draft": draft,
         "normalized": normalized,
@@ -206,17 +216,24 @@ def _build_preview_artifacts(
         "kb_meta": kb_meta,
         "locale": locale,
         "use_kb": use_kb,
+        "timings": timings,
+        "server_timing": timer.server_timing(),
     }
 
 
 def _build_artifacts_from_engine(*, engine_json: Dict[str, Any], locale: str) -> dict:
-    normalized = normalize_engine_payload(engine_json or {})
-    processed = postprocess_engine_json(normalized, locale=locale)
+    timer = StageTimer("frajer.preview_engine")
+    with timer.stage("normalize"):
+        normalized = normalize_engine_payload(engine_json or {})
+    with timer.stage("postprocess"):
+        processed = postprocess_engine_json(normalized, locale=locale)
     prepared = dict(processed)
     prepared.setdefault("processId", normalized.get("processId"))
     prepared.setdefault("name", normalized.get("name") or "Frajer AI Preview")
     prepared["locale"] = locale
-    xml_payload = generate_bpmn_from_json(prepared)
+    with timer.stage("bpmn"):
+        xml_payload = generate_bpmn_from_json(prepared)
+    timings = timer.finish()
     return {
         "draft": engine_json,
         "normalized": normalized,
@@ -226,7 +243,9 @@ def _build_artifacts_from_engine(*, engine_json: Dict[str, Any], locale: str) ->
         "meta": {
             "locale": locale,
             "source": "frajer-ai",
+            "timings": timings,
         },
+        "server_timing": timer.server_timing(),
     }
 
 
@@ -253,6 +272,7 @@ async def frajer_preview_bpmn(request: Request) -> Response:
             and kb_meta.get("variant_resolved") != kb_meta.get("variant_requested")
             else "0"
         ),
+        "Server-Timing": artifacts["server_timing"],
     }
 
     return Response(
@@ -263,12 +283,13 @@ async def frajer_preview_bpmn(request: Request) -> Response:
 
 
 @router.api_route("/preview-json", methods=["GET", "POST"])
-async def frajer_preview_json(request: Request) -> dict:
+async def frajer_preview_json(request: Request, response: Response) -> dict:
     text, use_kb, locale, kb_variant = await _resolve_preview_params(request)
     artifacts = _build_preview_artifacts(
         text=text, use_kb=use_kb, locale=locale, kb_variant=kb_variant
     )
     kb_meta = artifacts["kb_meta"]
+    response.headers["Server-Timing"] = artifacts["server_timing"]
 
     return {
         "draft": artifacts["draft"],
@@ -281,17 +302,21 @@ async def frajer_preview_json(request: Request) -> dict:
             "kb_variant_requested": kb_meta.get("variant_requested"),
             "kb_variant_resolved": kb_meta.get("variant_resolved"),
             "kb": kb_meta,
+            "timings": artifacts["timings"],
         },
     }
 
 
 @router.post("/preview-engine")
-def frajer_preview_engine(payload: PreviewEngineRequest) -> Dict[str, Any]:
+def frajer_preview_engine(
+    payload: PreviewEngineRequest, response: Response
+) -> Dict[str, Any]:
     engine = payload.engine_json or {}
     if not isinstance(engine, dict) or not engine:
         raise HTTPException(status_code=400, detail="engine_json must not be empty.")
     locale = (payload.locale or "sk").strip() or "sk"
     artifacts = _build_artifacts_from_engine(engine_json=engine, locale=locale)
+    response.headers["Server-Timing"] = artifacts.pop("server_timing")
     return artifacts
 
 
@@ -315,6 +340,12 @@ def frajer_debug_kb_templates(locale: str = "sk"):
     return {"count": len(tpl), "keys": list(tpl.keys())[:50]}  # prvĂ˝ch 50 kÄľĂşÄŤov
 
 
+@router.get("/debug-timings")
+def frajer_debug_timings():
+    """In-process latency histograms per preview pipeline stage (ms)."""
+    return {"stages": stage_histograms()}
+
+
 @router.get("/ping")
 def frajer_ping():
     return {"ok": True}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Body, Depends, File, HTTPException, Response, UploadFile
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Response, UploadFile
 from services.bpmn_svc import (
     append_tasks_to_lane_from_description,
     build_linear_engine_from_wizard,
@@ -6,17 +6,24 @@ from services.bpmn_svc import (
 )
 from services.architect.normalize import normalize_engine_payload
 from services.bpmn_import import bpmn_xml_to_engine
+from services.model_index import SORT_KEYS
 from services.model_storage import (
     delete_model,
     get_user_models_dir,
-    list_models as storage_list_models,
+    query_models as storage_query_models,
     load_model as storage_load_model,
     save_model as storage_save_model,
+    update_model_meta as storage_update_model_meta,
 )
 try:
-    from services.project_notes_storage import has_legacy_global_notes, load_project_notes, save_project_notes
+    from services.project_notes_storage import has_legacy_global_notes, load_project_notes_with_version, save_project_notes
 except ModuleNotFoundError:
-    from backend.services.project_notes_storage import has_legacy_global_notes, load_project_notes, save_project_notes
+    from backend.services.project_notes_storage import (
+        has_legacy_global_notes,
+        load_project_notes_with_version,
+        save_project_notes,
+    )
+from services.file_versions import VersionConflict, format_etag, parse_if_match
 from schemas.engine import validate_payload, validate_xml
 from services.engine_normalizer import find_gateway_warnings
 from schemas.wizard import (
@@ -173,14 +180,25 @@ def list_wizard_models(
     limit: int = 20,
     offset: int = 0,
     search: str | None = None,
+    sort: str = "updated_at",
+    order: str = "desc",
     current_user: AuthUser = Depends(require_user),
 ):
     """
-    Jednoduché listovanie uložených modelov (perzistentné úložisko).
+    Listovanie uložených modelov; stránkovanie, triedenie aj hľadanie robí úložisko.
     """
-    items = storage_list_models(search=search, user_id=current_user.id)
-    total = len(items)
-    sliced = items[offset : offset + limit]
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort musí byť jedno z: {', '.join(SORT_KEYS)}.")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order musí byť asc alebo desc.")
+    sliced, total = storage_query_models(
+        search=search,
+        user_id=current_user.id,
+        limit=max(0, limit),
+        offset=max(0, offset),
+        sort=sort,
+        descending=order == "desc",
+    )
     try:
         path = get_user_models_dir(current_user.id)
     except Exception:
@@ -192,7 +210,7 @@ def list_wizard_models(
 @router.delete("/wizard/models/{model_id}")
 def delete_wizard_model(model_id: str, current_user: AuthUser = Depends(require_user)):
     try:
-        storage_load_model(model_id, user_id=current_user.id)
+        storage_load_model(model_id, user_id=current_user.id, parts=())
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model nenájdený.")
     delete_model(model_id, user_id=current_user.id)
@@ -210,21 +228,11 @@ def rename_wizard_model(
         raise HTTPException(status_code=400, detail="name je povinné a musí byť string.")
 
     try:
-        existing = storage_load_model(model_id, user_id=current_user.id)
+        storage_update_model_meta(model_id, {"name": new_name.strip()}, user_id=current_user.id)
+        return storage_load_model(model_id, user_id=current_user.id)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model nenájdený.")
 
-    updated = storage_save_model(
-        name=new_name.strip(),
-        engine_json=existing.get("engine_json") or {},
-        diagram_xml=existing.get("diagram_xml") or "",
-        model_id=model_id,
-        generator_input=existing.get("generator_input"),
-        process_meta=existing.get("process_meta"),
-        user_id=current_user.id,
-    )
-    return updated
-
 
 def _resolve_notes_org_id(current_user: AuthUser, org_id: str | None) -> str:
     try:
@@ -237,11 +245,13 @@ def _resolve_notes_org_id(current_user: AuthUser, org_id: str | None) -> str:
 
 @router.get("/wizard/project-notes")
 def get_project_notes(
+    response: Response,
     org_id: str | None = None,
     current_user: AuthUser = Depends(require_user),
 ):
     resolved_org_id = _resolve_notes_org_id(current_user, org_id)
-    notes = load_project_notes(resolved_org_id)
+    notes, version = load_project_notes_with_version(resolved_org_id)
+    response.headers["ETag"] = format_etag(version)
     return {
         "notes": notes,
         "org_id": resolved_org_id,
@@ -251,15 +261,26 @@ def get_project_notes(
 
 @router.put("/wizard/project-notes")
 def put_project_notes(
+    response: Response,
     payload: dict = Body(...),
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
     notes = payload.get("notes") if isinstance(payload, dict) else None
     if not isinstance(notes, list):
         raise HTTPException(status_code=400, detail="notes je povinne a musi byt list.")
+    try:
+        expected_version = parse_if_match(if_match)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     org_id = payload.get("org_id") if isinstance(payload, dict) else None
     resolved_org_id = _resolve_notes_org_id(current_user, org_id)
-    saved = save_project_notes(resolved_org_id, notes)
+    try:
+        saved, version = save_project_notes(resolved_org_id, notes, expected_version=expected_version)
+    except VersionConflict as exc:
+        raise HTTPException(status_code=412, detail=str(exc), headers={"ETag": format_etag(exc.current)})
+    if version is not None:
+        response.headers["ETag"] = format_etag(version)
     return {"notes": saved, "org_id": resolved_org_id}
 
 
@@ -1,16 +1,22 @@
 ﻿from __future__ import annotations
 
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException, Query
 
+from mentor.ab_eval import CorpusNotFoundError, EvaluationBusyError, evaluate_ab
+from mentor.applier import kb_commit_status
 from mentor.models import (
     ABEvaluationResponse,
     MentorEngineApplyRequest,
     MentorEngineApplyResponse,
+    MentorIncrementalReviewRequest,
     MentorReviewRequest,
     MentorReviewResponse,
     ValidationRequest,
 )
-from mentor.rule_service import MentorRuleService
+from mentor.rule_engine import rule_histograms
+from mentor.rule_service import MentorRuleError, MentorRuleService
 from mentor.validator import validate_kb_version
 
 router = APIRouter(tags=["Mentor"])
@@ -22,7 +28,25 @@ _service = MentorRuleService()
 def review(payload: MentorReviewRequest) -> MentorReviewResponse:
     if payload.engine_json is None:
         raise HTTPException(status_code=400, detail="engine_json is required")
-    findings, meta = _service.review(payload)
+    try:
+        findings, meta = _service.review(payload)
+    except MentorRuleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return MentorReviewResponse(findings=findings, meta=meta)
+
+
+@router.get("/mentor/rule-stats")
+def rule_stats() -> dict:
+    """In-process latency histograms per mentor rule (ms)."""
+    return {"rules": rule_histograms()}
+
+
+@router.post("/mentor/review/incremental", response_model=MentorReviewResponse)
+def review_incremental(payload: MentorIncrementalReviewRequest) -> MentorReviewResponse:
+    try:
+        findings, meta = _service.review_incremental(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid patch: {exc}")
     return MentorReviewResponse(findings=findings, meta=meta)
 
 
@@ -44,17 +68,35 @@ def apply(payload: MentorEngineApplyRequest) -> MentorEngineApplyResponse:  # ty
     return MentorEngineApplyResponse(engine_json=engine_json, audit_log=audit_log)
 
 
+@router.get("/mentor/kb-commit/{pending_commit_id}")
+def kb_commit(pending_commit_id: str) -> dict:
+    """Resolve ``audit.pending_commit_id`` from a KB apply to its git commit."""
+    status = kb_commit_status(pending_commit_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown pending commit id")
+    return {"pending_commit_id": pending_commit_id, **status}
+
+
 @router.post("/validate")
 def validate(payload: ValidationRequest) -> dict:
-    response = validate_kb_version(payload.kb_version)
+    response = validate_kb_version(payload.kb_version, full_lint=payload.full_lint)
     return response.model_dump(by_alias=True)
 
 
 @router.get("/ab-eval", response_model=ABEvaluationResponse)
 def ab_eval(
-    base: int = Query(..., description="Base KB version identifier"),
-    candidate: int = Query(..., description="Candidate KB version identifier"),
+    base: str = Query(..., description="Base KB variant identifier"),
+    candidate: str = Query(..., description="Candidate KB variant identifier"),
     window: int = Query(20, ge=1, description="Evaluation window size"),
+    locale: str = Query("sk", description="Corpus and KB locale"),
+    workers: Optional[int] = Query(None, ge=1, description="Worker processes"),
 ) -> ABEvaluationResponse:
-    _ = window
-    return ABEvaluationResponse(base=base, candidate=candidate)
+    try:
+        delta = evaluate_ab(base, candidate, window=window, locale=locale, workers=workers)
+    except CorpusNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except EvaluationBusyError as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return ABEvaluationResponse(base=base, candidate=candidate, delta=delta)
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Response
 
 from auth.deps import require_user
 from auth.service import AuthUser, get_user_org_role, resolve_accessible_org_id
+from services.file_versions import VersionConflict, format_etag, parse_if_match
 from services.org_activity_log import record_org_event
 from services.org_model_storage import (
+    ProcessRefConflict,
     create_folder,
     create_process,
     create_process_from_org_model,
     delete_node,
     get_node,
-    get_tree,
+    get_tree_with_version,
     move_node,
     rename_node,
     set_process_model_ref,
@@ -40,10 +42,28 @@ def _require_org_model_edit_access(user: AuthUser, org_id: str) -> str:
     return role
 
 
+def _if_match_version(if_match: str | None) -> int | None:
+    try:
+        return parse_if_match(if_match)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _precondition_failed(exc: VersionConflict) -> HTTPException:
+    return HTTPException(status_code=412, detail=str(exc), headers={"ETag": format_etag(exc.current)})
+
+
+def _tree_with_etag(response: Response, org_id: str) -> dict:
+    """Current tree; its version goes to the ``ETag`` header for ``If-Match`` on the next edit."""
+    tree, version = get_tree_with_version(org_id)
+    response.headers["ETag"] = format_etag(version)
+    return tree
+
+
 @router.get("")
-def get_org_model(org_id: str | None = None, current_user: AuthUser = Depends(require_user)):
+def get_org_model(response: Response, org_id: str | None = None, current_user: AuthUser = Depends(require_user)):
     org_id = _resolve_org_id(current_user, org_id)
-    return get_tree(org_id)
+    return _tree_with_etag(response, org_id)
 
 
 @router.get("/presence")
@@ -72,8 +92,10 @@ def heartbeat_org_model_presence(
 
 @router.post("/folder")
 def create_org_folder(
+    response: Response,
     payload: dict = Body(...),
     org_id: str | None = None,
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
     parent_id = payload.get("parentId")
@@ -82,19 +104,29 @@ def create_org_folder(
         raise HTTPException(status_code=400, detail="parentId je povinny.")
     if not isinstance(name, str) or not name.strip():
         raise HTTPException(status_code=400, detail="name je povinny.")
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         _require_org_model_edit_access(current_user, org_id)
-        node = create_folder(org_id=org_id, parent_id=parent_id.strip(), name=name.strip())
-        return {"node": node, "tree": get_tree(org_id)}
+        node = create_folder(
+            org_id=org_id,
+            parent_id=parent_id.strip(),
+            name=name.strip(),
+            expected_version=expected_version,
+        )
+        return {"node": node, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.post("/process")
 def create_org_process(
+    response: Response,
     payload: dict = Body(...),
     org_id: str | None = None,
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
     parent_id = payload.get("parentId")
@@ -103,10 +135,16 @@ def create_org_process(
         raise HTTPException(status_code=400, detail="parentId je povinny.")
     if not isinstance(name, str) or not name.strip():
         raise HTTPException(status_code=400, detail="name je povinny.")
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         _require_org_model_edit_access(current_user, org_id)
-        node = create_process(org_id=org_id, parent_id=parent_id.strip(), name=name.strip())
+        node = create_process(
+            org_id=org_id,
+            parent_id=parent_id.strip(),
+            name=name.strip(),
+            expected_version=expected_version,
+        )
         record_org_event(
             org_id,
             actor_user_id=current_user.id,
@@ -117,15 +155,19 @@ def create_org_process(
             entity_name=str(node.get("name") or ""),
             metadata={"parent_id": parent_id.strip()},
         )
-        return {"node": node, "tree": get_tree(org_id)}
+        return {"node": node, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.post("/process-from-org-model")
 def create_org_process_from_org_model(
+    response: Response,
     payload: dict = Body(...),
     org_id: str | None = None,
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
     parent_id = payload.get("parentId")
@@ -137,6 +179,7 @@ def create_org_process_from_org_model(
         raise HTTPException(status_code=400, detail="modelId je povinny.")
     if not isinstance(name, str) or not name.strip():
         raise HTTPException(status_code=400, detail="name je povinny.")
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         _require_org_model_edit_access(current_user, org_id)
@@ -145,6 +188,7 @@ def create_org_process_from_org_model(
             parent_id=parent_id.strip(),
             name=name.strip(),
             org_model_id=model_id.strip(),
+            expected_version=expected_version,
         )
         record_org_event(
             org_id,
@@ -156,7 +200,9 @@ def create_org_process_from_org_model(
             entity_name=str(node.get("name") or ""),
             metadata={"source_model_id": model_id.strip(), "parent_id": parent_id.strip()},
         )
-        return {"node": node, "tree": get_tree(org_id)}
+        return {"node": node, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
@@ -164,17 +210,20 @@ def create_org_process_from_org_model(
 @router.patch("/node/{node_id}")
 def rename_org_node(
     node_id: str,
+    response: Response,
     payload: dict = Body(...),
     org_id: str | None = None,
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
     name = payload.get("name")
     if not isinstance(name, str) or not name.strip():
         raise HTTPException(status_code=400, detail="name je povinny.")
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         _require_org_model_edit_access(current_user, org_id)
-        node = rename_node(org_id=org_id, node_id=node_id, name=name.strip())
+        node = rename_node(org_id=org_id, node_id=node_id, name=name.strip(), expected_version=expected_version)
         record_org_event(
             org_id,
             actor_user_id=current_user.id,
@@ -185,19 +234,28 @@ def rename_org_node(
             entity_name=str(node.get("name") or ""),
             metadata={},
         )
-        return {"node": node, "tree": get_tree(org_id)}
+        return {"node": node, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.post("/move")
-def move_org_node(payload: dict = Body(...), org_id: str | None = None, current_user: AuthUser = Depends(require_user)):
+def move_org_node(
+    response: Response,
+    payload: dict = Body(...),
+    org_id: str | None = None,
+    if_match: str | None = Header(default=None),
+    current_user: AuthUser = Depends(require_user),
+):
     node_id = payload.get("nodeId")
     target_parent_id = payload.get("targetParentId")
     if not isinstance(node_id, str) or not node_id.strip():
         raise HTTPException(status_code=400, detail="nodeId je povinny.")
     if not isinstance(target_parent_id, str) or not target_parent_id.strip():
         raise HTTPException(status_code=400, detail="targetParentId je povinny.")
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         _require_org_model_edit_access(current_user, org_id)
@@ -205,6 +263,7 @@ def move_org_node(payload: dict = Body(...), org_id: str | None = None, current_
             org_id=org_id,
             node_id=node_id.strip(),
             new_parent_id=target_parent_id.strip(),
+            expected_version=expected_version,
         )
         record_org_event(
             org_id,
@@ -216,13 +275,22 @@ def move_org_node(payload: dict = Body(...), org_id: str | None = None, current_
             entity_name=str(node.get("name") or ""),
             metadata={"target_parent_id": target_parent_id.strip()},
         )
-        return {"node": node, "tree": get_tree(org_id)}
+        return {"node": node, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.delete("/node/{node_id}")
-def delete_org_node(node_id: str, org_id: str | None = None, current_user: AuthUser = Depends(require_user)):
+def delete_org_node(
+    node_id: str,
+    response: Response,
+    org_id: str | None = None,
+    if_match: str | None = Header(default=None),
+    current_user: AuthUser = Depends(require_user),
+):
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         role = get_user_org_role(current_user.id, org_id)
@@ -231,7 +299,7 @@ def delete_org_node(node_id: str, org_id: str | None = None, current_user: AuthU
         node = get_node(org_id, node_id)
         if not node:
             raise ValueError("Polozka neexistuje.")
-        delete_node(org_id=org_id, node_id=node_id)
+        delete_node(org_id=org_id, node_id=node_id, expected_version=expected_version)
         record_org_event(
             org_id,
             actor_user_id=current_user.id,
@@ -242,7 +310,9 @@ def delete_org_node(node_id: str, org_id: str | None = None, current_user: AuthU
             entity_name=str(node.get("name") or ""),
             metadata={},
         )
-        return {"ok": True, "tree": get_tree(org_id)}
+        return {"ok": True, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
@@ -250,17 +320,31 @@ def delete_org_node(node_id: str, org_id: str | None = None, current_user: AuthU
 @router.patch("/process/{node_id}/model-ref")
 def update_process_model_ref(
     node_id: str,
+    response: Response,
     payload: dict = Body(...),
     org_id: str | None = None,
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
     model_id = payload.get("modelId")
+    base_model_id = payload.get("baseModelId")
     if not isinstance(model_id, str) or not model_id.strip():
         raise HTTPException(status_code=400, detail="modelId je povinny.")
+    expected_version = _if_match_version(if_match)
     try:
         org_id = _resolve_org_id(current_user, org_id)
         _require_org_model_edit_access(current_user, org_id)
-        node = set_process_model_ref(org_id=org_id, node_id=node_id, model_id=model_id.strip())
-        return {"node": node, "tree": get_tree(org_id)}
+        node = set_process_model_ref(
+            org_id=org_id,
+            node_id=node_id,
+            model_id=model_id.strip(),
+            expected_version=expected_version,
+            expected_model_id=base_model_id.strip() if isinstance(base_model_id, str) and base_model_id.strip() else None,
+        )
+        return {"node": node, "tree": _tree_with_etag(response, org_id)}
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    except ProcessRefConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Body, Depends, HTTPException
-from pydantic import BaseModel
+import time
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from auth.deps import require_user
 from auth.service import (
@@ -25,11 +28,20 @@ from auth.service import (
     resolve_accessible_org_id,
 )
 from auth.security import to_iso_z, utcnow
-from services.org_activity_log import get_org_event, get_org_request_resolution, list_org_events, record_org_event
+from mentor.batch_review import iter_ndjson, review_models
+from services.file_versions import VersionConflict, format_etag, parse_if_match
+from services.org_activity_log import get_org_event, get_org_request_resolution, page_org_events, record_org_event
 from services.org_model_storage import delete_node, get_node
-from services.model_storage import load_model, save_model
-from services.org_model_storage import get_process_model_ref
-from services.org_models_storage import list_org_models, load_org_model, save_org_model, save_org_model_copy
+from services.model_storage import load_model, update_model_meta
+from services.org_model_storage import get_process_model_ref, list_process_model_ids, search_processes
+from services.org_models_storage import (
+    list_org_model_history,
+    list_org_models,
+    load_org_model,
+    org_model_version,
+    save_org_model,
+    save_org_model_copy,
+)
 
 
 router = APIRouter(prefix="/api/orgs", tags=["Organizations"])
@@ -82,6 +94,12 @@ class DeleteRequestPayload(BaseModel):
     reason: str | None = None
 
 
+class OrgMentorReviewRequest(BaseModel):
+    org_id: str | None = None
+    folder_id: str | None = None
+    workers: int | None = Field(default=None, ge=1)
+
+
 class UpdateOrgMemberRoleRequest(BaseModel):
     email: str
     org_id: str | None = None
@@ -338,15 +356,7 @@ def push_model(payload: PushOrgModelRequest, current_user: AuthUser = Depends(re
     )
     process_meta["org_pushes"] = pushes
     try:
-        save_model(
-            name=model.get("name") or (name_override or payload.model_id),
-            engine_json=model.get("engine_json") or {},
-            diagram_xml=model.get("diagram_xml") or "",
-            model_id=payload.model_id,
-            generator_input=model.get("generator_input"),
-            process_meta=process_meta,
-            user_id=current_user.id,
-        )
+        update_model_meta(payload.model_id, {"process_meta": process_meta}, user_id=current_user.id)
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Nepodarilo sa aktualizovat metadata modelu.") from exc
     record_org_event(
@@ -366,10 +376,15 @@ def push_model(payload: PushOrgModelRequest, current_user: AuthUser = Depends(re
 def get_org_activity(
     org_id: str | None = None,
     limit: int = 50,
+    cursor: str | None = None,
     current_user: AuthUser = Depends(require_user),
 ):
     resolved_org_id = _resolve_org_id(current_user, org_id)
-    return {"items": list_org_events(resolved_org_id, limit=limit), "org_id": resolved_org_id}
+    try:
+        items, next_cursor = page_org_events(resolved_org_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": items, "org_id": resolved_org_id, "next_cursor": next_cursor}
 
 
 @router.post("/activity/delete-request")
@@ -517,23 +532,91 @@ def create_org_model_version(
     return {"ok": True, "org_model_id": org_model_id, "org_id": org_id}
 
 
+@router.post("/models/mentor-review")
+def review_org_models(payload: OrgMentorReviewRequest, current_user: AuthUser = Depends(require_user)):
+    """Stream mentor findings for the current model of every process in the org or a tree folder as NDJSON.
+
+    Starsie verzie (``base_model_id``) sa nereviduju, len modely, na ktore
+    ukazuju procesy v strome.
+    """
+    org_id = _resolve_org_id(current_user, payload.org_id)
+    try:
+        model_ids = list_process_model_ids(org_id, payload.folder_id or "root")
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    records = review_models(
+        model_ids,
+        lambda model_id: load_org_model(org_id, model_id, parts=("engine_json",)),
+        workers=payload.workers,
+    )
+    return StreamingResponse(iter_ndjson(records), media_type="application/x-ndjson")
+
+
+@router.get("/search")
+def search_org_processes(
+    q: str,
+    limit: int = 20,
+    org_id: str | None = None,
+    current_user: AuthUser = Depends(require_user),
+):
+    """Full-text search over process, lane, task names and flow conditions."""
+    org_id = _resolve_org_id(current_user, org_id)
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q je povinny.")
+    started = time.perf_counter()
+    items = search_processes(org_id, q, limit=max(1, min(limit, 100)))
+    return {"query": q, "items": items, "ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
 @router.get("/models/{org_model_id}")
-def get_org_model(org_model_id: str, org_id: str | None = None, current_user: AuthUser = Depends(require_user)):
+def get_org_model(
+    org_model_id: str,
+    response: Response,
+    org_id: str | None = None,
+    current_user: AuthUser = Depends(require_user),
+):
     org_id = _resolve_org_id(current_user, org_id)
     try:
-        return load_org_model(org_id, org_model_id)
+        # verzia pred obsahom, aby ETag nikdy nepredbehol vrateny model
+        version = org_model_version(org_id, org_model_id)
+        model = load_org_model(org_id, org_model_id)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model nenajdeny.")
+    response.headers["ETag"] = format_etag(version)
+    return model
+
+
+@router.get("/models/{org_model_id}/history")
+def get_org_model_history(
+    org_model_id: str,
+    limit: int = 50,
+    org_id: str | None = None,
+    current_user: AuthUser = Depends(require_user),
+):
+    """Version chain of a model via ``base_model_id``; each version is fetched with ``GET /models/{id}``."""
+    org_id = _resolve_org_id(current_user, org_id)
+    try:
+        items = list_org_model_history(org_id, org_model_id, limit=max(1, min(limit, 500)))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model nenajdeny.")
+    return {"org_model_id": org_model_id, "items": items}
 
 
 @router.put("/models/{org_model_id}")
 def update_org_model(
     org_model_id: str,
+    response: Response,
     payload: dict = Body(...),
     org_id: str | None = None,
+    if_match: str | None = Header(default=None),
     current_user: AuthUser = Depends(require_user),
 ):
+    """Overwrite a model in place; with ``If-Match`` only if nobody saved it since that ETag."""
     org_id = _resolve_org_id(current_user, org_id)
+    try:
+        expected_version = parse_if_match(if_match)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     name = payload.get("name")
     engine_json = payload.get("engine_json")
     diagram_xml = payload.get("diagram_xml")
@@ -555,5 +638,9 @@ def update_org_model(
         model["generator_input"] = generator_input
     if isinstance(process_meta, dict):
         model["process_meta"] = process_meta
-    saved = save_org_model(org_id, org_model_id, model)
+    try:
+        saved, version = save_org_model(org_id, org_model_id, model, expected_version=expected_version)
+    except VersionConflict as exc:
+        raise HTTPException(status_code=412, detail=str(exc), headers={"ETag": format_etag(exc.current)})
+    response.headers["ETag"] = format_etag(version)
     return {"ok": True, "modelId": saved.get("id"), "orgId": org_id}
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Query
 
 from mentor.models import TelemetrySubmission, TelemetrySubmitResponse
-from mentor.telemetry import submit_telemetry
+from mentor.telemetry import query_telemetry, submit_telemetry
 
 router = APIRouter(prefix="/telemetry", tags=["Telemetry"])
 
@@ -11,3 +13,12 @@ router = APIRouter(prefix="/telemetry", tags=["Telemetry"])
 @router.post("/submit", response_model=TelemetrySubmitResponse)
 def submit(payload: TelemetrySubmission) -> TelemetrySubmitResponse:
     return submit_telemetry(payload)
+
+
+@router.get("/query")
+def query(
+    event_type: Optional[str] = Query(None, description="Filter by event name"),
+    window_s: Optional[float] = Query(None, gt=0, description="Only events from the last N seconds"),
+) -> dict:
+    """Counts and latency percentiles per telemetry event type."""
+    return query_telemetry(event_type=event_type, window_s=window_s)
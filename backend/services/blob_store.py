@@ -0,0 +1,332 @@
+# services/blob_store.py
+"""Content-addressed blob store for model parts (``<root>/blobs/<aa>/<sha256>``).
+
+Kluc je SHA-256 nekomprimovaneho UTF-8 textu, takze rovnaky diagram alebo
+engine ulozeny v roznych verziach, u roznych pouzivatelov ci po ``push_model``
+zabera miesto raz. Blob sa nikdy neprepisuje inym obsahom; uvolnuje ho iba
+``collect_garbage``, ktory spocita referencie zo vsetkych metadat modelov.
+
+Kodek blobu (``none``/``gzip``/``zstd``) sa rozpoznava podla magic bytes.
+Blob moze byt aj delta (``DELTA_MAGIC``): JSON patch voci inemu blobu
+(``base``). Kazdych ``ORG_HISTORY_SNAPSHOT_EVERY`` verzii sa ulozi plny
+obsah, takze rekonstrukcia aplikuje najviac N-1 patchov; rekonstruovane
+texty sa cachuju podla hashu (obsah pod hashom sa nikdy nemeni).
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from mentor.json_patch import apply_json_patch
+from services.json_diff import DiffTooLarge, diff_json
+from services.storage_io import atomic_write_bytes
+
+try:
+    import zstandard
+except ModuleNotFoundError:  # pragma: no cover - depends on runtime env
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BLOBS_DIR = "blobs"
+CODECS = ("none", "gzip", "zstd")
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+DELTA_MAGIC = b"BPMD"
+DEFAULT_SNAPSHOT_EVERY = 10
+# delta sa oplati, len ak je vyrazne mensia nez plny obsah
+DELTA_MAX_RATIO = 0.5
+BLOB_CACHE_SIZE = 128
+# Cerstve bloby GC nemaze: zapis blobu predchadza zapisu metadat, ktore nan ukazuju.
+DEFAULT_GC_GRACE_S = 3600.0
+GC_SUFFIX = ".gc"
+
+
+def storage_codec() -> str:
+    """Codec for newly written blobs; ``zstd`` without the package falls back to ``gzip``."""
+    codec = os.getenv("MODEL_STORAGE_COMPRESSION", "none").strip().lower() or "none"
+    if codec not in CODECS:
+        logger.warning("Unknown MODEL_STORAGE_COMPRESSION=%s, storing uncompressed", codec)
+        return "none"
+    if codec == "zstd" and zstandard is None:
+        return "gzip"
+    return codec
+
+
+def snapshot_every() -> int:
+    try:
+        return max(1, int(os.getenv("ORG_HISTORY_SNAPSHOT_EVERY", DEFAULT_SNAPSHOT_EVERY)))
+    except ValueError:
+        return DEFAULT_SNAPSHOT_EVERY
+
+
+def blob_codec(header: bytes) -> str:
+    if header.startswith(GZIP_MAGIC):
+        return "gzip"
+    if header.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+
+def encode_blob(text: str, codec: str) -> bytes:
+    raw = text.encode("utf-8")
+    if codec == "gzip":
+        # mtime=0: rovnaky obsah => rovnake bajty
+        return gzip.compress(raw, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard package is not installed")
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def decode_blob(data: bytes) -> str:
+    codec = blob_codec(data[:4])
+    if codec == "gzip":
+        data = gzip.decompress(data)
+    elif codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed model part but zstandard is not installed")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data.decode("utf-8")
+
+
+def digest_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def blob_path(root: Path, digest: str) -> Path:
+    return root / BLOBS_DIR / digest[:2] / digest
+
+
+def _encode_delta(envelope: Dict[str, Any], codec: str) -> bytes:
+    return DELTA_MAGIC + encode_blob(json.dumps(envelope, ensure_ascii=False), codec)
+
+
+def _delta_envelope(data: bytes) -> Optional[Dict[str, Any]]:
+    if not data.startswith(DELTA_MAGIC):
+        return None
+    return json.loads(decode_blob(data[len(DELTA_MAGIC):]))
+
+
+def _as_document(text: str, kind: str) -> Any:
+    return json.loads(text) if kind == "json" else text.split("\n")
+
+
+def _as_text(document: Any, kind: str) -> str:
+    return json.dumps(document, ensure_ascii=False) if kind == "json" else "\n".join(document)
+
+
+def put_blob(root: Path, text: str, codec: str, *, recode: bool = False) -> str:
+    """Store ``text`` once; returns its digest.
+
+    Existujuci blob sa len "dotkne" (mtime), aby ho subezny GC nepovazoval za
+    opusteny. ``recode`` prepise existujuci blob do ``codec`` (migracia).
+    """
+    digest = digest_text(text)
+    path = blob_path(root, digest)
+    try:
+        if recode and peek_codec(root, digest) != codec:
+            data = path.read_bytes()
+            envelope = _delta_envelope(data)
+            atomic_write_bytes(
+                path, _encode_delta(envelope, codec) if envelope is not None else encode_blob(text, codec)
+            )
+        else:
+            os.utime(path)
+        return digest
+    except FileNotFoundError:
+        pass
+    atomic_write_bytes(path, encode_blob(text, codec))
+    return digest
+
+
+def put_delta_blob(
+    root: Path, text: str, base: str, kind: str, codec: str, *, every: Optional[int] = None
+) -> str:
+    """Store ``text`` as a JSON-patch delta against blob ``base`` when that pays off.
+
+    ``kind`` je ``json`` (patch nad dokumentom) alebo ``text`` (patch nad
+    polom riadkov). Ak by retazec presiahol ``every`` verzii, diff by bol prilis
+    drahy (``DiffTooLarge``), delta je vacsia ako ``DELTA_MAX_RATIO`` plneho
+    obsahu alebo sa text z delty neda presne zrekonstruovat, ulozi sa plny
+    obsah (snapshot).
+    """
+    digest = digest_text(text)
+    if blob_path(root, digest).exists() or base == digest:
+        return put_blob(root, text, codec)
+    try:
+        depth = _delta_depth(root, base) + 1
+        if depth < (every or snapshot_every()):
+            base_document = _as_document(get_blob(root, base), kind)
+            patch = diff_json(base_document, _as_document(text, kind))
+            if _as_text(apply_json_patch(base_document, patch), kind) == text:
+                payload = _encode_delta({"base": base, "kind": kind, "depth": depth, "patch": patch}, codec)
+                if len(payload) <= DELTA_MAX_RATIO * len(encode_blob(text, codec)):
+                    os.utime(blob_path(root, base))  # base musi prezit GC spolu s deltou
+                    atomic_write_bytes(blob_path(root, digest), payload)
+                    return digest
+    except DiffTooLarge as exc:
+        logger.debug("Storing full blob instead of delta: base=%s reason=%s", base, exc)
+    except (OSError, ValueError) as exc:
+        logger.warning("Storing full blob instead of delta: base=%s error=%s", base, exc)
+    return put_blob(root, text, codec)
+
+
+def _delta_depth(root: Path, digest: str) -> int:
+    envelope = _delta_envelope(blob_path(root, digest).read_bytes())
+    return int(envelope.get("depth") or 0) if envelope is not None else 0
+
+
+def delta_base(root: Path, digest: str) -> Optional[str]:
+    """Digest the blob is a delta against, or ``None`` for a full blob."""
+    path = blob_path(root, digest)
+    with path.open("rb") as handle:
+        if handle.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+            return None
+    envelope = _delta_envelope(path.read_bytes())
+    return str(envelope["base"]) if envelope is not None else None
+
+
+def get_blob(root: Path, digest: str) -> str:
+    return _cached_text(str(root), digest)
+
+
+@lru_cache(maxsize=BLOB_CACHE_SIZE)
+def _cached_text(root: str, digest: str) -> str:
+    data = blob_path(Path(root), digest).read_bytes()
+    envelope = _delta_envelope(data)
+    if envelope is None:
+        return decode_blob(data)
+    kind = str(envelope.get("kind") or "json")
+    base = _as_document(_cached_text(root, str(envelope["base"])), kind)
+    return _as_text(apply_json_patch(base, envelope["patch"]), kind)
+
+
+def peek_codec(root: Path, digest: str) -> str:
+    with blob_path(root, digest).open("rb") as handle:
+        header = handle.read(len(DELTA_MAGIC) + 4)
+    if header.startswith(DELTA_MAGIC):
+        header = header[len(DELTA_MAGIC):]
+    return blob_codec(header)
+
+
+def iter_blobs(root: Path) -> Iterator[Path]:
+    base = root / BLOBS_DIR
+    if not base.exists():
+        return
+    for bucket in base.iterdir():
+        if bucket.is_dir():
+            for path in bucket.iterdir():
+                if path.is_file() and not path.name.endswith((".tmp", GC_SUFFIX)):
+                    yield path
+
+
+def count_references(meta_files: Iterable[Path], refs_of) -> Counter:
+    """Reference count per digest over the given model metadata files."""
+    counts: Counter = Counter()
+    for path in meta_files:
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                data: Any = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        counts.update(refs_of(data))
+    return counts
+
+
+def _unlink_unchanged(path: Path, mtime_ns: int) -> Optional[int]:
+    """Delete ``path`` unless a writer touched it since GC saw ``mtime_ns``; returns its size.
+
+    Blob sa najprv atomicky premenuje: ``put_blob`` alebo ``put_delta_blob``,
+    ktory ho chce zdielat, potom dostane ``FileNotFoundError`` pri ``utime`` a
+    zapise novy blob. Ak ho writer "dotkol" este pred premenovanim, mtime sa
+    lisi a blob sa vrati na miesto (ak ho writer medzitym nezapisal znova).
+    """
+    doomed = path.with_name(f"{path.name}{GC_SUFFIX}")
+    try:
+        os.replace(path, doomed)
+    except FileNotFoundError:
+        return None
+    stat = doomed.stat()
+    if stat.st_mtime_ns != mtime_ns:
+        try:
+            os.link(doomed, path)
+        except FileExistsError:
+            pass
+        doomed.unlink()
+        return None
+    doomed.unlink()
+    return stat.st_size
+
+
+def collect_garbage(
+    root: Path, counts: Counter, *, grace_s: float = DEFAULT_GC_GRACE_S, now: Optional[float] = None
+) -> Dict[str, int]:
+    """Delete blobs that are neither referenced, fresh, nor the base of a live delta.
+
+    Delty sa mazu pred svojimi bazami; ak writer blob medzicasom znova pouzil,
+    zostane aj s celym retazcom baz.
+    """
+    now = time.time() if now is None else now
+    stats = {"blobs": 0, "referenced": 0, "deleted": 0, "bytes_freed": 0}
+    blobs = {path.name: path for path in iter_blobs(root)}
+    stats["blobs"] = len(blobs)
+    live: Set[str] = {digest for digest in blobs if counts.get(digest)}
+    stats["referenced"] = len(live)
+    seen_mtime: Dict[str, int] = {}
+    for digest, path in blobs.items():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            live.add(digest)
+            continue
+        seen_mtime[digest] = stat.st_mtime_ns
+        if now - stat.st_mtime < grace_s:
+            live.add(digest)
+    stack = list(live)
+    while stack:
+        try:
+            base = delta_base(root, stack.pop())
+        except (OSError, ValueError):
+            continue
+        if base is not None and base not in live:
+            live.add(base)
+            stack.append(base)
+
+    dead = [digest for digest in blobs if digest not in live]
+    bases: Dict[str, Optional[str]] = {}
+    children: Counter = Counter()
+    for digest in dead:
+        try:
+            bases[digest] = delta_base(root, digest)
+        except (OSError, ValueError):
+            bases[digest] = None
+        if bases[digest] in blobs and bases[digest] not in live:
+            children[bases[digest]] += 1
+    ready = [digest for digest in dead if not children[digest]]
+    while ready:
+        digest = ready.pop()
+        size = _unlink_unchanged(blobs[digest], seen_mtime[digest])
+        base = bases[digest]
+        if size is None:
+            # znova pouzity blob: jeho bazy musia zostat
+            while base is not None and base not in live:
+                live.add(base)
+                base = bases.get(base)
+            continue
+        stats["deleted"] += 1
+        stats["bytes_freed"] += size
+        if base is not None and base not in live and base in children:
+            children[base] -= 1
+            if not children[base]:
+                ready.append(base)
+    return stats
@@ -11,6 +11,7 @@ from uuid import uuid4
 from services.architect.normalize import postprocess_engine_json, normalize_engine_payload
 from services.architect import _mk_question
 from services.controller_svc import validate_engine
+from services.label_rule_matcher import get_label_matcher
 from schemas.wizard import (
     LaneAppendRequest,
     LinearWizardRequest,
@@ -60,6 +61,13 @@ def _default_gateway_branch_labels(locale: str | None) -> tuple[str, str]:
     return "Yes", "No"
 
 
+def _gateway_branch_labels(texts: List[str], locale: str | None) -> List[tuple[str, str]]:
+    """Branch labels per gateway text: first matching KB label rule, else defaults."""
+    defaults = _default_gateway_branch_labels(locale)
+    matcher = get_label_matcher(_normalize_locale(locale))
+    return [labels or defaults for labels in matcher.match_many(texts)]
+
+
 def T(ns: str, local: str) -> str:
     return f"{{{NS[ns]}}}{local}"
 
@@ -216,7 +224,7 @@ def _expand_conditional_step(
             flow["laneId"] = lane_id
         flows.append(flow)
 
-    positive_label, negative_label = _default_gateway_branch_labels(locale)
+    positive_label, negative_label = _gateway_branch_labels([step], locale)[0]
     flow_yes = {"id": make_flow_id(gw_id, yes_ids[0]), "source": gw_id, "target": yes_ids[0], "name": positive_label}
     flow_no = {
         "id": make_flow_id(gw_id, else_target_ids[0]),
@@ -2103,7 +2111,15 @@ def json_to_bpmn(data: Dict[str, Any]) -> str:
     node_order = {n.get("id"): idx for idx, n in enumerate(nodes) if n.get("id")}
 
     locale = _normalize_locale(data.get("locale"))
-    positive_label, negative_label = _default_gateway_branch_labels(locale)
+    # Labely vetiev pre vsetky XOR brany naraz (jeden prechod KB pravidiel).
+    xor_nodes = [n for n in nodes if n.get("id") and node_type_map.get(n["id"]) == "exclusiveGateway"]
+    default_labels = _default_gateway_branch_labels(locale)
+    gateway_labels = dict(
+        zip(
+            (n["id"] for n in xor_nodes),
+            _gateway_branch_labels([n.get("name") or n.get("label") or "" for n in xor_nodes], locale),
+        )
+    )
 
     # Ensure exclusive gateway branches have labels (Yes/No or Áno/Nie) when missing.
     outgoing_by_src = defaultdict(list)
@@ -2119,6 +2135,7 @@ def json_to_bpmn(data: Dict[str, Any]) -> str:
         ordered = sorted(
             flist, key=lambda f: node_order.get(f.get("target"), 10**9)
         )
+        positive_label, negative_label = gateway_labels.get(src_id, default_labels)
         if len(ordered) >= 1 and not (ordered[0].get("name") or ordered[0].get("label")):
             ordered[0]["name"] = positive_label
         if len(ordered) >= 2 and not (ordered[1].get("name") or ordered[1].get("label")):
@@ -2179,6 +2196,7 @@ def json_to_bpmn(data: Dict[str, Any]) -> str:
         ordered = sorted(
             flist, key=lambda f: node_order.get(f.get("target"), 10**9)
         )
+        positive_label, negative_label = gateway_labels.get(src_id, default_labels)
         if ordered:
             ordered[0]["name"] = positive_label
         if len(ordered) > 1:
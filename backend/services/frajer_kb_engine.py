@@ -6,6 +6,7 @@ import uuid
 from typing import Dict, Any, List, Optional, Tuple
 
 from .kb_loader import get_kb
+from .kb_snapshot import compile_kb_sources
 
 
 def _uuid(prefix: str) -> str:
@@ -35,6 +36,24 @@ class FrajerKB:
         if not self.system_lanes and "System" not in self.role_aliases:
             self.system_lanes = {"System"}
 
+        compiled = self.kb.get("_compiled") or compile_kb_sources(self.kb)
+        self._role_regexes = [
+            (lane, re.compile(pattern, re.IGNORECASE))
+            for lane, pattern in compiled["role_patterns"]
+        ]
+        self._role_alias_sets: Dict[str, List[str]] = compiled["role_alias_sets"]
+        self._constructs = [
+            (rule, [re.compile(h) for h in hints])
+            for rule, (_rule_id, hints) in zip(
+                self.kb.get("pat", {}).get("constructs", []),
+                compiled["construct_hints"],
+            )
+        ]
+
+    def lane_aliases(self, lane: str) -> List[str]:
+        """Lowercased lane name followed by its aliases."""
+        return self._role_alias_sets.get(lane) or [lane.lower()]
+
     def _clean_action(self, txt: str) -> str:
         txt = (txt or "").strip().rstrip(".")
         txt = re.sub(
@@ -54,9 +73,8 @@ class FrajerKB:
         s = sentence.strip()
         lane_hint = self._lane_hint(s)
 
-        for rule in self.kb.get("pat", {}).get("constructs", []):
-            hints = rule.get("hints", [])
-            if any(re.search(h, s) for h in hints):
+        for rule, hints in self._constructs:
+            if any(h.search(s) for h in hints):
                 return {
                     "intent": rule.get("intent"),
                     "template": rule.get("template"),
@@ -100,9 +118,8 @@ class FrajerKB:
         if match:
             return match.group(1).strip()
 
-        for lane, aliases in self.role_aliases.items():
-            pattern = r"\b(" + "|".join(map(re.escape, aliases + [lane])) + r")\b"
-            if re.search(pattern, s, flags=re.IGNORECASE):
+        for lane, regex in self._role_regexes:
+            if regex.search(s):
                 return lane
 
         return self.default_lane
@@ -189,10 +206,7 @@ class FrajerKB:
                         .strip(":,;")
                         .lower()
                     )
-                    aliases = [lane_true.lower()] + [
-                        alias.lower() for alias in self.role_aliases.get(lane_true, [])
-                    ]
-                    if first_token not in aliases:
+                    if first_token not in self.lane_aliases(lane_true):
                         lane_true = self.default_lane
 
                 slots["cond_short"] = cond_clean or self._clean_action(cond_raw)
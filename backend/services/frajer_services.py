@@ -48,9 +48,18 @@ def draft_engine_json_from_text(
     engine = FrajerKB(locale=locale, kb_variant=kb_variant)
     sentences = _split_sentences(text)
 
+    # Lane registry: lane name -> lane dict, in first-seen order. Usage counts
+    # let the final lane list skip lanes that lost all their nodes without a
+    # second pass over the nodes.
     lanes: Dict[str, Dict[str, str]] = {}
+    lane_usage: Dict[str, int] = {}
     nodes: List[Dict[str, Any]] = []
     flows: List[Dict[str, Any]] = []
+    # Node index: id -> node dict, maintained as nodes are appended so the
+    # previous node's lane is an O(1) lookup instead of a scan over ``nodes``.
+    node_index: Dict[str, Dict[str, Any]] = {}
+    first_business: Optional[Dict[str, Any]] = None
+    last_business: Optional[Dict[str, Any]] = None
 
     def ensure_lane(raw_lane: Optional[str]) -> str:
         lane_name = _normalize_lane_name(raw_lane) or _normalize_lane_name(
@@ -58,12 +67,27 @@ def draft_engine_json_from_text(
         )
         if lane_name not in lanes:
             lanes[lane_name] = {"id": lane_name, "name": lane_name}
+            lane_usage[lane_name] = 0
         return lane_name
 
+    def add_node(node: Dict[str, Any]) -> None:
+        nonlocal first_business, last_business
+        nodes.append(node)
+        node_index[node["id"]] = node
+        lane_usage[node["laneId"]] += 1
+        if node.get("type") not in {"start_event", "end_event"}:
+            first_business = first_business or node
+            last_business = node
+
+    def move_to_lane(node: Dict[str, Any], lane: str) -> None:
+        lane_usage[node["laneId"]] -= 1
+        lane_usage[lane] += 1
+        node["laneId"] = lane
+
     default_lane = ensure_lane(engine.default_lane)
 
     start_id = _new_id("start")
-    nodes.append(
+    add_node(
         {"id": start_id, "type": "start_event", "name": "Start", "laneId": default_lane}
     )
     previous = start_id
@@ -75,12 +99,8 @@ def draft_engine_json_from_text(
             i += 1
             continue
 
-        prev_lane = None
-        if previous:
-            for existing in nodes:
-                if existing["id"] == previous:
-                    prev_lane = existing.get("laneId")
-                    break
+        prev_node = node_index.get(previous) if previous else None
+        prev_lane = prev_node.get("laneId") if prev_node else None
 
         if i + 2 < len(sentences):
             second = sentences[i + 1]
@@ -96,9 +116,8 @@ def draft_engine_json_from_text(
                         )
                         for n in new_nodes:
                             lane_hint = n.get("laneId") or prev_lane or default_lane
-                            lane = ensure_lane(lane_hint)
-                            n["laneId"] = lane
-                        nodes.extend(new_nodes)
+                            n["laneId"] = ensure_lane(lane_hint)
+                            add_node(n)
                         flows.extend(new_flows)
                         i += 2
                         continue
@@ -115,11 +134,7 @@ def draft_engine_json_from_text(
                         .strip(":,;")
                         .lower()
                     )
-                    aliases = [detected_lane.lower()] + [
-                        alias.lower()
-                        for alias in engine.role_aliases.get(detected_lane, [])
-                    ]
-                    if first_token in aliases:
+                    if first_token in engine.lane_aliases(detected_lane):
                         lane_hint = detected_lane
                     elif lane_hint == engine.default_lane and prev_lane:
                         lane_hint = prev_lane
@@ -127,16 +142,14 @@ def draft_engine_json_from_text(
                     lane_hint = prev_lane
             elif n_type.endswith("gateway") and prev_lane:
                 lane_hint = prev_lane
-            lane = ensure_lane(lane_hint)
-            n["laneId"] = lane
-        nodes.extend(new_nodes)
+            n["laneId"] = ensure_lane(lane_hint)
+            add_node(n)
         flows.extend(new_flows)
         i += 1
 
     end_id = _new_id("end")
-    nodes.append(
-        {"id": end_id, "type": "end_event", "name": "End", "laneId": default_lane}
-    )
+    end_node = {"id": end_id, "type": "end_event", "name": "End", "laneId": default_lane}
+    add_node(end_node)
     flows.append(
         {
             "id": _new_id("f"),
@@ -146,21 +159,15 @@ def draft_engine_json_from_text(
         }
     )
 
-    business_nodes = [
-        n for n in nodes if n.get("type") not in {"start_event", "end_event"}
-    ]
-    if business_nodes:
-        nodes[0]["laneId"] = business_nodes[0]["laneId"]
-        end_node = nodes[-1]
-        if end_node.get("type") == "end_event":
-            end_node["laneId"] = business_nodes[-1]["laneId"]
+    if first_business and last_business:
+        move_to_lane(nodes[0], first_business["laneId"])
+        move_to_lane(end_node, last_business["laneId"])
 
-    node_lane_lookup = {n["id"]: n.get("laneId", default_lane) for n in nodes}
     for flow in flows:
-        flow["laneId"] = node_lane_lookup.get(flow.get("source"), default_lane)
+        source = node_index.get(flow.get("source"))
+        flow["laneId"] = source.get("laneId", default_lane) if source else default_lane
 
-    used_lane_ids = {n["laneId"] for n in nodes}
-    lanes_list = [lane for lane in lanes.values() if lane["id"] in used_lane_ids]
+    lanes_list = [lane for lane in lanes.values() if lane_usage[lane["id"]] > 0]
 
     return {
         "lanes": lanes_list,
@@ -0,0 +1,91 @@
+# services/json_diff.py
+"""RFC 6902 diff for model history deltas (applied with ``mentor.json_patch``).
+
+Objekty sa porovnavaju rekurzivne po klucoch, polia cez ``SequenceMatcher``
+nad serializovanymi prvkami, takze vlozenie jedneho uzla alebo riadku XML
+je jedna ``add`` operacia a nie prepis celeho zvysku pola. Spolocny zaciatok
+a koniec pola sa orezu linearne; ``SequenceMatcher`` je pri opakujucich sa
+riadkoch XML kvadraticky, preto ak by zvysny usek presiahol
+``DIFF_MAX_COST`` porovnani, diff skonci ``DiffTooLarge`` a volajuci ulozi
+plny snapshot.
+"""
+from __future__ import annotations
+
+import json
+from difflib import SequenceMatcher
+from typing import Any, Dict, List
+
+Op = Dict[str, Any]
+
+# Max. sucin dlzok porovnavanych usekov pola (po orezani spolocnych koncov).
+DIFF_MAX_COST = 250_000
+
+
+class DiffTooLarge(ValueError):
+    """The list diff would be too expensive; store the target in full instead."""
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def diff_json(source: Any, target: Any, path: str = "") -> List[Op]:
+    """Operations turning ``source`` into ``target``."""
+    if type(source) is not type(target):
+        return [{"op": "replace", "path": path, "value": target}]
+    if isinstance(source, dict):
+        ops: List[Op] = []
+        for key in source:
+            if key not in target:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in source:
+                ops.append({"op": "add", "path": child, "value": value})
+            elif source[key] != value:
+                ops.extend(diff_json(source[key], value, child))
+        return ops
+    if isinstance(source, list):
+        return _diff_list(source, target, path)
+    if source != target:
+        return [{"op": "replace", "path": path, "value": target}]
+    return []
+
+
+def _diff_list(source: List[Any], target: List[Any], path: str) -> List[Op]:
+    source_keys = [_key(item) for item in source]
+    target_keys = [_key(item) for item in target]
+    start = 0
+    limit = min(len(source_keys), len(target_keys))
+    while start < limit and source_keys[start] == target_keys[start]:
+        start += 1
+    source_end, target_end = len(source_keys), len(target_keys)
+    while source_end > start and target_end > start and source_keys[source_end - 1] == target_keys[target_end - 1]:
+        source_end -= 1
+        target_end -= 1
+    if (source_end - start) * (target_end - start) > DIFF_MAX_COST:
+        raise DiffTooLarge(f"{path or '/'}: {source_end - start}x{target_end - start} items")
+    matcher = SequenceMatcher(
+        None, source_keys[start:source_end], target_keys[start:target_end], autojunk=False
+    )
+    opcodes = [
+        (tag, i1 + start, i2 + start, j1 + start, j2 + start) for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+    ]
+    ops: List[Op] = []
+    # odzadu, aby indexy skorsich blokov ostali platne
+    for tag, i1, i2, j1, j2 in reversed(opcodes):
+        if tag == "equal":
+            continue
+        if tag == "replace" and i2 - i1 == j2 - j1:
+            for offset in range(i2 - i1):
+                ops.extend(diff_json(source[i1 + offset], target[j1 + offset], f"{path}/{i1 + offset}"))
+            continue
+        for idx in range(i2 - 1, i1 - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{idx}"})
+        for offset, value in enumerate(target[j1:j2]):
+            ops.append({"op": "add", "path": f"{path}/{i1 + offset}", "value": value})
+    return ops
@@ -1,8 +1,10 @@
 ﻿from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import json
 import yaml
 
+from services.kb_snapshot import compile_kb_sources, kb_snapshot_path, read_snapshot
+
 KB_DIR = Path(__file__).resolve().parent.parent / "kb"
 
 
@@ -44,9 +46,39 @@ def _variant_filenames(
     return tuple(candidates)
 
 
+def kb_source_paths(locale: str = "sk", variant: str = "main") -> List[Path]:
+    """All candidate KB files (existing or not) in resolution order."""
+    candidates = (
+        _variant_filenames("synonyms", locale, variant, ".yaml")
+        + _variant_filenames("patterns", locale, variant, ".yaml")
+        + _variant_filenames("roles", locale, variant, ".yaml")
+        + _variant_filenames("constraints", None, variant, ".yaml")
+        + _variant_filenames("templates", None, variant, ".json")
+    )
+    return [KB_DIR / filename for filename in candidates]
+
+
 def get_kb(locale: str = "sk", variant: str = "main") -> Dict[str, Any]:
     """Load KB assets with optional variant fallback.
 
+    A precompiled snapshot (see ``services.kb_snapshot``) is used when its
+    source hashes match the KB files on disk; otherwise the YAML/JSON sources
+    are parsed.
+    """
+    snapshot = read_snapshot(
+        kb_snapshot_path(locale, variant),
+        kind="kb",
+        sources=kb_source_paths(locale, variant),
+    )
+    if snapshot is not None:
+        snapshot["_meta"]["snapshot"] = True
+        return snapshot
+    return load_kb_from_sources(locale, variant)
+
+
+def load_kb_from_sources(locale: str = "sk", variant: str = "main") -> Dict[str, Any]:
+    """Parse KB assets from YAML/JSON with optional variant fallback.
+
     If a variant-specific file is missing we gracefully fall back to the main KB
     while recording metadata so the caller knows a fallback occurred.
     """
@@ -55,6 +87,7 @@ def get_kb(locale: str = "sk", variant: str = "main") -> Dict[str, Any]:
         "variant_requested": variant or "main",
         "variant_resolved": "main",
         "files": {},
+        "snapshot": False,
     }
 
     # Synonyms
@@ -126,7 +159,7 @@ def get_kb(locale: str = "sk", variant: str = "main") -> Dict[str, Any]:
         resolved_variant = "main"
     meta["variant_resolved"] = resolved_variant
 
-    return {
+    kb = {
         "syn": syn,
         "pat": pat,
         "tpl": templates,
@@ -134,3 +167,5 @@ def get_kb(locale: str = "sk", variant: str = "main") -> Dict[str, Any]:
         "constraints": constraints,
         "_meta": meta,
     }
+    kb["_compiled"] = compile_kb_sources(kb)
+    return kb
@@ -0,0 +1,186 @@
+# services/kb_snapshot.py
+"""Precompiled KB / lexicon snapshots for fast worker cold start.
+
+Snapshot je binarny subor (marshal) s hlavickou::
+
+    MAGIC | schema version | python major.minor | payload
+
+Payload nesie hashe zdrojovych YAML/JSON suborov. Pri nacitani sa hashe
+porovnaju s aktualnymi subormi; ak nesedia (alebo nesedi schema/verzia
+Pythonu), loader vrati ``None`` a volajuci spadne spat na YAML.
+
+Build krok (napr. v Render build command), spustit z priecinka ``backend``::
+
+    python -m services.kb_snapshot
+    python -m services.kb_snapshot --locale sk --locale en --variant main
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import marshal
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from services.storage_io import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA_VERSION = 1
+SNAPSHOT_MAGIC = b"BPMNKBS\x00"
+_HEADER = struct.Struct("<8sHBB")
+_MARSHAL_VERSION = 4
+_DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / "kb" / "compiled"
+
+
+def snapshot_dir() -> Path:
+    raw_dir = os.getenv("BPMN_KB_SNAPSHOT_DIR")
+    return Path(raw_dir) if raw_dir else _DEFAULT_SNAPSHOT_DIR
+
+
+def kb_snapshot_path(locale: str, variant: str) -> Path:
+    return snapshot_dir() / f"kb.{variant or 'main'}.{locale}.snap"
+
+
+def lexicon_snapshot_path(lang: str) -> Path:
+    return snapshot_dir() / f"lexicon.{lang}.snap"
+
+
+def hash_sources(paths: Sequence[Path]) -> List[Optional[str]]:
+    """Return sha256 per path in order; ``None`` marks a missing file.
+
+    Missing candidates are recorded too, so a newly added variant file
+    invalidates a snapshot built while only the fallback existed.
+    """
+    hashes: List[Optional[str]] = []
+    for path in paths:
+        try:
+            hashes.append(hashlib.sha256(path.read_bytes()).hexdigest())
+        except FileNotFoundError:
+            hashes.append(None)
+    return hashes
+
+
+def write_snapshot(
+    path: Path, *, kind: str, sources: Sequence[Path], data: Dict[str, Any]
+) -> None:
+    payload = {
+        "kind": kind,
+        "sources": hash_sources(sources),
+        "data": data,
+    }
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_SCHEMA_VERSION,
+        sys.version_info[0],
+        sys.version_info[1],
+    )
+    atomic_write_bytes(path, header + marshal.dumps(payload, _MARSHAL_VERSION))
+
+
+def read_snapshot(
+    path: Path, *, kind: str, sources: Sequence[Path]
+) -> Optional[Dict[str, Any]]:
+    """Return snapshot data, or ``None`` when missing, stale or invalid."""
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning("Failed to read KB snapshot: path=%s error=%s", path, exc)
+        return None
+
+    if len(raw) < _HEADER.size:
+        return None
+    magic, schema, py_major, py_minor = _HEADER.unpack_from(raw)
+    if magic != SNAPSHOT_MAGIC or schema != SNAPSHOT_SCHEMA_VERSION:
+        return None
+    if (py_major, py_minor) != sys.version_info[:2]:
+        return None
+    try:
+        payload = marshal.loads(raw[_HEADER.size :])
+    except (EOFError, ValueError, TypeError) as exc:
+        logger.warning("Corrupt KB snapshot: path=%s error=%s", path, exc)
+        return None
+    if not isinstance(payload, dict) or payload.get("kind") != kind:
+        return None
+    if payload.get("sources") != hash_sources(sources):
+        return None
+    data = payload.get("data")
+    return data if isinstance(data, dict) else None
+
+
+# --------- Predkompilovane zdroje ----------
+def compile_kb_sources(kb: Dict[str, Any]) -> Dict[str, Any]:
+    """Derive regex sources and alias tables that FrajerKB would build per call."""
+    role_aliases = (kb.get("roles") or {}).get("aliases") or {}
+    role_patterns = []
+    role_alias_sets: Dict[str, List[str]] = {}
+    for lane, aliases in role_aliases.items():
+        aliases = list(aliases or [])
+        role_patterns.append(
+            [lane, r"\b(" + "|".join(map(re.escape, aliases + [lane])) + r")\b"]
+        )
+        role_alias_sets[lane] = [lane.lower()] + [alias.lower() for alias in aliases]
+
+    construct_hints = [
+        [rule.get("id"), list(rule.get("hints") or [])]
+        for rule in (kb.get("pat") or {}).get("constructs") or []
+    ]
+    return {
+        "role_patterns": role_patterns,
+        "role_alias_sets": role_alias_sets,
+        "construct_hints": construct_hints,
+    }
+
+
+# --------- Build CLI ----------
+def build_kb_snapshot(locale: str, variant: str = "main") -> Path:
+    from services.kb_loader import kb_source_paths, load_kb_from_sources
+
+    kb = load_kb_from_sources(locale, variant)
+    path = kb_snapshot_path(locale, variant)
+    write_snapshot(path, kind="kb", sources=kb_source_paths(locale, variant), data=kb)
+    return path
+
+
+def build_lexicon_snapshot(lang: str) -> Path:
+    from services.lexicon_loader import lexicon_source_paths, load_lexicon_from_source
+
+    data = load_lexicon_from_source(lang)
+    path = lexicon_snapshot_path(lang)
+    write_snapshot(path, kind="lexicon", sources=lexicon_source_paths(lang), data=data)
+    return path
+
+
+def build_all(locales: Iterable[str], variants: Iterable[str]) -> List[Path]:
+    written: List[Path] = []
+    for locale in locales:
+        for variant in variants:
+            try:
+                written.append(build_kb_snapshot(locale, variant))
+            except FileNotFoundError as exc:
+                logger.warning("Skipping KB snapshot: %s", exc)
+        try:
+            written.append(build_lexicon_snapshot(locale))
+        except FileNotFoundError:
+            logger.warning("Skipping lexicon snapshot, no lexicon for %s", locale)
+    return written
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build precompiled KB snapshots.")
+    parser.add_argument("--locale", action="append", dest="locales")
+    parser.add_argument("--variant", action="append", dest="variants")
+    args = parser.parse_args(argv)
+    for path in build_all(args.locales or ["sk"], args.variants or ["main"]):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# services/label_rule_matcher.py
+"""Gateway branch labels from ``kb/label_rules.<locale>.yaml``.
+
+Pravidla sa kompiluju raz na verziu suboru (mtime + velkost): ``plain`` vzory
+idu do ``PhraseAutomaton``, ``regex`` vzory do jedneho spojeneho ``re`` s
+pomenovanymi skupinami. Frazy sa vyhodnotia jednym prechodom cez vsetky texty
+modelu, regexy bezia nad kazdym textom zvlast (kotvy ``^``/``$`` tak plati pre
+cely text). Pri viacerych zhodach vyhrava skorsie pravidlo v subore.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import yaml
+
+from services.phrase_automaton import PhraseAutomaton, tokenize
+
+logger = logging.getLogger(__name__)
+
+KB_DIR = Path(__file__).resolve().parent.parent / "kb"
+# Oddelovac textov v davke tokenov; nie je slovo, takze frazy cez neho neprejdu.
+_SEPARATOR = "\n\x00\n"
+# Vzory so skupinami, spatnymi odkazmi alebo globalnymi inline flagmi, napr.
+# ``(?i)``, sa do spolocneho re nedaju vlozit.
+_UNSAFE_REGEX = re.compile(r"\(\?P[<=]|\\\d|\(\?\(|\(\?[aiLmsux]+\)")
+
+BranchLabels = Tuple[str, str]
+
+
+class LabelRuleMatcher:
+    """Compiled ``label_rules``: text -> (positive, negative) labels or ``None``."""
+
+    def __init__(self, rules: Sequence[Dict[str, Any]], locale: str = "sk") -> None:
+        self.labels: List[BranchLabels] = []
+        plain: List[Tuple[str, int]] = []
+        combined: List[Tuple[str, Tuple[re.Pattern[str], int]]] = []
+        self._separate: List[Tuple[re.Pattern[str], int]] = []
+        for entry in rules:
+            if not isinstance(entry, dict):
+                continue
+            if str(entry.get("locale") or locale) != locale:
+                continue
+            if str(entry.get("gateway") or "exclusive") != "exclusive":
+                continue
+            labels = entry.get("labels") if isinstance(entry.get("labels"), dict) else {}
+            if not labels.get("positive") or not labels.get("negative"):
+                continue
+            rule_idx = len(self.labels)
+            self.labels.append((str(labels["positive"]), str(labels["negative"])))
+            for p_idx, pattern in enumerate(entry.get("patterns") or []):
+                if not isinstance(pattern, dict) or not pattern.get("value"):
+                    continue
+                value = str(pattern["value"])
+                if pattern.get("mode") != "regex":
+                    plain.append((value, rule_idx))
+                    continue
+                try:
+                    compiled = re.compile(value, re.IGNORECASE)
+                except re.error as exc:
+                    logger.warning("Skipping invalid label rule regex: id=%s error=%s", entry.get("id"), exc)
+                    continue
+                if _UNSAFE_REGEX.search(value):
+                    self._separate.append((compiled, rule_idx))
+                else:
+                    combined.append((f"(?P<r{rule_idx}_{p_idx}>{value})", (compiled, rule_idx)))
+        self._automaton: PhraseAutomaton[int] = PhraseAutomaton(plain)
+        # Lookahead je nulovej sirky: finditer skusi kazdu poziciu a na nej
+        # vrati prve (teda najskorsie) pravidlo, ktore tam pasuje.
+        self._regex: Optional[re.Pattern[str]] = None
+        if combined:
+            try:
+                self._regex = re.compile(f"(?=(?:{'|'.join(name for name, _ in combined)}))", re.IGNORECASE)
+            except re.error as exc:
+                logger.warning("Label rule regexes cannot be combined, matching separately: error=%s", exc)
+                self._separate.extend((compiled, rule_idx) for _, (compiled, rule_idx) in combined)
+                self._separate.sort(key=lambda item: item[1])
+
+    def __bool__(self) -> bool:
+        return bool(self.labels)
+
+    def match_many(self, texts: Iterable[str]) -> List[Optional[BranchLabels]]:
+        """Labels for each text: one automaton pass over all texts, regexes per text."""
+        texts = [str(text or "") for text in texts]
+        best: List[Optional[int]] = [None] * len(texts)
+        if not texts or not self.labels:
+            return [None] * len(texts)
+
+        def _hit(text_idx: int, rule_idx: int) -> None:
+            current = best[text_idx]
+            if current is None or rule_idx < current:
+                best[text_idx] = rule_idx
+
+        tokens: List[str] = []
+        token_starts: List[int] = []
+        for text in texts:
+            if tokens:
+                tokens.append(_SEPARATOR)
+            token_starts.append(len(tokens))
+            tokens.extend(tokenize(text))
+        for end, rule_ids in self._automaton.iter_matches(tokens):
+            _hit(bisect.bisect_right(token_starts, end) - 1, min(rule_ids))
+
+        patterns = ([(self._regex, None)] if self._regex is not None else []) + self._separate
+        for text_idx, text in enumerate(texts):
+            if not text:
+                continue
+            for pattern, rule_idx in patterns:
+                if rule_idx is None:
+                    for match in pattern.finditer(text):
+                        _hit(text_idx, int(str(match.lastgroup)[1:].split("_", 1)[0]))
+                elif pattern.search(text):
+                    _hit(text_idx, rule_idx)
+
+        return [self.labels[idx] if idx is not None else None for idx in best]
+
+    def match(self, text: str) -> Optional[BranchLabels]:
+        return self.match_many([text])[0]
+
+
+def label_rules_path(locale: str) -> Path:
+    return KB_DIR / f"label_rules.{locale}.yaml"
+
+
+@lru_cache(maxsize=8)
+def _compile(locale: str, path: str, mtime_ns: int, size: int) -> LabelRuleMatcher:
+    if not path:
+        return LabelRuleMatcher([], locale)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = yaml.safe_load(handle) or {}
+    except (OSError, yaml.YAMLError) as exc:
+        logger.warning("Failed to load label rules: path=%s error=%s", path, exc)
+        data = {}
+    rules = data.get("label_rules") if isinstance(data, dict) else None
+    try:
+        return LabelRuleMatcher(rules if isinstance(rules, list) else [], locale)
+    except Exception as exc:  # chybne pravidlo nesmie zhodit export modelu
+        logger.warning("Failed to compile label rules, using defaults: path=%s error=%s", path, exc)
+        return LabelRuleMatcher([], locale)
+
+
+def get_label_matcher(locale: str = "sk") -> LabelRuleMatcher:
+    """Matcher for the current KB version; recompiled only when the file changes."""
+    path = label_rules_path(locale)
+    try:
+        stat = path.stat()
+    except OSError:
+        return _compile(locale, "", 0, 0)
+    return _compile(locale, str(path), stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,104 @@
+# services/latency_stats.py
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Sequence
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(values: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(percentile(ordered, 50), 3),
+        "p95": round(percentile(ordered, 95), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+# Bucket upper bounds in milliseconds; the last bucket is open-ended.
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        idx = bisect.bisect_left(self.buckets_ms, value_ms)
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+
+    def _bucket_percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100.0 * self.count))
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                # Horna hranica bucketu nesmie prekrocit skutocne maximum.
+                return min(self.buckets_ms[idx], self.max_ms) if idx < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "p50": self._bucket_percentile(50),
+                "p95": self._bucket_percentile(95),
+                "p99": self._bucket_percentile(99),
+                "max": round(self.max_ms, 3),
+                "buckets": {
+                    (f"le_{bound}" if idx < len(self.buckets_ms) else "inf"): self.counts[idx]
+                    for idx, bound in enumerate(self.buckets_ms + (None,))
+                },
+            }
+
+
+class HistogramRegistry:
+    """Named histograms shared by a process (e.g. per pipeline stage)."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self._buckets_ms = tuple(buckets_ms)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value_ms: float) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram(self._buckets_ms))
+        histogram.observe(value_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        return {name: histogram.snapshot() for name, histogram in items}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
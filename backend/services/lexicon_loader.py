@@ -4,10 +4,12 @@ from __future__ import annotations
 from functools import lru_cache
 from pathlib import Path
 import unicodedata
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import yaml
 
+from services.kb_snapshot import lexicon_snapshot_path, read_snapshot
+
 # Fallback locations for config/lexicon directories relative to the repo or cwd.
 LEXICON_DIR_CANDIDATES = [
     Path(__file__).resolve().parents[1] / "config" / "lexicon",
@@ -21,6 +23,11 @@ def _strip_diacritics(value: str) -> str:
     return "".join(ch for ch in normalized if not unicodedata.combining(ch))
 
 
+def fold_text(value: str) -> str:
+    """Lowercase and strip diacritics; the form lexicon phrases are matched in."""
+    return _strip_diacritics(value.lower())
+
+
 def _normalize_phrases(values: list[Any]) -> list[str]:
     """Lowercase phrases and add ASCII duplicates when they differ."""
     seen: set[str] = set()
@@ -48,8 +55,24 @@ def _find_lexicon_path(lang: str) -> Path:
     )
 
 
+def lexicon_source_paths(lang: str) -> List[Path]:
+    return [base / f"{lang}.yml" for base in LEXICON_DIR_CANDIDATES]
+
+
 @lru_cache(maxsize=8)
 def get_lexicon(lang: str = "sk") -> Dict[str, Any]:
+    """Load the normalized lexicon, preferring a fresh precompiled snapshot."""
+    snapshot = read_snapshot(
+        lexicon_snapshot_path(lang),
+        kind="lexicon",
+        sources=lexicon_source_paths(lang),
+    )
+    if snapshot is not None:
+        return snapshot
+    return load_lexicon_from_source(lang)
+
+
+def load_lexicon_from_source(lang: str = "sk") -> Dict[str, Any]:
     """Load and normalize the YAML lexicon for the given language."""
     path = _find_lexicon_path(lang)
     with path.open("r", encoding="utf-8") as handle:
@@ -70,4 +93,4 @@ def get_lexicon(lang: str = "sk") -> Dict[str, Any]:
     return data
 
 
-__all__ = ["get_lexicon"]
+__all__ = ["fold_text", "get_lexicon"]
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from services.storage_io import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Bez pripony .json, aby ho glob("*.json") nepovazoval za model.
+INDEX_NAME = ".models-index"
+INDEX_VERSION = 1
+SORT_KEYS = ("updated_at", "created_at", "name")
+# Zapis v tom istom "tiku" hodin nemusi zmenit mtime adresara (ako racy-git):
+# prilis cerstvemu mtime neverime a pri dalsom dotaze adresar preskenujeme.
+_RACY_NS = 20_000_000
+
+Summarize = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(directory: Path) -> threading.Lock:
+    key = str(directory.resolve())
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _index_path(directory: Path) -> Path:
+    return directory / INDEX_NAME
+
+
+def _read_index(directory: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+    path = _index_path(directory)
+    if not path.exists():
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as exc:
+        logger.warning("Corrupt model index, rebuilding: path=%s error=%s", path, exc)
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION or not isinstance(data.get("items"), dict):
+        return None
+    return data["items"]
+
+
+def _write_index(directory: Path, items: Dict[str, Dict[str, Any]]) -> None:
+    atomic_write_json(_index_path(directory), {"version": INDEX_VERSION, "items": items}, ensure_ascii=False)
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _model_files(directory: Path) -> Dict[str, os.DirEntry]:
+    if not directory.exists():
+        return {}
+    with os.scandir(directory) as entries:
+        return {
+            entry.name[: -len(".json")]: entry
+            for entry in entries
+            if entry.name.endswith(".json") and entry.is_file()
+        }
+
+
+def _read_entry(entry: os.DirEntry, summarize: Summarize) -> Optional[Dict[str, Any]]:
+    try:
+        with open(entry.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {**summarize(data), "_mtime_ns": entry.stat().st_mtime_ns}
+    except Exception:
+        logger.warning("Failed to read model file while listing: path=%s", entry.path)
+        return None
+
+
+def _sort_value(item: Dict[str, Any], sort: str) -> str:
+    value = str(item.get(sort) or "")
+    return value.lower() if sort == "name" else value
+
+
+def _trigrams(name: str) -> Set[str]:
+    return {name[idx : idx + 3] for idx in range(len(name) - 2)}
+
+
+class DirectoryIndex:
+    """In-memory view of one directory's manifest with sort and name indexes.
+
+    Zoradene zoznamy (``(kluc, id)``) a trigramovy index mien sa stavaju
+    lenivo pri prvom dotaze a potom sa udrziavaju inkrementalne, takze
+    strana vysledkov nestoji O(n) pri kazdom listovani.
+    """
+
+    def __init__(self, items: Dict[str, Dict[str, Any]]) -> None:
+        self.items = items
+        self.dir_mtime_ns: Optional[int] = None
+        self.index_mtime_ns: Optional[int] = None
+        self._sorted: Dict[str, List[Tuple[str, str]]] = {}
+        self._grams: Optional[Dict[str, Set[str]]] = None
+
+    def _sorted_for(self, sort: str) -> List[Tuple[str, str]]:
+        ordered = self._sorted.get(sort)
+        if ordered is None:
+            ordered = sorted((_sort_value(item, sort), model_id) for model_id, item in self.items.items())
+            self._sorted[sort] = ordered
+        return ordered
+
+    def _gram_index(self) -> Dict[str, Set[str]]:
+        if self._grams is None:
+            self._grams = {}
+            for model_id, item in self.items.items():
+                for gram in _trigrams(str(item.get("name") or "").lower()):
+                    self._grams.setdefault(gram, set()).add(model_id)
+        return self._grams
+
+    def _unlink(self, model_id: str) -> None:
+        item = self.items.pop(model_id, None)
+        if item is None:
+            return
+        for sort, ordered in self._sorted.items():
+            key = (_sort_value(item, sort), model_id)
+            pos = bisect.bisect_left(ordered, key)
+            if pos < len(ordered) and ordered[pos] == key:
+                ordered.pop(pos)
+        if self._grams is not None:
+            for gram in _trigrams(str(item.get("name") or "").lower()):
+                bucket = self._grams.get(gram)
+                if bucket is not None:
+                    bucket.discard(model_id)
+                    if not bucket:
+                        del self._grams[gram]
+
+    def put(self, model_id: str, item: Dict[str, Any]) -> None:
+        self._unlink(model_id)
+        self.items[model_id] = item
+        for sort, ordered in self._sorted.items():
+            bisect.insort(ordered, (_sort_value(item, sort), model_id))
+        if self._grams is not None:
+            for gram in _trigrams(str(item.get("name") or "").lower()):
+                self._grams.setdefault(gram, set()).add(model_id)
+
+    def remove(self, model_id: str) -> None:
+        self._unlink(model_id)
+
+    def query(
+        self,
+        *,
+        search: Optional[str],
+        sort: str,
+        descending: bool,
+        limit: Optional[int],
+        offset: int,
+    ) -> Tuple[List[str], int]:
+        needle = (search or "").lower()
+        if not needle:
+            ordered = self._sorted_for(sort)
+            total = len(ordered)
+            end = total if limit is None else min(total, offset + limit)
+            if descending:
+                ids = [ordered[total - 1 - idx][1] for idx in range(offset, end)]
+            else:
+                ids = [ordered[idx][1] for idx in range(offset, end)]
+            return ids, total
+        if len(needle) >= 3:
+            grams = self._gram_index()
+            buckets = sorted((grams.get(gram, set()) for gram in _trigrams(needle)), key=len)
+            candidates = set(buckets[0]).intersection(*buckets[1:]) if buckets else set()
+        else:
+            candidates = set(self.items)
+        matched = [
+            model_id
+            for model_id in candidates
+            if needle in str(self.items[model_id].get("name") or "").lower()
+        ]
+        matched.sort(key=lambda model_id: (_sort_value(self.items[model_id], sort), model_id), reverse=descending)
+        end = None if limit is None else offset + limit
+        return matched[offset:end], len(matched)
+
+
+_states: Dict[str, DirectoryIndex] = {}
+
+
+def _reconcile(
+    directory: Path, items: Dict[str, Dict[str, Any]], summarize: Summarize
+) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+    """Ids whose files disappeared and fresh summaries of new or rewritten files."""
+    files = _model_files(directory)
+    removed = [model_id for model_id in items if model_id not in files]
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for model_id, entry in files.items():
+        cached = items.get(model_id)
+        try:
+            mtime_ns = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+        if cached is not None and cached.get("_mtime_ns") == mtime_ns:
+            continue
+        summary = _read_entry(entry, summarize)
+        if summary is None:
+            if cached is not None:
+                removed.append(model_id)
+            continue
+        fresh[model_id] = summary
+    return removed, fresh
+
+
+def _stable_mtime_ns(directory: Path) -> Optional[int]:
+    """Directory mtime, or ``None`` while it is too fresh to rely on."""
+    dir_mtime_ns = _mtime_ns(directory)
+    if dir_mtime_ns is not None and time.time_ns() - dir_mtime_ns < _RACY_NS:
+        return None
+    return dir_mtime_ns
+
+
+def _remember(directory: Path, state: DirectoryIndex) -> DirectoryIndex:
+    state.dir_mtime_ns = _stable_mtime_ns(directory)
+    state.index_mtime_ns = _mtime_ns(_index_path(directory))
+    _states[str(directory.resolve())] = state
+    return state
+
+
+def _load(directory: Path, summarize: Summarize) -> DirectoryIndex:
+    """Cached index for ``directory``; caller holds the directory lock.
+
+    Kym sa mtime adresara nezmeni (ziadny subor nepribudol, nezmizol ani
+    nebol atomicky prepisany), netreba ani ``scandir``.
+    """
+    state = _states.get(str(directory.resolve()))
+    if state is not None and state.dir_mtime_ns is not None and state.dir_mtime_ns == _mtime_ns(directory):
+        return state
+    if state is None:
+        items = _read_index(directory)
+        changed = items is None
+        state = DirectoryIndex(items or {})
+    else:
+        changed = False
+    removed, fresh = _reconcile(directory, state.items, summarize)
+    for model_id in removed:
+        state.remove(model_id)
+    for model_id, summary in fresh.items():
+        state.put(model_id, summary)
+    if (changed or removed or fresh) and directory.exists():
+        _write_index(directory, state.items)
+    return _remember(directory, state)
+
+
+def _cached_for_update(directory: Path) -> Optional[DirectoryIndex]:
+    """Cached state if nobody else rewrote the manifest since we last did."""
+    state = _states.get(str(directory.resolve()))
+    if state is None or state.index_mtime_ns != _mtime_ns(_index_path(directory)):
+        items = _read_index(directory)
+        return DirectoryIndex(items) if items is not None else None
+    return state
+
+
+def upsert_entry(directory: Path, model_id: str, model: Dict[str, Any], summarize: Summarize) -> None:
+    """Record a just-written model; call after the model file is saved."""
+    path = directory / f"{model_id}.json"
+    with _lock_for(directory):
+        state = _cached_for_update(directory)
+        if state is None:
+            return  # index vznikne pri najblizsom listovani
+        mtime_ns = _mtime_ns(path)
+        if mtime_ns is None:
+            return
+        state.put(model_id, {**summarize(model), "_mtime_ns": mtime_ns})
+        _write_index(directory, state.items)
+        _remember(directory, state)
+
+
+def remove_entry(directory: Path, model_id: str) -> None:
+    with _lock_for(directory):
+        state = _cached_for_update(directory)
+        if state is None or model_id not in state.items:
+            return
+        state.remove(model_id)
+        _write_index(directory, state.items)
+        _remember(directory, state)
+
+
+def _public(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in item.items() if key != "_mtime_ns"}
+
+
+def query_entries(
+    directory: Path,
+    summarize: Summarize,
+    *,
+    search: Optional[str] = None,
+    sort: str = "updated_at",
+    descending: bool = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """One page of model summaries and the total count of matching models."""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unsupported sort key: {sort}")
+    with _lock_for(directory):
+        state = _load(directory, summarize)
+        ids, total = state.query(
+            search=search, sort=sort, descending=descending, limit=limit, offset=max(0, offset)
+        )
+        return [_public(state.items[model_id]) for model_id in ids], total
+
+
+def list_entries(directory: Path, summarize: Summarize) -> List[Dict[str, Any]]:
+    """All model summaries (unsorted), reconciled against the directory listing."""
+    with _lock_for(directory):
+        state = _load(directory, summarize)
+        return [_public(item) for item in state.items.values()]
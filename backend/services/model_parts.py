@@ -0,0 +1,297 @@
+# services/model_parts.py
+"""Split on-disk layout for stored models.
+
+``<id>.json`` obsahuje len metadata (nazov, casy, ``process_meta``,
+``generator_input``, ...) a v ``_parts.blobs`` hashe obsahu ``engine_json`` a
+``diagram_xml`` v spolocnom ``blob_store`` pod korenom uloziska. Listovanie a
+kontroly existencie tak parsuju iba male metadata; casti sa citaju az ked
+ich volajuci chce a rovnaky obsah je na disku raz.
+
+Citac zvlada aj starsie formaty: jednosuborovy JSON (vsetko inline) a
+revizne subory v ``<id>.parts/``. Pri najblizsom ulozeni alebo cez
+``migrate_directory`` sa prepisu do blobov; ``collect_garbage`` uvolni bloby,
+na ktore uz neukazuje ziadny model.
+
+S ``bases`` (hashe casti predchadzajucej verzie) sa casti ukladaju ako delty
+(``put_delta_blob``); hash v metadatach je vzdy hash plneho obsahu, takze
+citanie ani deduplikacia nezavisia od toho, ako je blob ulozeny.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.blob_store import (
+    CODECS,
+    DEFAULT_GC_GRACE_S,
+    blob_codec,
+    collect_garbage as _collect_garbage,
+    count_references,
+    decode_blob,
+    get_blob,
+    peek_codec,
+    put_blob,
+    put_delta_blob,
+    storage_codec,
+    zstandard,
+)
+from services.storage_io import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+PARTS_KEY = "_parts"
+PART_FILES = {"engine_json": "engine.json", "diagram_xml": "diagram.bpmn"}
+_READ_ATTEMPTS = 3
+
+
+def store_root(path: Path) -> Path:
+    """Storage root whose ``blobs/`` holds the parts of the model at ``path``.
+
+    Modely su v ``<root>/<id>.json`` alebo ``<root>/{users,orgs}/<id>/models/<id>.json``.
+    """
+    directory = path.parent
+    if directory.name == "models" and directory.parent.parent.name in ("users", "orgs"):
+        return directory.parent.parent.parent
+    return directory
+
+
+def parts_dir(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.parts")
+
+
+def is_legacy(data: Dict[str, Any]) -> bool:
+    return PARTS_KEY not in data
+
+
+def _legacy_part_path(path: Path, rev: str, part: str) -> Path:
+    return parts_dir(path) / f"{rev}.{PART_FILES[part]}"
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _is_blob_layout(data: Dict[str, Any]) -> bool:
+    return isinstance((data.get(PARTS_KEY) or {}).get("blobs"), dict)
+
+
+def _blob_refs(data: Any) -> Dict[str, str]:
+    ref = data.get(PARTS_KEY) if isinstance(data, dict) else None
+    blobs = ref.get("blobs") if isinstance(ref, dict) else None
+    return {part: str(digest) for part, digest in blobs.items() if part in PART_FILES} if isinstance(blobs, dict) else {}
+
+
+def blob_digests(path: Path) -> Dict[str, str]:
+    """Part digests of the model at ``path`` (empty for older layouts); reads only metadata."""
+    try:
+        return _blob_refs(_read_json(path))
+    except (OSError, ValueError):
+        return {}
+
+
+def _load_part(path: Path, ref: Dict[str, Any], part: str) -> Any:
+    if "blobs" in ref:
+        text = get_blob(store_root(path), str(ref["blobs"][part]))
+    else:
+        text = decode_blob(_legacy_part_path(path, str(ref.get("rev") or ""), part).read_bytes())
+    return text if part == "diagram_xml" else json.loads(text)
+
+
+def read_model(path: Path, parts: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Model stored at ``path``; ``parts`` limits which blobs are loaded (``None`` = all).
+
+    Raises ``FileNotFoundError`` when the model does not exist.
+    """
+    wanted = None if parts is None else set(parts)
+    for attempt in range(_READ_ATTEMPTS):
+        data = _read_json(path)
+        if is_legacy(data):
+            if wanted is not None:
+                for part in PART_FILES:
+                    if part not in wanted:
+                        data.pop(part, None)
+            return data
+        ref = data.pop(PARTS_KEY) or {}
+        stored = list(ref["blobs"]) if isinstance(ref.get("blobs"), dict) else ref.get("stored") or []
+        try:
+            for part in stored:
+                if part in PART_FILES and (wanted is None or part in wanted):
+                    data[part] = _load_part(path, ref, part)
+        except FileNotFoundError:
+            # subeh so zapisom novej verzie (stary format reviznych suborov)
+            if attempt + 1 == _READ_ATTEMPTS:
+                raise
+            continue
+        return data
+    raise FileNotFoundError(path)  # pragma: no cover
+
+
+def write_model(
+    path: Path,
+    model: Dict[str, Any],
+    codec: Optional[str] = None,
+    *,
+    recode: bool = False,
+    bases: Optional[Dict[str, str]] = None,
+) -> None:
+    """Write ``model`` as metadata + content-addressed blobs; blobs go first so readers never miss one.
+
+    ``bases`` mapuje cast na hash blobu, voci ktoremu sa ma ulozit ako delta.
+    """
+    codec = codec or storage_codec()
+    root = store_root(path)
+    # None ostava priamo v metadatach, aby sa zachoval rozdiel medzi None a ""
+    meta = {
+        key: value
+        for key, value in model.items()
+        if key != PARTS_KEY and (key not in PART_FILES or value is None)
+    }
+    blobs: Dict[str, str] = {}
+    for part in PART_FILES:
+        value = model.get(part)
+        if value is None:
+            continue
+        text = str(value) if part == "diagram_xml" else json.dumps(value, ensure_ascii=False)
+        base = (bases or {}).get(part)
+        if base and not recode:
+            kind = "text" if part == "diagram_xml" else "json"
+            blobs[part] = put_delta_blob(root, text, base, kind, codec)
+        else:
+            blobs[part] = put_blob(root, text, codec, recode=recode)
+    meta[PARTS_KEY] = {"blobs": blobs}
+    atomic_write_json(path, meta, ensure_ascii=False)
+    shutil.rmtree(parts_dir(path), ignore_errors=True)
+
+
+def update_meta(path: Path, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Rewrite only the metadata file; engine and diagram blobs stay untouched."""
+    data = _read_json(path)
+    if not _is_blob_layout(data):
+        write_model(path, {**read_model(path), **changes})
+        return read_model(path, parts=())
+    data.update({key: value for key, value in changes.items() if key not in PART_FILES and key != PARTS_KEY})
+    atomic_write_json(path, data, ensure_ascii=False)
+    data.pop(PARTS_KEY, None)
+    return data
+
+
+def delete_model_files(path: Path) -> None:
+    """Remove the model record; its blobs are reclaimed by ``collect_garbage``."""
+    path.unlink(missing_ok=True)
+    shutil.rmtree(parts_dir(path), ignore_errors=True)
+
+
+def _needs_migration(path: Path, codec: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parsed metadata when ``path`` uses an older layout or blobs in another codec."""
+    try:
+        data = _read_json(path)
+        if not isinstance(data, dict):
+            return None
+        if is_legacy(data):
+            # v koreni uloziska su aj ine JSON subory (napr. project_notes.json)
+            return data if any(part in data for part in PART_FILES) else None
+        if not _is_blob_layout(data):
+            return data  # revizne subory v <id>.parts/
+        root = store_root(path)
+        if codec is not None and any(peek_codec(root, digest) != codec for digest in _blob_refs(data).values()):
+            return data
+    except (OSError, ValueError) as exc:
+        logger.warning("Skipping model migration: path=%s error=%s", path, exc)
+    return None
+
+
+def migrate_file(path: Path, codec: Optional[str] = None) -> bool:
+    """Rewrite one model in an older layout (or recompress to ``codec``); returns whether it was rewritten."""
+    before = path.stat() if path.exists() else None
+    if before is None or _needs_migration(path, codec) is None:
+        return False
+    try:
+        model = read_model(path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Skipping model migration: path=%s error=%s", path, exc)
+        return False
+    after = path.stat()
+    if (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+        return False  # medzicasom ulozene, dalsi beh ho uz uvidi v novom formate
+    write_model(path, model, codec=codec, recode=codec is not None)
+    return True
+
+
+def migrate_directory(
+    directory: Path, limit: Optional[int] = None, codec: Optional[str] = None
+) -> Dict[str, int]:
+    """Migrate up to ``limit`` models in ``directory``; safe to run while serving.
+
+    Bez ``codec`` sa prepisuju len modely v starsich formatoch; s ``codec``
+    aj modely, ktorych bloby su ulozene inym kodekom.
+    """
+    migrated = 0
+    remaining = 0
+    if not directory.exists():
+        return {"migrated": 0, "remaining": 0}
+    for path in sorted(directory.glob("*.json")):
+        if limit is not None and migrated >= limit:
+            remaining += int(_needs_migration(path, codec) is not None)
+            continue
+        if migrate_file(path, codec=codec):
+            migrated += 1
+    return {"migrated": migrated, "remaining": remaining}
+
+
+def model_dirs(root: Path) -> List[Path]:
+    """Every directory holding stored models under the storage root."""
+    dirs = [root]
+    for group in ("users", "orgs"):
+        base = root / group
+        if base.exists():
+            dirs.extend(sorted(path / "models" for path in base.iterdir() if (path / "models").is_dir()))
+    return dirs
+
+
+def migrate_storage(root: Path, limit: Optional[int] = None, codec: Optional[str] = None) -> Dict[str, int]:
+    migrated = 0
+    remaining = 0
+    for directory in model_dirs(root):
+        budget = None if limit is None else max(0, limit - migrated)
+        result = migrate_directory(directory, limit=budget, codec=codec)
+        migrated += result["migrated"]
+        remaining += result["remaining"]
+    return {"migrated": migrated, "remaining": remaining}
+
+
+def collect_garbage(root: Path, grace_s: float = DEFAULT_GC_GRACE_S) -> Dict[str, int]:
+    """Reference-count blobs from every model record under ``root`` and drop unreferenced ones."""
+    counts = count_references(
+        (path for directory in model_dirs(root) for path in directory.glob("*.json")),
+        lambda data: _blob_refs(data).values(),
+    )
+    return {**_collect_garbage(root, counts, grace_s=grace_s), "references": sum(counts.values())}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain stored models: layout migration and blob GC.")
+    parser.add_argument("--root", default=os.getenv("BPMN_MODELS_DIR", "data/models"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="rewrite older layouts into content-addressed blobs")
+    migrate.add_argument("--compression", choices=CODECS, default=None, help="recompress blobs to this codec")
+    migrate.add_argument("--limit", type=int, default=None)
+    gc = commands.add_parser("gc", help="delete blobs no model points to")
+    gc.add_argument("--grace-s", type=float, default=DEFAULT_GC_GRACE_S)
+    args = parser.parse_args()
+    root = Path(args.root)
+    if args.command == "gc":
+        print(json.dumps(collect_garbage(root, grace_s=args.grace_s)))
+        return
+    if args.compression == "zstd" and zstandard is None:
+        parser.error("zstd requires the zstandard package")
+    print(json.dumps(migrate_storage(root, limit=args.limit, codec=args.compression)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
-import json
 import logging
 import os
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
-from services.storage_io import atomic_write_json
+from services.model_index import query_entries, remove_entry, upsert_entry
+from services.model_parts import delete_model_files, read_model, update_meta, write_model
 
 # Storage root: defaults to repo-local data/models; override via BPMN_MODELS_DIR for persistent disk (Render).
 raw_dir = os.getenv("BPMN_MODELS_DIR")
@@ -61,6 +61,16 @@ def _scoped_model_path(model_id: str, user_id: Optional[str] = None) -> Path:
     return _model_path(model_id)
 
 
+def _summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": data.get("id"),
+        "name": data.get("name"),
+        "created_at": data.get("created_at"),
+        "updated_at": data.get("updated_at"),
+        "process_meta": data.get("process_meta"),
+    }
+
+
 def _now_iso() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
@@ -82,8 +92,7 @@ def save_model(
     existing_process_meta: Optional[Dict[str, Any]] = None
     if path.exists():
         try:
-            with path.open("r", encoding="utf-8") as f:
-                existing = json.load(f)
+            existing = read_model(path, parts=())
             created_at = existing.get("created_at", created_at)
             existing_generator_input = existing.get("generator_input")
             existing_process_meta = existing.get("process_meta")
@@ -103,46 +112,54 @@ def save_model(
         model["generator_input"] = final_generator_input
     if final_process_meta is not None:
         model["process_meta"] = final_process_meta
-    atomic_write_json(path, model, ensure_ascii=False)
+    write_model(path, model)
+    upsert_entry(path.parent, model_id, model, _summary)
     return model
 
 
-def load_model(model_id: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+def load_model(
+    model_id: str, user_id: Optional[str] = None, parts: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """Load a model; ``parts`` picks which of ``engine_json``/``diagram_xml`` to read (``None`` = all)."""
+    path = _scoped_model_path(model_id, user_id=user_id)
+    if not path.exists():
+        raise FileNotFoundError(model_id)
+    return read_model(path, parts=parts)
+
+
+def update_model_meta(model_id: str, changes: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """Update metadata fields (e.g. ``process_meta``) without rewriting engine or diagram."""
     path = _scoped_model_path(model_id, user_id=user_id)
     if not path.exists():
         raise FileNotFoundError(model_id)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    meta = update_meta(path, {**changes, "updated_at": _now_iso()})
+    upsert_entry(path.parent, model_id, meta, _summary)
+    return meta
 
 
 def delete_model(model_id: str, user_id: Optional[str] = None) -> None:
     path = _scoped_model_path(model_id, user_id=user_id)
-    if path.exists():
-        path.unlink()
+    delete_model_files(path)
+    remove_entry(path.parent, model_id)
 
 
-def list_models(search: str | None = None, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
+def query_models(
+    search: str | None = None,
+    user_id: Optional[str] = None,
+    *,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    sort: str = "updated_at",
+    descending: bool = True,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """One page of model summaries and the total number of matches."""
     directory = _user_models_dir(user_id) if user_id else _models_dir()
-    for file in directory.glob("*.json"):
-        try:
-            with file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            items.append(
-                {
-                    "id": data.get("id"),
-                    "name": data.get("name"),
-                    "created_at": data.get("created_at"),
-                    "updated_at": data.get("updated_at"),
-                    "process_meta": data.get("process_meta"),
-                }
-            )
-        except Exception:
-            logger.warning("Failed to read model file while listing: path=%s", file)
-            continue
-    if search:
-        s = search.lower()
-        items = [m for m in items if s in (m.get("name") or "").lower()]
+    return query_entries(
+        directory, _summary, search=search, sort=sort, descending=descending, limit=limit, offset=offset
+    )
+
+
+def list_models(search: str | None = None, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
     # newest first by updated_at
-    items.sort(key=lambda m: m.get("updated_at") or "", reverse=True)
+    items, _ = query_models(search=search, user_id=user_id)
     return items
@@ -1,8 +1,10 @@
 # services/node_classifier.py
 from __future__ import annotations
 import re
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
 from .lexicon_loader import get_lexicon
+from .phrase_automaton import PhraseAutomaton, tokenize
 
 # --------- Regexy na trvanie (timer) ----------
 DURATION_RE = re.compile(
@@ -19,17 +21,6 @@ def _normalize(s: str) -> str:
     return " " + re.sub(r"\s+", " ", s.strip().lower()) + " "
 
 
-def _contains_any(text: str, phrases: list[str]) -> bool:
-    if not phrases:
-        return False
-    t = _normalize(text)
-    for p in phrases:
-        pnorm = " " + p.lower().strip() + " "
-        if pnorm in t:
-            return True
-    return False
-
-
 def _parse_timer_value(raw: str) -> Dict[str, Any]:
     """
     Prevedie '48h', '2 d', '30 min' na normalizovanú štruktúru + ISO8601 (ak vieme).
@@ -53,90 +44,83 @@ def _parse_timer_value(raw: str) -> Dict[str, Any]:
     return {"value": val, "unit": unit, "iso8601": iso, "raw": raw.strip()}
 
 
-# --------- Priority 1: kontrolné tokeny ----------
-def _check_control_tokens(text: str, lex: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    t = text
-    tokens = lex.get("control_tokens", {}) or {}
-
-    # [TIMER: ...]
-    m = TOKEN_TIMER_RE.search(t)
-    if m:
-        timer_info = _parse_timer_value(m.group(1))
-        return {
-            "type": "intermediateCatchEvent",
-            "eventDefinition": "timer",
-            "meta": {"timer": timer_info, "source": "token"},
-        }
+# --------- Priority 1 + 2: kontrolné tokeny a slovník fráz ----------
+# Poradie určuje prioritu: pri viacerých zásahoch vyhráva skoršia kategória.
+_CONTROL_TOKEN_KEYS = ("XOR", "AND", "EVENT", "ERROR", "SUB", "TIMER")
+_LEXICON_KEYS = (
+    "exclusive_gateway",
+    "parallel_gateway",
+    "event_based_gateway",
+    "inclusive_gateway",
+    "manual_task",
+    "subprocess",
+    "message_event_send",
+    "message_event_receive",
+    "timer_event",
+    "error_event",
+)
+_CATEGORIES = tuple(("token", key) for key in _CONTROL_TOKEN_KEYS) + tuple(
+    ("lexicon", key) for key in _LEXICON_KEYS
+)
 
-    def has(key: str) -> bool:
-        return _contains_any(t, tokens.get(key, []))
 
-    if has("XOR"):
-        return {"type": "exclusiveGateway", "meta": {"source": "token"}}
-    if has("AND"):
-        return {"type": "parallelGateway", "meta": {"source": "token"}}
-    if has("EVENT"):
-        return {"type": "eventBasedGateway", "meta": {"source": "token"}}
-    if has("ERROR"):
-        return {
-            "type": "intermediateThrowEvent",
-            "eventDefinition": "error",
-            "meta": {"source": "token"},
-        }
-    if has("SUB"):
-        return {"type": "subProcess", "meta": {"source": "token"}}
-    # [TIMER] bez hodnoty
-    if any(tok in t for tok in tokens.get("TIMER", [])):
+def _category_result(
+    category: Tuple[str, str], text: str, tokens: Sequence[str]
+) -> Dict[str, Any]:
+    source, key = category
+    if source == "token":
+        if key == "XOR":
+            return {"type": "exclusiveGateway", "meta": {"source": "token"}}
+        if key == "AND":
+            return {"type": "parallelGateway", "meta": {"source": "token"}}
+        if key == "EVENT":
+            return {"type": "eventBasedGateway", "meta": {"source": "token"}}
+        if key == "ERROR":
+            return {
+                "type": "intermediateThrowEvent",
+                "eventDefinition": "error",
+                "meta": {"source": "token"},
+            }
+        if key == "SUB":
+            return {"type": "subProcess", "meta": {"source": "token"}}
+        # [TIMER] bez hodnoty
         return {
             "type": "intermediateCatchEvent",
             "eventDefinition": "timer",
             "meta": {"timer": {"raw": ""}, "source": "token"},
         }
-    return None
-
 
-# --------- Priority 2: slovník fráz ----------
-def _match_lexicon(text: str, lex: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    if _contains_any(text, lex.get("exclusive_gateway", [])):
+    if key == "exclusive_gateway":
         # vzor "ak ... inak ..." – bonus
-        if " ak " in _normalize(text) and " inak " in _normalize(text):
+        if "ak" in tokens and "inak" in tokens:
             return {
                 "type": "exclusiveGateway",
                 "meta": {"source": "lexicon+pattern", "pattern": "ak/inak"},
             }
         return {"type": "exclusiveGateway", "meta": {"source": "lexicon"}}
-
-    if _contains_any(text, lex.get("parallel_gateway", [])):
+    if key == "parallel_gateway":
         return {"type": "parallelGateway", "meta": {"source": "lexicon"}}
-
-    if _contains_any(text, lex.get("event_based_gateway", [])):
+    if key == "event_based_gateway":
         return {"type": "eventBasedGateway", "meta": {"source": "lexicon"}}
-
-    if _contains_any(text, lex.get("inclusive_gateway", [])):
+    if key == "inclusive_gateway":
         return {"type": "inclusiveGateway", "meta": {"source": "lexicon"}}
-
-    if _contains_any(text, lex.get("manual_task", [])):
+    if key == "manual_task":
         return {"type": "manual_task", "meta": {"source": "lexicon"}}
-
-    # subprocess – toleruj dvojbodku
-    if _contains_any(text.replace(":", " "), lex.get("subprocess", [])):
+    if key == "subprocess":
         return {"type": "subProcess", "meta": {"source": "lexicon"}}
-
-    # Events (message send/receive)
-    if _contains_any(text, lex.get("message_event_send", [])):
+    if key == "message_event_send":
         return {
             "type": "intermediateThrowEvent",
             "eventDefinition": "message",
             "meta": {"direction": "send", "source": "lexicon"},
         }
-    if _contains_any(text, lex.get("message_event_receive", [])):
+    if key == "message_event_receive":
         return {
             "type": "intermediateCatchEvent",
             "eventDefinition": "message",
             "meta": {"direction": "receive", "source": "lexicon"},
         }
-
-    if _contains_any(text, lex.get("timer_event", [])):
+    if key == "timer_event":
         m = DURATION_RE.search(text)
         meta: Dict[str, Any] = {"source": "lexicon"}
         if m:
@@ -146,18 +130,55 @@ def _match_lexicon(text: str, lex: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             "eventDefinition": "timer",
             "meta": meta,
         }
+    return {
+        "type": "intermediateThrowEvent",
+        "eventDefinition": "error",
+        "meta": {"source": "lexicon"},
+    }
+
+
+class NodeClassifier:
+    """Lexicon compiled into one phrase automaton; classifies in a single pass."""
+
+    def __init__(self, lex: Dict[str, Any]) -> None:
+        tokens = lex.get("control_tokens", {}) or {}
+        phrases: List[Tuple[str, int]] = []
+        for priority, (source, key) in enumerate(_CATEGORIES):
+            values = tokens.get(key, []) if source == "token" else lex.get(key, [])
+            phrases.extend((str(phrase), priority) for phrase in values or [])
+        self._automaton: PhraseAutomaton[int] = PhraseAutomaton(phrases)
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """
+        Vráti dict s typom uzla. Nikdy nevracia None – fallback je 'task'.
+        """
+        text = text or ""
+
+        # 1) [TIMER: ...] s hodnotou má najvyššiu prioritu
+        m = TOKEN_TIMER_RE.search(text)
+        if m:
+            return {
+                "type": "intermediateCatchEvent",
+                "eventDefinition": "timer",
+                "meta": {"timer": _parse_timer_value(m.group(1)), "source": "token"},
+            }
 
-    if _contains_any(text, lex.get("error_event", [])):
-        return {
-            "type": "intermediateThrowEvent",
-            "eventDefinition": "error",
-            "meta": {"source": "lexicon"},
-        }
+        # 2) kontrolné tokeny + slovník fráz v jednom prechode
+        tokens = tokenize(text)
+        hits = self._automaton.search_tokens(tokens)
+        if hits:
+            return _category_result(_CATEGORIES[min(hits)], text, tokens)
 
-    if _contains_any(text, lex.get("subprocess", [])):
-        return {"type": "subProcess", "meta": {"source": "lexicon"}}
+        # 3) heuristiky
+        r = _heuristics(text)
+        if r:
+            return r
 
-    return None
+        # 4) fallback
+        return {"type": "task", "meta": {"source": "fallback"}}
+
+    def classify_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        return [self.classify(text) for text in texts]
 
 
 # --------- Priority 3: heuristiky ----------
@@ -219,6 +240,12 @@ def _heuristics(text: str) -> Optional[Dict[str, Any]]:
 
 
 # --------- Verejná API funkcia ----------
+@lru_cache(maxsize=8)
+def get_classifier(lang: str = "sk") -> NodeClassifier:
+    """Classifier compiled once per lexicon language."""
+    return NodeClassifier(get_lexicon(lang))
+
+
 def determine_node_type(text: str, lang: str = "sk") -> Dict[str, Any]:
     """
     Vráti dict s typom uzla. Nikdy nevracia None – fallback je 'task'.
@@ -227,22 +254,9 @@ def determine_node_type(text: str, lang: str = "sk") -> Dict[str, Any]:
       {"type":"intermediateCatchEvent","eventDefinition":"timer","meta":{"timer":{"iso8601":"PT48H"}}}
       {"type":"task","meta":{"source":"fallback"}}
     """
-    lex = get_lexicon(lang)
-
-    # 1) kontrolné tokeny (najvyššia priorita)
-    r = _check_control_tokens(text, lex)
-    if r:
-        return r
-
-    # 2) slovník fráz
-    r = _match_lexicon(text, lex)
-    if r:
-        return r
+    return get_classifier(lang).classify(text)
 
-    # 3) heuristiky
-    r = _heuristics(text)
-    if r:
-        return r
 
-    # 4) fallback
-    return {"type": "task", "meta": {"source": "fallback"}}
+def determine_node_types(texts: Iterable[str], lang: str = "sk") -> List[Dict[str, Any]]:
+    """Batch variant of ``determine_node_type`` sharing one compiled classifier."""
+    return get_classifier(lang).classify_many(texts)
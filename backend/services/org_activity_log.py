@@ -1,73 +1,351 @@
+"""Append-only activity log of an organization.
+
+Udalosti su JSON riadky v segmentoch ``orgs/<id>/activity/segment-NNNNNN.jsonl``.
+Zapis je jeden ``O_APPEND`` riadok do posledneho segmentu; ked segment prekroci
+``ORG_ACTIVITY_SEGMENT_BYTES``, dalsia udalost zacne novy. Uzavrete segmenty
+maju vedla seba index (``.idx.json``: id udalosti a ``request_id`` vybavenych
+ziadosti -> offset), aktivny segment sa indexuje v pamati a dociatava sa len
+od posledneho offsetu. ``page_org_events`` cita segmenty odzadu po blokoch.
+
+Stary ``activity_log.json`` sa pri prvom pristupe prevedie do segmentu 0.
+"""
 from __future__ import annotations
 
 import json
 import logging
 import os
+import threading
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 from uuid import uuid4
 
 from auth.security import to_iso_z, utcnow
-from services.storage_io import atomic_write_json
+from services.file_versions import file_lock
+from services.storage_io import atomic_write_json, atomic_write_text
 
 logger = logging.getLogger(__name__)
 
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx.json"
+DEFAULT_SEGMENT_BYTES = 1024 * 1024
+RESOLUTION_TYPES = {"delete_request_approved", "delete_request_rejected"}
+_TAIL_BLOCK = 64 * 1024
+
+_states: dict[str, "_LogState"] = {}
+_states_guard = threading.Lock()
+
+
+class _LogState:
+    """Per-process index of one org log: segment number -> ``{size, ids, resolutions}``."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.segments: dict[int, dict[str, Any]] = {}
+        self.sealed: set[int] = set()
+
 
 def _models_dir() -> Path:
     return Path(os.getenv("BPMN_MODELS_DIR", "data/models"))
 
 
+def _segment_bytes() -> int:
+    try:
+        return max(1, int(os.getenv("ORG_ACTIVITY_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES)))
+    except ValueError:
+        return DEFAULT_SEGMENT_BYTES
+
+
 def _safe_org_id(org_id: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("-", "_", ".") else "_" for ch in str(org_id))
 
 
-def _activity_log_path(org_id: str) -> Path:
+def _legacy_log_path(org_id: str) -> Path:
     return _models_dir() / "orgs" / _safe_org_id(org_id) / "activity_log.json"
 
 
-def _load_events(path: Path) -> list[dict[str, Any]]:
-    if not path.exists():
-        return []
+def _activity_dir(org_id: str) -> Path:
+    return _models_dir() / "orgs" / _safe_org_id(org_id) / "activity"
+
+
+def _segment_path(directory: Path, number: int) -> Path:
+    return directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def _index_path(directory: Path, number: int) -> Path:
+    return directory / f"{SEGMENT_PREFIX}{number:06d}{INDEX_SUFFIX}"
+
+
+def _segment_numbers(directory: Path) -> list[int]:
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except Exception as exc:
-        logger.warning("Failed to read org activity log: path=%s error=%s", path, exc)
+        names = os.listdir(directory)
+    except FileNotFoundError:
         return []
+    numbers = []
+    for name in names:
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            stem = name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]
+            if stem.isdigit():
+                numbers.append(int(stem))
+    return sorted(numbers)
+
+
+def _encode_event(event: dict[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+def _decode_line(line: bytes) -> dict[str, Any] | None:
+    if not line.strip():
+        return None
+    try:
+        item = json.loads(line)
+    except ValueError as exc:
+        logger.warning("Skipping corrupt org activity event: error=%s", exc)
+        return None
+    return item if isinstance(item, dict) else None
+
+
+def _load_events(path: Path) -> list[dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
     if not isinstance(data, list):
         return []
     return [item for item in data if isinstance(item, dict)]
 
 
-def list_org_events(org_id: str, limit: int = 50) -> list[dict[str, Any]]:
+def _migrate_legacy(org_id: str, directory: Path) -> None:
+    """Move ``activity_log.json`` into segment 0 (older than anything appended since)."""
+    legacy = _legacy_log_path(org_id)
+    try:
+        events = _load_events(legacy)
+    except FileNotFoundError:
+        return
+    except Exception as exc:
+        logger.warning("Failed to read org activity log: path=%s error=%s", legacy, exc)
+        return
+    # nove udalosti idu az do segmentu >= 1, takze segment 0 ostava najstarsi
+    atomic_write_text(_segment_path(directory, 0), "".join(_encode_event(item) for item in events))
+    legacy.unlink(missing_ok=True)
+
+
+def _prepare(org_id: str) -> Path:
+    directory = _activity_dir(org_id)
+    if _legacy_log_path(org_id).exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(directory / "migrate"):
+            _migrate_legacy(org_id, directory)
+    return directory
+
+
+def _scan(path: Path, start: int) -> tuple[list[tuple[int, dict[str, Any]]], int]:
+    """Complete events from byte ``start`` on and the offset after the last complete line."""
+    with path.open("rb") as handle:
+        handle.seek(start)
+        data = handle.read()
+    end = data.rfind(b"\n") + 1  # rozpisany posledny riadok sa docita nabuduce
+    events = []
+    offset = start
+    for line in data[:end].split(b"\n")[:-1]:
+        event = _decode_line(line)
+        if event is not None:
+            events.append((offset, event))
+        offset += len(line) + 1
+    return events, start + end
+
+
+def _index_events(segment: dict[str, Any], events: list[tuple[int, dict[str, Any]]]) -> None:
+    for offset, event in events:
+        event_id = str(event.get("id") or "")
+        if event_id:
+            segment["ids"][event_id] = offset
+        metadata = event.get("metadata") if isinstance(event.get("metadata"), dict) else {}
+        request_id = metadata.get("request_id")
+        if isinstance(request_id, str) and str(event.get("event_type") or "") in RESOLUTION_TYPES:
+            segment["resolutions"][request_id] = offset
+
+
+def _load_sidecar(directory: Path, number: int) -> dict[str, Any] | None:
+    try:
+        with _index_path(directory, number).open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring org activity index: directory=%s segment=%s error=%s", directory, number, exc)
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("ids"), dict):
+        return None
+    return {"size": int(data.get("size") or 0), "ids": data["ids"], "resolutions": data.get("resolutions") or {}}
+
+
+def _refresh(directory: Path) -> _LogState:
+    """Bring the in-memory index up to date, reading only bytes appended since the last call."""
+    key = str(directory.resolve())
+    with _states_guard:
+        state = _states.setdefault(key, _LogState())
+    with state.lock:
+        numbers = _segment_numbers(directory)
+        active = max([1, *numbers])
+        if any(number not in numbers for number in state.segments):
+            state.segments.clear()  # log bol zmazany alebo nahradeny
+            state.sealed.clear()
+        for number in numbers:
+            if number in state.sealed:
+                continue
+            path = _segment_path(directory, number)
+            segment = state.segments.get(number)
+            from_sidecar = False
+            if segment is None:
+                segment = _load_sidecar(directory, number)
+                from_sidecar = segment is not None
+                segment = segment or {"size": 0, "ids": {}, "resolutions": {}}
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            if size < segment["size"]:
+                segment = {"size": 0, "ids": {}, "resolutions": {}}
+                from_sidecar = False
+            changed = size > segment["size"]
+            if changed:
+                events, segment["size"] = _scan(path, segment["size"])
+                _index_events(segment, events)
+            state.segments[number] = segment
+            if number < active:
+                if changed or not from_sidecar:
+                    try:
+                        atomic_write_json(_index_path(directory, number), segment, ensure_ascii=False)
+                    except OSError as exc:
+                        logger.warning("Failed to write org activity index: path=%s error=%s", path, exc)
+                state.sealed.add(number)
+    return state
+
+
+def _read_at(directory: Path, number: int, offset: int) -> dict[str, Any] | None:
+    try:
+        with _segment_path(directory, number).open("rb") as handle:
+            handle.seek(offset)
+            return _decode_line(handle.readline())
+    except FileNotFoundError:
+        return None
+
+
+def _lookup(org_id: str, field: str, key: str) -> dict[str, Any] | None:
+    directory = _prepare(org_id)
+    state = _refresh(directory)
+    with state.lock:
+        found = [
+            (number, segment[field][key])
+            for number, segment in state.segments.items()
+            if key in segment[field]
+        ]
+    if not found:
+        return None
+    number, offset = max(found)
+    return _read_at(directory, number, offset)
+
+
+def _iter_reverse(path: Path, end: int | None = None) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Events of one segment from ``end`` (default EOF) backwards, reading fixed-size blocks."""
+    with path.open("rb") as handle:
+        pos = handle.seek(0, os.SEEK_END) if end is None else end
+        carry = b""
+        tail = True  # carry su bajty za poslednym \n (prazdne alebo rozpisany riadok)
+        while pos > 0:
+            size = min(_TAIL_BLOCK, pos)
+            pos -= size
+            handle.seek(pos)
+            parts = (handle.read(size) + carry).split(b"\n")
+            carry = parts[0]
+            if len(parts) == 1:
+                continue
+            lines = []
+            offset = pos + len(parts[0]) + 1
+            for part in parts[1:]:
+                lines.append((offset, part))
+                offset += len(part) + 1
+            if tail:
+                lines.pop()
+                tail = False
+            for offset, line in reversed(lines):
+                event = _decode_line(line)
+                if event is not None:
+                    yield offset, event
+        if carry and not tail:
+            event = _decode_line(carry)
+            if event is not None:
+                yield 0, event
+
+
+def _parse_cursor(cursor: str) -> tuple[int, int]:
+    number, _, offset = str(cursor).partition(":")
+    if not number.isdigit() or not offset.isdigit():
+        raise ValueError(f"Invalid activity cursor '{cursor}'")
+    return int(number), int(offset)
+
+
+def _iter_events(directory: Path, cursor: str | None) -> Iterator[tuple[int, int, dict[str, Any]]]:
+    start = _parse_cursor(cursor) if cursor else None
+    for number in reversed(_segment_numbers(directory)):
+        if start is not None and number > start[0]:
+            continue
+        end = start[1] if start is not None and number == start[0] else None
+        try:
+            for offset, event in _iter_reverse(_segment_path(directory, number), end):
+                yield number, offset, event
+        except FileNotFoundError:
+            continue
+
+
+def page_org_events(
+    org_id: str, limit: int = 50, cursor: str | None = None
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Newest-first page of events and a cursor for the next (older) page, ``None`` at the end.
+
+    Raises ``ValueError`` for a malformed cursor.
+    """
     if not str(org_id or "").strip():
-        return []
+        return [], None
     safe_limit = max(1, min(int(limit or 50), 200))
-    items = _load_events(_activity_log_path(org_id))
-    return list(reversed(items))[:safe_limit]
+    rows = list(islice(_iter_events(_prepare(org_id), cursor), safe_limit + 1))
+    items = [event for _, _, event in rows[:safe_limit]]
+    if len(rows) <= safe_limit:
+        return items, None
+    number, offset, _ = rows[safe_limit - 1]
+    return items, f"{number}:{offset}"
+
+
+def list_org_events(org_id: str, limit: int = 50) -> list[dict[str, Any]]:
+    return page_org_events(org_id, limit=limit)[0]
 
 
 def get_org_event(org_id: str, event_id: str) -> dict[str, Any] | None:
     if not str(org_id or "").strip() or not str(event_id or "").strip():
         return None
-    items = _load_events(_activity_log_path(org_id))
-    for item in items:
-        if str(item.get("id") or "") == str(event_id):
-            return item
-    return None
+    return _lookup(org_id, "ids", str(event_id))
 
 
 def get_org_request_resolution(org_id: str, request_id: str) -> dict[str, Any] | None:
     if not str(org_id or "").strip() or not str(request_id or "").strip():
         return None
-    items = _load_events(_activity_log_path(org_id))
-    for item in reversed(items):
-        event_type = str(item.get("event_type") or "")
-        metadata = item.get("metadata") if isinstance(item.get("metadata"), dict) else {}
-        if metadata.get("request_id") != request_id:
-            continue
-        if event_type in {"delete_request_approved", "delete_request_rejected"}:
-            return item
-    return None
+    return _lookup(org_id, "resolutions", str(request_id))
+
+
+def _append(directory: Path, line: str) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    number = max([1, *_segment_numbers(directory)])
+    try:
+        if _segment_path(directory, number).stat().st_size >= _segment_bytes():
+            number += 1
+    except FileNotFoundError:
+        pass
+    # jeden write s O_APPEND: riadky z viacerych workerov sa neprekryvaju
+    fd = os.open(_segment_path(directory, number), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 def record_org_event(
@@ -84,9 +362,6 @@ def record_org_event(
     if not str(org_id or "").strip():
         return None
     try:
-        path = _activity_log_path(org_id)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        items = _load_events(path)
         payload = {
             "id": str(uuid4()),
             "org_id": str(org_id),
@@ -99,8 +374,7 @@ def record_org_event(
             "metadata": metadata if isinstance(metadata, dict) else {},
             "created_at": to_iso_z(utcnow()),
         }
-        items.append(payload)
-        atomic_write_json(path, items, ensure_ascii=False)
+        _append(_prepare(org_id), _encode_event(payload))
         return payload
     except Exception as exc:
         logger.warning(
@@ -7,10 +7,16 @@ from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
-from services.org_models_storage import load_org_model, save_org_model_copy
+from services.file_versions import read_version, versioned_write
+from services.org_models_storage import load_org_model, org_models_dir, save_org_model_copy
+from services.org_search_index import forget_directory, search_models
 from services.storage_io import atomic_write_json, atomic_write_text
 
 
+class ProcessRefConflict(ValueError):
+    """The process node no longer points at the model version the caller started from."""
+
+
 def _models_dir() -> Path:
     return Path(os.getenv("BPMN_MODELS_DIR", "data/models"))
 
@@ -30,6 +36,8 @@ def delete_org_storage(org_id: str) -> None:
     base_dir = _models_dir() / "orgs" / str(org_id)
     if base_dir.exists():
         shutil.rmtree(base_dir, ignore_errors=True)
+    _trees.pop(str(org_id), None)
+    forget_directory(base_dir / "models")
 
 
 def _default_root() -> dict[str, Any]:
@@ -41,14 +49,69 @@ def _default_root() -> dict[str, Any]:
     }
 
 
+def _tree_file(org_id: str) -> Path:
+    return _models_dir() / "orgs" / str(org_id) / "tree.json"
+
+
+class _CachedTree:
+    """Parsed ``tree.json`` with an id -> (node, parent) index.
+
+    ``stamp`` (inode, mtime, velkost) suboru, z ktoreho strom pochadza; zapis
+    ide cez ``os.replace``, takze zmena z ineho workera vzdy zmeni inode.
+    ``version`` je pocitadlo z ``file_versions`` (ETag stromu).
+    Vratene uzly su zdielane s cache, volajuci ich nesmu menit.
+    """
+
+    __slots__ = ("tree", "index", "stamp", "version")
+
+    def __init__(self, tree: dict[str, Any], stamp: tuple[int, int, int] | None, version: int) -> None:
+        self.tree = tree
+        self.stamp = stamp
+        self.version = version
+        self.index: dict[str, tuple[dict[str, Any], dict[str, Any] | None]] = {}
+        self.add(tree, None)
+
+    def add(self, node: dict[str, Any], parent: dict[str, Any] | None) -> None:
+        stack = [(node, parent)]
+        while stack:
+            current, owner = stack.pop()
+            if current.get("type") == "folder":
+                current.setdefault("children", [])
+            # pri duplicitnych id vyhrava prvy uzol v poradi stromu (ako povodne DFS)
+            self.index.setdefault(str(current.get("id")), (current, owner))
+            stack.extend((child, current) for child in reversed(current.get("children") or []))
+
+    def remove(self, node: dict[str, Any]) -> None:
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if self.index.get(str(current.get("id")), (None,))[0] is current:
+                del self.index[str(current.get("id"))]
+            stack.extend(current.get("children") or [])
+
+    def find(self, node_id: str) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        return self.index.get(str(node_id), (None, None))
+
+
+_trees: dict[str, _CachedTree] = {}
+
+
+def _stamp(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
 def _ensure_storage(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     if path.exists():
         return
-    atomic_write_json(path, _default_root(), ensure_ascii=False, indent=2)
+    atomic_write_json(path, _default_root(), ensure_ascii=False)
 
 
-def _read_tree(org_id: str) -> dict[str, Any]:
+def _ensure_tree_file(org_id: str) -> Path:
     path = org_tree_path(org_id)
     if not path.exists():
         legacy = _legacy_tree_path()
@@ -57,36 +120,51 @@ def _read_tree(org_id: str) -> dict[str, Any]:
             atomic_write_text(path, legacy.read_text(encoding="utf-8"), encoding="utf-8")
         else:
             _ensure_storage(path)
-    return json.loads(path.read_text(encoding="utf-8"))
+    return path
 
 
-def _write_tree(org_id: str, tree: dict[str, Any]) -> None:
-    path = org_tree_path(org_id)
-    _ensure_storage(path)
-    atomic_write_json(path, tree, ensure_ascii=False, indent=2)
+def _cached_tree(org_id: str) -> _CachedTree:
+    """Tree of the org; the file is parsed again only when its stamp or version changed."""
+    path = _tree_file(org_id)
+    # verzia pred obsahom: zapisovatel ju zvysi az po nahradeni suboru
+    version = read_version(path)
+    stamp = _stamp(path)
+    cached = _trees.get(str(org_id))
+    if cached is not None and stamp is not None and (cached.stamp, cached.version) == (stamp, version):
+        return cached
+    if stamp is None:
+        path = _ensure_tree_file(org_id)
+        stamp = _stamp(path)
+    # stamp pred citanim: ak subor medzitym niekto nahradi, dalsie volanie ho nacita znova
+    cached = _CachedTree(json.loads(path.read_text(encoding="utf-8")), stamp, version)
+    _trees[str(org_id)] = cached
+    return cached
+
+
+def _write_tree(org_id: str, cached: _CachedTree, version: int) -> None:
+    """Persist under ``versioned_write`` that yielded ``version``; the cache gets ``version + 1``."""
+    path = _tree_file(org_id)
+    try:
+        _ensure_storage(path)
+        atomic_write_json(path, cached.tree, ensure_ascii=False)
+    except Exception:
+        _trees.pop(str(org_id), None)  # pamat uz nezodpoveda disku
+        raise
+    cached.stamp = _stamp(path)
+    cached.version = version + 1
 
 
 def get_tree(org_id: str) -> dict[str, Any]:
-    return _read_tree(org_id)
+    return _cached_tree(org_id).tree
 
 
-def _find_node_and_parent(
-    current: dict[str, Any],
-    node_id: str,
-    parent: dict[str, Any] | None = None,
-) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
-    if current.get("id") == node_id:
-        return current, parent
-    for child in current.get("children", []):
-        found, found_parent = _find_node_and_parent(child, node_id, current)
-        if found:
-            return found, found_parent
-    return None, None
+def get_tree_with_version(org_id: str) -> tuple[dict[str, Any], int]:
+    cached = _cached_tree(org_id)
+    return cached.tree, cached.version
 
 
 def get_process_model_ref(org_id: str, node_id: str) -> str | None:
-    tree = _read_tree(org_id)
-    node, _ = _find_node_and_parent(tree, node_id)
+    node, _ = _cached_tree(org_id).find(node_id)
     if not node or node.get("type") != "process":
         raise ValueError("Cielova polozka nie je proces.")
     process_ref = node.get("processRef") if isinstance(node.get("processRef"), dict) else {}
@@ -95,29 +173,81 @@ def get_process_model_ref(org_id: str, node_id: str) -> str | None:
 
 
 def get_node(org_id: str, node_id: str) -> dict[str, Any] | None:
-    tree = _read_tree(org_id)
-    node, _ = _find_node_and_parent(tree, node_id)
+    node, _ = _cached_tree(org_id).find(node_id)
     return node
 
 
+def list_process_model_ids(org_id: str, node_id: str = "root") -> list[str]:
+    """Model ids referenced by process nodes in the subtree, in tree order."""
+    start, _ = _cached_tree(org_id).find(node_id)
+    if not start:
+        raise ValueError("Polozka neexistuje.")
+    model_ids: list[str] = []
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node.get("type") == "process":
+            process_ref = node.get("processRef") if isinstance(node.get("processRef"), dict) else {}
+            if process_ref.get("modelId"):
+                model_ids.append(str(process_ref["modelId"]))
+        stack.extend(reversed(node.get("children", [])))
+    return model_ids
+
+
+def search_processes(org_id: str, query: str, limit: int = 20) -> list[dict[str, Any]]:
+    """Ranked process nodes whose current model matches ``query`` (full-text)."""
+    nodes_by_model: dict[str, dict[str, Any]] = {}
+    stack = [_cached_tree(org_id).tree]
+    while stack:
+        node = stack.pop()
+        if node.get("type") == "process":
+            process_ref = node.get("processRef") if isinstance(node.get("processRef"), dict) else {}
+            if process_ref.get("modelId"):
+                nodes_by_model.setdefault(str(process_ref["modelId"]), node)
+        stack.extend(node.get("children", []))
+    # starsie verzie modelov bez uzla v strome sa preskakuju
+    return [
+        {
+            "tree_node_id": nodes_by_model[model_id].get("id"),
+            "name": nodes_by_model[model_id].get("name"),
+            "org_model_id": model_id,
+            "score": score,
+            "matches": matches,
+        }
+        for model_id, score, matches in search_models(
+            org_models_dir(org_id), query, limit=limit, include=nodes_by_model
+        )
+    ]
+
+
 def _assert_folder(node: dict[str, Any] | None, message: str) -> dict[str, Any]:
     if not node or node.get("type") != "folder":
         raise ValueError(message)
     return node
 
 
-def create_folder(org_id: str, parent_id: str, name: str) -> dict[str, Any]:
-    tree = _read_tree(org_id)
-    parent, _ = _find_node_and_parent(tree, parent_id)
-    parent = _assert_folder(parent, "Nadriadena polozka musi byt priecinok.")
-    node = {
-        "id": f"fld_{uuid4().hex[:12]}",
-        "type": "folder",
-        "name": name.strip() or "Novy priecinok",
-        "children": [],
-    }
+def _append_child(
+    org_id: str, cached: _CachedTree, version: int, parent: dict[str, Any], node: dict[str, Any]
+) -> None:
     parent.setdefault("children", []).append(node)
-    _write_tree(org_id, tree)
+    cached.add(node, parent)
+    _write_tree(org_id, cached, version)
+
+
+def create_folder(
+    org_id: str, parent_id: str, name: str, expected_version: int | None = None
+) -> dict[str, Any]:
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        parent, _ = cached.find(parent_id)
+        parent = _assert_folder(parent, "Nadriadena polozka musi byt priecinok.")
+        node = {
+            "id": f"fld_{uuid4().hex[:12]}",
+            "type": "folder",
+            "name": name.strip() or "Novy priecinok",
+            "children": [],
+        }
+        _append_child(org_id, cached, version, parent, node)
     return node
 
 
@@ -158,20 +288,22 @@ def _create_empty_process_model(name: str) -> dict[str, Any]:
     }
 
 
-def create_process(org_id: str, parent_id: str, name: str) -> dict[str, Any]:
-    tree = _read_tree(org_id)
-    parent, _ = _find_node_and_parent(tree, parent_id)
-    parent = _assert_folder(parent, "Nadriadena polozka musi byt priecinok.")
-    model = _create_empty_process_model(name.strip() or "Novy proces")
-    org_model_id = save_org_model_copy(org_id=org_id, model=model, name_override=model.get("name"))
-    node = {
-        "id": f"prc_{uuid4().hex[:12]}",
-        "type": "process",
-        "name": model.get("name") or "Novy proces",
-        "processRef": {"modelId": org_model_id},
-    }
-    parent.setdefault("children", []).append(node)
-    _write_tree(org_id, tree)
+def create_process(
+    org_id: str, parent_id: str, name: str, expected_version: int | None = None
+) -> dict[str, Any]:
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        parent, _ = cached.find(parent_id)
+        parent = _assert_folder(parent, "Nadriadena polozka musi byt priecinok.")
+        model = _create_empty_process_model(name.strip() or "Novy proces")
+        org_model_id = save_org_model_copy(org_id=org_id, model=model, name_override=model.get("name"))
+        node = {
+            "id": f"prc_{uuid4().hex[:12]}",
+            "type": "process",
+            "name": model.get("name") or "Novy proces",
+            "processRef": {"modelId": org_model_id},
+        }
+        _append_child(org_id, cached, version, parent, node)
     return node
 
 
@@ -180,87 +312,116 @@ def create_process_from_org_model(
     parent_id: str,
     name: str,
     org_model_id: str,
+    expected_version: int | None = None,
 ) -> dict[str, Any]:
-    tree = _read_tree(org_id)
-    parent, _ = _find_node_and_parent(tree, parent_id)
-    parent = _assert_folder(parent, "Nadriadena polozka musi byt priecinok.")
-    try:
-        load_org_model(org_id, org_model_id)
-    except FileNotFoundError as exc:
-        raise ValueError("Model organizacie neexistuje.") from exc
-    node = {
-        "id": f"prc_{uuid4().hex[:12]}",
-        "type": "process",
-        "name": name.strip() or "Novy proces",
-        "processRef": {"modelId": org_model_id},
-    }
-    parent.setdefault("children", []).append(node)
-    _write_tree(org_id, tree)
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        parent, _ = cached.find(parent_id)
+        parent = _assert_folder(parent, "Nadriadena polozka musi byt priecinok.")
+        try:
+            load_org_model(org_id, org_model_id, parts=())
+        except FileNotFoundError as exc:
+            raise ValueError("Model organizacie neexistuje.") from exc
+        node = {
+            "id": f"prc_{uuid4().hex[:12]}",
+            "type": "process",
+            "name": name.strip() or "Novy proces",
+            "processRef": {"modelId": org_model_id},
+        }
+        _append_child(org_id, cached, version, parent, node)
     return node
 
 
-def rename_node(org_id: str, node_id: str, name: str) -> dict[str, Any]:
-    tree = _read_tree(org_id)
-    node, _ = _find_node_and_parent(tree, node_id)
-    if not node:
-        raise ValueError("Polozka neexistuje.")
-    if node.get("id") == "root":
-        raise ValueError("Root nie je mozne premenovat.")
-    node["name"] = name.strip() or node.get("name") or "Bez nazvu"
-    _write_tree(org_id, tree)
+def rename_node(
+    org_id: str, node_id: str, name: str, expected_version: int | None = None
+) -> dict[str, Any]:
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        node, _ = cached.find(node_id)
+        if not node:
+            raise ValueError("Polozka neexistuje.")
+        if node.get("id") == "root":
+            raise ValueError("Root nie je mozne premenovat.")
+        node["name"] = name.strip() or node.get("name") or "Bez nazvu"
+        _write_tree(org_id, cached, version)
     return node
 
 
-def _is_descendant(node: dict[str, Any], possible_descendant_id: str) -> bool:
-    for child in node.get("children", []):
-        if child.get("id") == possible_descendant_id:
-            return True
-        if _is_descendant(child, possible_descendant_id):
+def _is_within(cached: _CachedTree, node: dict[str, Any], ancestor: dict[str, Any]) -> bool:
+    """Whether ``node`` is ``ancestor`` or below it; walks parents, O(depth)."""
+    current: dict[str, Any] | None = node
+    while current is not None:
+        if current is ancestor:
             return True
+        current = cached.find(str(current.get("id")))[1]
     return False
 
 
-def move_node(org_id: str, node_id: str, new_parent_id: str) -> dict[str, Any]:
+def move_node(
+    org_id: str, node_id: str, new_parent_id: str, expected_version: int | None = None
+) -> dict[str, Any]:
     if node_id == "root":
         raise ValueError("Root nie je mozne presuvat.")
-    tree = _read_tree(org_id)
-    node, parent = _find_node_and_parent(tree, node_id)
-    if not node or not parent:
-        raise ValueError("Polozka neexistuje.")
-    new_parent, _ = _find_node_and_parent(tree, new_parent_id)
-    new_parent = _assert_folder(new_parent, "Cielovy parent musi byt priecinok.")
-    if _is_descendant(node, new_parent_id):
-        raise ValueError("Priecinok nie je mozne presunut do vlastneho potomka.")
-    parent["children"] = [child for child in parent.get("children", []) if child.get("id") != node_id]
-    new_parent.setdefault("children", []).append(node)
-    _write_tree(org_id, tree)
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        node, parent = cached.find(node_id)
+        if not node or not parent:
+            raise ValueError("Polozka neexistuje.")
+        new_parent, _ = cached.find(new_parent_id)
+        new_parent = _assert_folder(new_parent, "Cielovy parent musi byt priecinok.")
+        if _is_within(cached, new_parent, node):
+            raise ValueError("Priecinok nie je mozne presunut do vlastneho potomka.")
+        parent["children"] = [child for child in parent.get("children", []) if child.get("id") != node_id]
+        new_parent.setdefault("children", []).append(node)
+        cached.index[str(node_id)] = (node, new_parent)
+        _write_tree(org_id, cached, version)
     return node
 
 
-def delete_node(org_id: str, node_id: str) -> None:
+def delete_node(org_id: str, node_id: str, expected_version: int | None = None) -> None:
     if node_id == "root":
         raise ValueError("Root nie je mozne zmazat.")
-    tree = _read_tree(org_id)
-    node, parent = _find_node_and_parent(tree, node_id)
-    if not node or not parent:
-        raise ValueError("Polozka neexistuje.")
-    if node.get("type") == "folder" and node.get("children"):
-        raise ValueError("Priecinok musi byt prazdny.")
-    parent["children"] = [child for child in parent.get("children", []) if child.get("id") != node_id]
-    _write_tree(org_id, tree)
-
-
-def set_process_model_ref(org_id: str, node_id: str, model_id: str) -> dict[str, Any]:
-    tree = _read_tree(org_id)
-    node, _ = _find_node_and_parent(tree, node_id)
-    if not node:
-        raise ValueError("Polozka neexistuje.")
-    if node.get("type") != "process":
-        raise ValueError("Cielova polozka nie je proces.")
-    try:
-        load_org_model(org_id, model_id)
-    except FileNotFoundError as exc:
-        raise ValueError("Model organizacie neexistuje.") from exc
-    node["processRef"] = {"modelId": model_id}
-    _write_tree(org_id, tree)
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        node, parent = cached.find(node_id)
+        if not node or not parent:
+            raise ValueError("Polozka neexistuje.")
+        if node.get("type") == "folder" and node.get("children"):
+            raise ValueError("Priecinok musi byt prazdny.")
+        parent["children"] = [child for child in parent.get("children", []) if child.get("id") != node_id]
+        cached.remove(node)
+        _write_tree(org_id, cached, version)
+
+
+def set_process_model_ref(
+    org_id: str,
+    node_id: str,
+    model_id: str,
+    expected_version: int | None = None,
+    expected_model_id: str | None = None,
+) -> dict[str, Any]:
+    """Point a process node at ``model_id``.
+
+    ``expected_model_id`` je compare-and-swap na uzle: ak proces medzicasom
+    ukazuje na inu verziu, ``ProcessRefConflict`` (ostatne zmeny stromu nevadia).
+    """
+    with versioned_write(_tree_file(org_id), expected_version) as version:
+        cached = _cached_tree(org_id)
+        node, _ = cached.find(node_id)
+        if not node:
+            raise ValueError("Polozka neexistuje.")
+        if node.get("type") != "process":
+            raise ValueError("Cielova polozka nie je proces.")
+        if expected_model_id is not None:
+            process_ref = node.get("processRef") if isinstance(node.get("processRef"), dict) else {}
+            if str(process_ref.get("modelId") or "") != str(expected_model_id):
+                raise ProcessRefConflict(
+                    "Proces bol medzicasom zmeneny inym pouzivatelom. Obnov najnovsiu verziu a skus ulozit znova."
+                )
+        try:
+            load_org_model(org_id, model_id, parts=())
+        except FileNotFoundError as exc:
+            raise ValueError("Model organizacie neexistuje.") from exc
+        node["processRef"] = {"modelId": model_id}
+        _write_tree(org_id, cached, version)
     return node
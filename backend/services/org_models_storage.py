@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-import json
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
-from services.storage_io import atomic_write_json
+from services.file_versions import read_version, versioned_write
+from services.model_index import list_entries, upsert_entry
+from services.model_parts import blob_digests, read_model, write_model
+from services.org_search_index import index_model
 logger = logging.getLogger(__name__)
 
 
@@ -26,10 +28,30 @@ def org_model_path(org_id: str, model_id: str) -> Path:
     return org_models_dir(org_id) / f"{model_id}.json"
 
 
+def _summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": data.get("id"),
+        "name": data.get("name"),
+        "created_at": data.get("created_at"),
+        "updated_at": data.get("updated_at"),
+        "tree_node_id": data.get("tree_node_id"),
+        "base_model_id": data.get("base_model_id"),
+        "process_meta": data.get("process_meta") if isinstance(data.get("process_meta"), dict) else {},
+    }
+
+
 def _now_iso() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
 
+def _delta_bases(org_id: str, model: Dict[str, Any]) -> Dict[str, str]:
+    """Blob digests of the base version, so a new version is stored as a delta against it."""
+    base_id = str(model.get("base_model_id") or "").strip()
+    if not base_id:
+        return {}
+    return blob_digests(org_model_path(org_id, base_id))
+
+
 def save_org_model_copy(org_id: str, model: Dict[str, Any], name_override: str | None = None) -> str:
     new_id = str(uuid4())
     now = _now_iso()
@@ -40,57 +62,87 @@ def save_org_model_copy(org_id: str, model: Dict[str, Any], name_override: str |
     stored["created_at"] = now
     stored["updated_at"] = now
     path = org_model_path(org_id, new_id)
-    atomic_write_json(path, stored, ensure_ascii=False)
+    write_model(path, stored, bases=_delta_bases(org_id, stored))
+    upsert_entry(path.parent, new_id, stored, _summary)
+    index_model(path.parent, new_id, stored)
     return new_id
 
 
+def list_org_model_ids(org_id: str) -> List[str]:
+    return sorted(file.stem for file in org_models_dir(org_id).glob("*.json"))
+
+
 def list_org_models(org_id: str) -> List[Dict[str, Any]]:
+    items = list_entries(org_models_dir(org_id), _summary)
+    items.sort(key=lambda m: m.get("updated_at") or "", reverse=True)
+    return items
+
+
+def list_org_model_history(org_id: str, org_model_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """Versions from ``org_model_id`` back along ``base_model_id`` (newest first).
+
+    Cita len metadata verzii v retazci, nie cely adresar modelov.
+    """
     items: List[Dict[str, Any]] = []
-    directory = org_models_dir(org_id)
-    for file in directory.glob("*.json"):
+    seen = set()
+    current: Optional[str] = org_model_id
+    while current and current not in seen and len(items) < limit:
+        seen.add(current)
+        path = org_model_path(org_id, current)
         try:
-            with file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            items.append(
-                {
-                    "id": data.get("id"),
-                    "name": data.get("name"),
-                    "created_at": data.get("created_at"),
-                    "updated_at": data.get("updated_at"),
-                    "tree_node_id": data.get("tree_node_id"),
-                    "base_model_id": data.get("base_model_id"),
-                    "process_meta": data.get("process_meta") if isinstance(data.get("process_meta"), dict) else {},
-                }
-            )
-        except Exception:
-            logger.warning("Failed to read org model file while listing: path=%s", file)
-            continue
-    items.sort(key=lambda m: m.get("updated_at") or "", reverse=True)
+            data = read_model(path, parts=())
+        except FileNotFoundError:
+            if not items:
+                raise
+            break
+        items.append(_summary(data))
+        current = str(data.get("base_model_id") or "").strip() or None
     return items
 
 
-def load_org_model(org_id: str, org_model_id: str) -> Dict[str, Any]:
+def load_org_model(
+    org_id: str, org_model_id: str, parts: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """Load an org model; ``parts`` picks which of ``engine_json``/``diagram_xml`` to read (``None`` = all)."""
     path = org_model_path(org_id, org_model_id)
     if not path.exists():
         raise FileNotFoundError(org_model_id)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_model(path, parts=parts)
+
+
+def org_model_version(org_id: str, org_model_id: str) -> int:
+    """Version (ETag) of an org model; read it before the model so it never runs ahead of the content."""
+    return read_version(org_model_path(org_id, org_model_id))
+
 
+def save_org_model(
+    org_id: str, org_model_id: str, model: Dict[str, Any], expected_version: Optional[int] = None
+) -> Tuple[Dict[str, Any], int]:
+    """Overwrite an org model in place; returns the stored model and its new version (ETag).
 
-def save_org_model(org_id: str, org_model_id: str, model: Dict[str, Any]) -> Dict[str, Any]:
+    ``expected_version`` makes it a compare-and-swap (``VersionConflict``).
+    Indexy sa aktualizuju este pod zamkom, inak by subezny zapis mohol v
+    ``.models-index`` nechat starsi suhrn s mtime novsieho suboru.
+    """
     path = org_model_path(org_id, org_model_id)
-    created_at = model.get("created_at")
-    if path.exists():
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                existing = json.load(f)
-            created_at = existing.get("created_at", created_at)
-        except Exception as exc:
-            logger.warning("Failed to read existing org model before save: path=%s error=%s", path, exc)
-    now = _now_iso()
-    stored = dict(model)
-    stored["id"] = org_model_id
-    stored["created_at"] = created_at or now
-    stored["updated_at"] = now
-    atomic_write_json(path, stored, ensure_ascii=False)
-    return stored
+    with versioned_write(path, expected_version) as version:
+        created_at = model.get("created_at")
+        base_model_id = model.get("base_model_id")
+        if path.exists():
+            try:
+                existing = read_model(path, parts=())
+                created_at = existing.get("created_at", created_at)
+                base_model_id = base_model_id or existing.get("base_model_id")
+            except Exception as exc:
+                logger.warning("Failed to read existing org model before save: path=%s error=%s", path, exc)
+        now = _now_iso()
+        stored = dict(model)
+        stored["id"] = org_model_id
+        stored["created_at"] = created_at or now
+        stored["updated_at"] = now
+        if base_model_id:
+            stored["base_model_id"] = base_model_id
+        write_model(path, stored, bases=_delta_bases(org_id, stored))
+        upsert_entry(path.parent, org_model_id, stored, _summary)
+        index_model(path.parent, org_model_id, stored)
+    return stored, version + 1
@@ -0,0 +1,352 @@
+# services/org_search_index.py
+"""Inverted index over org models: model, lane, node names and flow conditions.
+
+Texty sa skladaju rovnako ako lexikon (``fold_text``: lowercase, bez
+diakritiky), takze "Fakturácia" najde aj "fakturacia". Index sa drzi v pamati
+per adresar modelov organizacie a aktualizuje sa inkrementalne pri ulozeni
+modelu; subory zmenene alebo zmazane mimo storage vrstvy sa dorovnaju podla
+mtime ako v ``model_index``.
+
+Verzia, na ktorej stoji novsia verzia (``base_model_id``), sa z indexu vyradi
+(``superseded``, pamata sa len jej mtime). Ak na nu strom stale ukazuje,
+``search_models`` ju pri hladani znova zaindexuje.
+
+Perzistencia: snapshot ``.search-index`` a za nim zmeny po modeloch v
+``.search-index.log`` (riadok JSON na ulozenie). Log sa zlucuje do snapshotu,
+ked ma viac zaznamov ako index dokumentov. Zaznam strateny pri subeznom
+zluceni z ineho workera len sposobi opatovne precitanie suboru podla mtime.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from services.lexicon_loader import fold_text
+from services.model_index import _model_files, _mtime_ns, _stable_mtime_ns
+from services.model_parts import read_model
+from services.storage_io import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = ".search-index"
+LOG_NAME = ".search-index.log"
+INDEX_VERSION = 2
+# Log sa zlucuje do snapshotu az nad tento pocet zaznamov (a nad pocet dokumentov).
+COMPACT_MIN_ENTRIES = 256
+FIELD_WEIGHTS = {"model": 3.0, "lane": 2.0, "node": 2.0, "flow": 1.0}
+# Predpona slova ma mensiu vahu ako cele slovo.
+PREFIX_FACTOR = 0.5
+MIN_PREFIX = 3
+MAX_MATCHES_PER_HIT = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+Text = Tuple[str, str]
+
+
+def terms(text: str) -> List[str]:
+    return _WORD_RE.findall(fold_text(text or ""))
+
+
+def document_texts(model: Dict[str, Any]) -> List[Text]:
+    """Searchable ``(field, text)`` pairs of one org model."""
+    texts: List[Text] = []
+    if model.get("name"):
+        texts.append(("model", str(model["name"])))
+    engine = model.get("engine_json") if isinstance(model.get("engine_json"), dict) else {}
+    for field, key, attrs in (
+        ("lane", "lanes", ("name",)),
+        ("node", "nodes", ("name",)),
+        ("flow", "flows", ("name", "condition")),
+    ):
+        for item in engine.get(key) or []:
+            if not isinstance(item, dict):
+                continue
+            for attr in attrs:
+                value = item.get(attr)
+                if isinstance(value, str) and value.strip():
+                    texts.append((field, value.strip()))
+    return texts
+
+
+class OrgSearchIndex:
+    """Postings ``term -> {model_id: weight}`` for one org models directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        # model_id -> mtime_ns nahradenych verzii (nie su v postings)
+        self.superseded: Dict[str, Optional[int]] = {}
+        self._vocabulary: Optional[List[str]] = None
+        self.dir_mtime_ns: Optional[int] = None
+        self.log_entries = 0
+        self.lock = threading.Lock()
+
+    def put(self, model_id: str, texts: List[Text], mtime_ns: Optional[int]) -> None:
+        self.remove(model_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for field, text in texts:
+            for term in terms(text):
+                weights[term] += FIELD_WEIGHTS.get(field, 1.0)
+        for term, weight in weights.items():
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings[term][model_id] = weight
+        self.docs[model_id] = {"mtime_ns": mtime_ns, "texts": texts, "terms": list(weights)}
+
+    def supersede(self, model_id: str, mtime_ns: Optional[int]) -> None:
+        self.remove(model_id)
+        self.superseded[model_id] = mtime_ns
+
+    def remove(self, model_id: str) -> None:
+        self.superseded.pop(model_id, None)
+        doc = self.docs.pop(model_id, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            bucket = self.postings.get(term)
+            if bucket is None:
+                continue
+            bucket.pop(model_id, None)
+            if not bucket:
+                del self.postings[term]
+                self._vocabulary = None
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Index terms a query token matches, with their score factor."""
+        if len(token) < MIN_PREFIX:
+            return [(token, 1.0)] if token in self.postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        matched: List[Tuple[str, float]] = []
+        pos = bisect.bisect_left(vocabulary, token)
+        while pos < len(vocabulary) and vocabulary[pos].startswith(token):
+            term = vocabulary[pos]
+            matched.append((term, 1.0 if term == token else PREFIX_FACTOR))
+            pos += 1
+        return matched
+
+    def search(self, query: str) -> List[Tuple[str, float]]:
+        """``(model_id, score)`` of documents matching every query token, best first."""
+        scores: Optional[Dict[str, float]] = None
+        for token in dict.fromkeys(terms(query)):
+            token_scores: Dict[str, float] = defaultdict(float)
+            for term, factor in self._expand(token):
+                for model_id, weight in self.postings[term].items():
+                    token_scores[model_id] += weight * factor
+            if scores is None:
+                scores = dict(token_scores)
+            else:
+                scores = {
+                    model_id: score + token_scores[model_id]
+                    for model_id, score in scores.items()
+                    if model_id in token_scores
+                }
+            if not scores:
+                return []
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def matches(self, model_id: str, query: str) -> List[Dict[str, str]]:
+        """Texts of a hit that contain a query token (for highlighting)."""
+        tokens = set(terms(query))
+        found: List[Dict[str, str]] = []
+        for field, text in self.docs.get(model_id, {}).get("texts", []):
+            words = terms(text)
+            if any(word.startswith(token) for token in tokens for word in words):
+                found.append({"field": field, "text": text})
+                if len(found) >= MAX_MATCHES_PER_HIT:
+                    break
+        return found
+
+
+_indexes: Dict[str, OrgSearchIndex] = {}
+_indexes_guard = threading.Lock()
+
+
+def _index_for(directory: Path) -> OrgSearchIndex:
+    key = str(directory.resolve())
+    with _indexes_guard:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = OrgSearchIndex(directory)
+            _restore(index)
+        return index
+
+
+def _apply_entry(index: OrgSearchIndex, entry: Dict[str, Any]) -> None:
+    model_id = str(entry.get("id") or "")
+    if not model_id:
+        return
+    op = entry.get("op")
+    if op == "put":
+        texts = [(str(field), str(text)) for field, text in entry.get("texts") or []]
+        index.put(model_id, texts, entry.get("mtime_ns"))
+    elif op == "supersede":
+        index.supersede(model_id, entry.get("mtime_ns"))
+    elif op == "remove":
+        index.remove(model_id)
+
+
+def _restore(index: OrgSearchIndex) -> None:
+    path = index.directory / INDEX_NAME
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as exc:
+            logger.warning("Corrupt search index, rebuilding: path=%s error=%s", path, exc)
+            data = None
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+            for model_id, doc in (data.get("docs") or {}).items():
+                if isinstance(doc, dict):
+                    _apply_entry(index, {**doc, "op": "put", "id": model_id})
+            for model_id, mtime_ns in (data.get("superseded") or {}).items():
+                index.supersede(model_id, mtime_ns)
+    try:
+        with (index.directory / LOG_NAME).open("r", encoding="utf-8") as handle:
+            lines = handle.readlines()
+    except FileNotFoundError:
+        return
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue  # neuplny riadok z preruseneho zapisu
+        if isinstance(entry, dict):
+            _apply_entry(index, entry)
+            index.log_entries += 1
+
+
+def _compact(index: OrgSearchIndex) -> None:
+    docs = {
+        model_id: {"mtime_ns": doc["mtime_ns"], "texts": doc["texts"]}
+        for model_id, doc in index.docs.items()
+    }
+    atomic_write_json(
+        index.directory / INDEX_NAME,
+        {"version": INDEX_VERSION, "docs": docs, "superseded": index.superseded},
+        ensure_ascii=False,
+    )
+    with (index.directory / LOG_NAME).open("w", encoding="utf-8"):
+        pass
+    index.log_entries = 0
+
+
+def _persist(index: OrgSearchIndex, entries: List[Dict[str, Any]]) -> None:
+    """Append ``entries`` to the log; fold the log into the snapshot once it outgrows the index."""
+    if not entries:
+        return
+    payload = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    with (index.directory / LOG_NAME).open("a", encoding="utf-8") as handle:
+        handle.write(payload)
+    index.log_entries += len(entries)
+    if index.log_entries > max(COMPACT_MIN_ENTRIES, len(index.docs) + len(index.superseded)):
+        _compact(index)
+
+
+def _put_entry(index: OrgSearchIndex, model_id: str, model: Dict[str, Any], mtime_ns: Optional[int]) -> Dict[str, Any]:
+    texts = document_texts(model)
+    index.put(model_id, texts, mtime_ns)
+    return {"op": "put", "id": model_id, "mtime_ns": mtime_ns, "texts": texts}
+
+
+def _supersede_entry(index: OrgSearchIndex, model_id: str, mtime_ns: Optional[int]) -> Dict[str, Any]:
+    index.supersede(model_id, mtime_ns)
+    return {"op": "supersede", "id": model_id, "mtime_ns": mtime_ns}
+
+
+def _reconcile(index: OrgSearchIndex) -> None:
+    """Catch up with files written or deleted outside this process."""
+    current = _mtime_ns(index.directory)
+    if current is not None and current == index.dir_mtime_ns:
+        return
+    files = _model_files(index.directory)
+    entries: List[Dict[str, Any]] = []
+    for model_id in [model_id for model_id in [*index.docs, *index.superseded] if model_id not in files]:
+        index.remove(model_id)
+        entries.append({"op": "remove", "id": model_id})
+    bases: Dict[str, str] = {}
+    for model_id, entry in files.items():
+        try:
+            mtime_ns = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+        doc = index.docs.get(model_id)
+        if doc is not None and doc["mtime_ns"] == mtime_ns:
+            continue
+        if model_id in index.superseded and index.superseded[model_id] == mtime_ns:
+            continue
+        try:
+            model = read_model(Path(entry.path), parts=("engine_json",))
+        except Exception:
+            logger.warning("Failed to read model file while indexing: path=%s", entry.path)
+            continue
+        entries.append(_put_entry(index, model_id, model, mtime_ns))
+        base_id = str(model.get("base_model_id") or "")
+        if base_id in files:
+            bases[base_id] = model_id
+    for base_id in bases:
+        if base_id in index.docs:
+            entries.append(_supersede_entry(index, base_id, index.docs[base_id]["mtime_ns"]))
+    _persist(index, entries)
+    index.dir_mtime_ns = _stable_mtime_ns(index.directory)
+
+
+def index_model(directory: Path, model_id: str, model: Dict[str, Any]) -> None:
+    """Update the index for a just-saved model file; its base version drops out."""
+    index = _index_for(directory)
+    with index.lock:
+        entries = [_put_entry(index, model_id, model, _mtime_ns(directory / f"{model_id}.json"))]
+        base_id = str(model.get("base_model_id") or "")
+        if base_id and base_id != model_id and base_id not in index.superseded:
+            entries.append(_supersede_entry(index, base_id, _mtime_ns(directory / f"{base_id}.json")))
+        _persist(index, entries)
+        index.dir_mtime_ns = None  # vlastny zapis zmenil mtime adresara
+
+
+def _revive(index: OrgSearchIndex, model_ids: List[str]) -> None:
+    """Index superseded versions the caller still needs (e.g. the tree points at them)."""
+    entries: List[Dict[str, Any]] = []
+    for model_id in model_ids:
+        path = index.directory / f"{model_id}.json"
+        try:
+            model = read_model(path, parts=("engine_json",))
+        except Exception:
+            continue
+        entries.append(_put_entry(index, model_id, model, _mtime_ns(path)))
+    _persist(index, entries)
+
+
+def forget_directory(directory: Path) -> None:
+    with _indexes_guard:
+        _indexes.pop(str(directory.resolve()), None)
+
+
+def search_models(
+    directory: Path,
+    query: str,
+    *,
+    limit: Optional[int] = None,
+    include: Optional[Collection[str]] = None,
+) -> List[Tuple[str, float, List[Dict[str, str]]]]:
+    """Ranked ``(model_id, score, matching texts)``; ``include`` limits the candidate ids."""
+    index = _index_for(directory)
+    with index.lock:
+        _reconcile(index)
+        if include is not None:
+            _revive(index, [model_id for model_id in include if model_id in index.superseded])
+        ranked = [
+            (model_id, score)
+            for model_id, score in index.search(query)
+            if include is None or model_id in include
+        ]
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(model_id, round(score, 3), index.matches(model_id, query)) for model_id, score in ranked]
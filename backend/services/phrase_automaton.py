@@ -0,0 +1,94 @@
+# services/phrase_automaton.py
+"""Word-level Aho-Corasick automaton for multi-phrase matching.
+
+Frazy aj text sa tokenizuju rovnako (``tokenize``): lowercase, bez diakritiky,
+slova a interpunkcia ako samostatne tokeny. Automat pracuje nad tokenmi, takze
+kazdy zasah je automaticky na hranici slov a jeden prechod textom najde vsetky
+frazy naraz.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Generic, Hashable, Iterable, Iterator, List, Sequence, Set, Tuple, TypeVar
+
+from services.lexicon_loader import fold_text
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+P = TypeVar("P", bound=Hashable)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold_text(text or ""))
+
+
+class PhraseAutomaton(Generic[P]):
+    """Match many token phrases in one pass; each phrase carries a payload."""
+
+    def __init__(self, phrases: Iterable[Tuple[str, P]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[P]] = [set()]
+        for phrase, payload in phrases:
+            tokens = tokenize(phrase)
+            if tokens:
+                self._insert(tokens, payload)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _insert(self, tokens: Sequence[str], payload: P) -> None:
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][token] = nxt
+            state = nxt
+        self._out[state].add(payload)
+
+    def _link(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Merge outputs so search never has to walk the fail chain.
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def search_tokens(self, tokens: Sequence[str]) -> Set[P]:
+        hits: Set[P] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                hits |= out[state]
+        return hits
+
+    def iter_matches(self, tokens: Sequence[str]) -> Iterator[Tuple[int, Set[P]]]:
+        """Yield ``(token_index, payloads)`` for every position where a phrase ends."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for idx, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                yield idx, out[state]
+
+    def search(self, text: str) -> Set[P]:
+        return self.search_tokens(tokenize(text))
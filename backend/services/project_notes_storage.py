@@ -2,8 +2,9 @@ import json
 import logging
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
+from services.file_versions import read_version, versioned_write
 from services.storage_io import atomic_write_json
 
 _default_path = Path("data/project_notes.json")
@@ -65,17 +66,33 @@ def load_project_notes(org_id: str) -> List[dict]:
     return _load_notes_from_path(_org_notes_path(org_id))
 
 
-def save_project_notes(org_id: str, notes: List[dict]) -> List[dict]:
+def load_project_notes_with_version(org_id: str) -> Tuple[List[dict], int]:
+    """Notes and their version (ETag); the version is read first so it never runs ahead of the content."""
     if not str(org_id or "").strip():
-        return []
+        return [], 0
+    file_path = _org_notes_path(org_id)
+    version = read_version(file_path)
+    return _load_notes_from_path(file_path), version
+
+
+def save_project_notes(
+    org_id: str, notes: List[dict], expected_version: Optional[int] = None
+) -> Tuple[List[dict], Optional[int]]:
+    """Replace the org notes; returns them with the new version (ETag), ``None`` without an org.
+
+    ``expected_version`` makes it a compare-and-swap (``VersionConflict``).
+    """
+    if not str(org_id or "").strip():
+        return [], None
     file_path = _org_notes_path(org_id)
     _ensure_dir(file_path)
     sanitized: List[dict] = []
     for item in notes:
         if isinstance(item, dict):
             sanitized.append(item)
-    atomic_write_json(file_path, sanitized, ensure_ascii=False)
-    return sanitized
+    with versioned_write(file_path, expected_version) as version:
+        atomic_write_json(file_path, sanitized, ensure_ascii=False)
+    return sanitized, version + 1
 
 
 def delete_project_notes(org_id: str) -> None:
@@ -0,0 +1,52 @@
+# services/stage_timing.py
+"""Lightweight per-stage timing for request pipelines.
+
+Kazdy stage sa zmeria cez ``with timer.stage("draft"):``. Vysledky sa daju
+poslat klientovi (``Server-Timing`` header, ``meta.timings``) a zaroven sa
+agreguju do in-process histogramov (``STAGE_HISTOGRAMS``) pod klucom
+``<pipeline>.<stage>``.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from services.latency_stats import HistogramRegistry
+
+STAGE_HISTOGRAMS = HistogramRegistry()
+
+
+class StageTimer:
+    def __init__(self, pipeline: str, registry: HistogramRegistry = STAGE_HISTOGRAMS) -> None:
+        self.pipeline = pipeline
+        self._registry = registry
+        self._started = time.perf_counter()
+        self._stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self._stages.append((name, duration_ms))
+            self._registry.observe(f"{self.pipeline}.{name}", duration_ms)
+
+    def finish(self) -> Dict[str, object]:
+        """Record the pipeline total and return the timings for ``meta``."""
+        total_ms = (time.perf_counter() - self._started) * 1000
+        self._registry.observe(f"{self.pipeline}.total", total_ms)
+        self._stages.append(("total", total_ms))
+        return self.as_dict()
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: round(duration_ms, 3) for name, duration_ms in self._stages}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={duration_ms:.3f}" for name, duration_ms in self._stages)
+
+
+def stage_histograms() -> Dict[str, Dict[str, object]]:
+    return STAGE_HISTOGRAMS.snapshot()
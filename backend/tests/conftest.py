@@ -0,0 +1,12 @@
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# Moduly ako main (app = create_app()) a services.model_storage citaju cesty pri
+# importe; bez tohto by testy zapisovali auth.db a bloby do backend/data.
+_TMP_DATA = Path(tempfile.mkdtemp(prefix="bpmn-tests-"))
+atexit.register(shutil.rmtree, _TMP_DATA, ignore_errors=True)
+os.environ.setdefault("AUTH_DB_PATH", str(_TMP_DATA / "auth.db"))
+os.environ.setdefault("BPMN_MODELS_DIR", str(_TMP_DATA / "models"))
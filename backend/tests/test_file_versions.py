@@ -0,0 +1,51 @@
+import json
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from services import file_versions, project_notes_storage
+from services.file_versions import VersionConflict, parse_if_match, read_version, versioned_write
+
+
+def _increment(path: str, rounds: int) -> None:
+    target = Path(path)
+    for _ in range(rounds):
+        with versioned_write(target):
+            value = json.loads(target.read_text(encoding="utf-8")) if target.exists() else 0
+            target.write_text(json.dumps(value + 1), encoding="utf-8")
+
+
+@pytest.mark.skipif(file_versions.fcntl is None, reason="cross-process locking needs fcntl")
+def test_versioned_write_serializes_workers(tmp_path):
+    path = tmp_path / "counter.json"
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_increment, args=(str(path), 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+    assert json.loads(path.read_text(encoding="utf-8")) == 100
+    assert read_version(path) == 100
+
+
+def test_project_notes_compare_and_swap(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_PROJECT_NOTES_DIR", str(tmp_path / "notes"))
+    assert project_notes_storage.load_project_notes_with_version("org-1") == ([], 0)
+    project_notes_storage.save_project_notes("org-1", [{"text": "a"}], expected_version=0)
+    notes, version = project_notes_storage.load_project_notes_with_version("org-1")
+    assert (notes, version) == ([{"text": "a"}], 1)
+
+    with pytest.raises(VersionConflict) as conflict:
+        project_notes_storage.save_project_notes("org-1", [{"text": "stale"}], expected_version=0)
+    assert conflict.value.current == 1
+    assert project_notes_storage.load_project_notes("org-1") == [{"text": "a"}]
+    # bez If-Match bezpodmienecne, nova verzia sa vrati aj tak (ETag)
+    assert project_notes_storage.save_project_notes("org-1", [{"text": "b"}]) == ([{"text": "b"}], 2)
+    assert project_notes_storage.load_project_notes_with_version("org-1") == ([{"text": "b"}], 2)
+
+    assert parse_if_match('W/"7"') == 7
+    assert parse_if_match("*") is None
+    with pytest.raises(ValueError):
+        parse_if_match('"abc"')
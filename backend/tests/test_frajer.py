@@ -143,3 +143,37 @@ def test_preview_json_returns_after_tidy_and_meta():
     assert data.get("meta", {}).get("locale") == "sk"
     kb_meta = data.get("meta", {}).get("kb") or {}
     assert kb_meta.get("variant_requested") == "main"
+
+
+def test_long_draft_keeps_lanes_and_flow_lanes_consistent():
+    sentences = []
+    for idx in range(400):
+        lane = "Sales" if idx % 2 == 0 else "Backoffice"
+        sentences.append(f"{lane}: krok {idx}.")
+    ej = draft_engine_json_from_text(" ".join(sentences))
+
+    tasks = _by_type(ej, "task")
+    assert len(tasks) == 400
+    assert {lane["id"] for lane in ej["lanes"]} == {n["laneId"] for n in ej["nodes"]}
+
+    lane_by_node = {n["id"]: n["laneId"] for n in ej["nodes"]}
+    for flow in ej["flows"]:
+        assert flow["laneId"] == lane_by_node[flow["source"]]
+    assert ej["nodes"][0]["laneId"] == tasks[0]["laneId"]
+    assert ej["nodes"][-1]["laneId"] == tasks[-1]["laneId"]
+
+
+def test_preview_reports_stage_timings():
+    resp = client.post(
+        "/frajer/preview-json",
+        json={"text": "Sales: prijme dopyt. Backoffice: vystav faktúru.", "locale": "sk"},
+    )
+    assert resp.status_code == 200
+    timings = resp.json()["meta"]["timings"]
+    assert list(timings) == ["draft", "names", "normalize", "postprocess", "bpmn", "total"]
+    header = resp.headers["Server-Timing"]
+    assert re.match(r"^draft;dur=[\d.]+, names;dur=", header)
+    assert "total;dur=" in header
+
+    stats = client.get("/frajer/debug-timings").json()["stages"]
+    assert stats["frajer.preview.bpmn"]["count"] >= 1
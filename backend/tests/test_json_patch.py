@@ -0,0 +1,79 @@
+import copy
+
+import pytest
+
+from mentor.json_patch import apply_json_patch, apply_json_patch_with_stats, compile_patch
+
+
+def _doc():
+    return {
+        "name": "Proces",
+        "nodes": [{"id": f"n{i}", "name": f"Uloha {i}", "meta": {"x": i}} for i in range(5)],
+        "flows": [{"id": "f1", "source": "n0", "target": "n1"}],
+        "lanes": [{"id": "l1", "name": "Lane"}],
+    }
+
+
+def test_patch_shares_untouched_structure_and_keeps_original():
+    doc = _doc()
+    before = copy.deepcopy(doc)
+    patched = apply_json_patch(
+        doc,
+        [
+            {"op": "replace", "path": "/nodes/2/name", "value": "Nova"},
+            {"op": "add", "path": "/flows/-", "value": {"id": "f2", "source": "n1", "target": "n2"}},
+        ],
+    )
+    assert doc == before
+    assert patched["nodes"][2]["name"] == "Nova"
+    assert patched["nodes"][2] is not doc["nodes"][2]
+    assert patched["nodes"][2]["meta"] is doc["nodes"][2]["meta"]
+    assert all(patched["nodes"][i] is doc["nodes"][i] for i in (0, 1, 3, 4))
+    assert patched["lanes"] is doc["lanes"]
+    assert len(patched["flows"]) == 2 and len(doc["flows"]) == 1
+
+
+def test_move_copy_and_rfc_semantics():
+    doc = _doc()
+    patched = apply_json_patch(
+        doc,
+        [
+            {"op": "move", "from": "/nodes/0", "path": "/nodes/-"},
+            {"op": "copy", "from": "/lanes/0", "path": "/lanes/-"},
+            {"op": "replace", "path": "/lanes/1/name", "value": "Kopia"},
+            {"op": "remove", "path": "/nodes/4/meta/x"},
+        ],
+    )
+    assert [node["id"] for node in patched["nodes"]] == ["n1", "n2", "n3", "n4", "n0"]
+    assert patched["nodes"][4]["meta"] == {}
+    assert doc["nodes"][0]["meta"] == {"x": 0}
+    assert [lane["name"] for lane in patched["lanes"]] == ["Lane", "Kopia"]
+    assert doc["lanes"] == [{"id": "l1", "name": "Lane"}]
+
+
+def test_failed_test_op_rolls_back_and_pointers_are_validated_upfront():
+    doc = _doc()
+    before = copy.deepcopy(doc)
+    with pytest.raises(ValueError, match="test operation failed"):
+        apply_json_patch(
+            doc,
+            [
+                {"op": "remove", "path": "/nodes/0"},
+                {"op": "test", "path": "/nodes/0/id", "value": "n0"},
+            ],
+        )
+    assert doc == before
+
+    with pytest.raises(ValueError, match="Invalid JSON pointer"):
+        compile_patch([{"op": "add", "path": "/a", "value": 1}, {"op": "remove", "path": "nodes"}])
+    with pytest.raises(ValueError, match="own child"):
+        compile_patch([{"op": "move", "from": "/nodes", "path": "/nodes/0"}])
+
+
+def test_patch_reports_per_op_timings():
+    patched, timings = apply_json_patch_with_stats(
+        _doc(), [{"op": "test", "path": "/name", "value": "Proces"}, {"op": "remove", "path": "/flows/0"}]
+    )
+    assert patched["flows"] == []
+    assert [(t["op"], t["path"]) for t in timings] == [("test", "/name"), ("remove", "/flows/0")]
+    assert all(t["ms"] >= 0 for t in timings)
@@ -0,0 +1,82 @@
+import shutil
+
+import pytest
+
+from services import kb_loader, kb_snapshot, lexicon_loader
+from services.frajer_kb_engine import FrajerKB
+
+
+@pytest.fixture()
+def snapshot_env(tmp_path, monkeypatch):
+    kb_dir = tmp_path / "kb"
+    shutil.copytree(kb_loader.KB_DIR, kb_dir, ignore=shutil.ignore_patterns("compiled"))
+    monkeypatch.setattr(kb_loader, "KB_DIR", kb_dir)
+    monkeypatch.setenv("BPMN_KB_SNAPSHOT_DIR", str(tmp_path / "compiled"))
+    lexicon_loader.get_lexicon.cache_clear()
+    yield kb_dir
+    lexicon_loader.get_lexicon.cache_clear()
+
+
+def _without_snapshot_flag(kb):
+    kb["_meta"].pop("snapshot")
+    return kb
+
+
+def test_get_kb_uses_fresh_snapshot(snapshot_env):
+    assert kb_loader.get_kb("sk")["_meta"]["snapshot"] is False
+
+    kb_snapshot.build_all(["sk"], ["main"])
+    loaded = kb_loader.get_kb("sk")
+
+    assert loaded["_meta"]["snapshot"] is True
+    assert _without_snapshot_flag(loaded) == _without_snapshot_flag(
+        kb_loader.load_kb_from_sources("sk")
+    )
+    assert loaded["_compiled"]["role_patterns"]
+
+
+def test_get_kb_falls_back_to_yaml_when_sources_change(snapshot_env):
+    kb_snapshot.build_all(["sk"], ["main"])
+    roles_file = snapshot_env / "roles.sk.yaml"
+    roles_file.write_text(
+        roles_file.read_text(encoding="utf-8").replace(
+            '"Sklad": ["sklad"', '"Sklad": ["expedícia", "sklad"'
+        ),
+        encoding="utf-8",
+    )
+
+    loaded = kb_loader.get_kb("sk")
+
+    assert loaded["_meta"]["snapshot"] is False
+    assert "expedícia" in loaded["roles"]["aliases"]["Sklad"]
+    assert FrajerKB("sk")._lane_hint("Expedícia zabalí tovar") == "Sklad"
+
+
+def test_new_variant_file_invalidates_snapshot(snapshot_env):
+    kb_snapshot.build_all(["sk"], ["beta"])
+    assert kb_loader.get_kb("sk", variant="beta")["_meta"]["snapshot"] is True
+
+    shutil.copy(snapshot_env / "roles.sk.yaml", snapshot_env / "roles.beta.sk.yaml")
+    loaded = kb_loader.get_kb("sk", variant="beta")
+
+    assert loaded["_meta"]["snapshot"] is False
+    assert loaded["_meta"]["variant_resolved"] == "beta"
+
+
+def test_corrupt_snapshot_is_ignored(snapshot_env):
+    path = kb_snapshot.kb_snapshot_path("sk", "main")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(kb_snapshot.SNAPSHOT_MAGIC + b"\x01\x00garbage")
+
+    assert kb_loader.get_kb("sk")["_meta"]["snapshot"] is False
+
+
+def test_lexicon_snapshot_matches_yaml(snapshot_env, monkeypatch):
+    expected = lexicon_loader.load_lexicon_from_source("sk")
+    kb_snapshot.build_lexicon_snapshot("sk")
+
+    def _no_yaml(lang):
+        raise AssertionError("YAML should not be parsed when snapshot is fresh")
+
+    monkeypatch.setattr(lexicon_loader, "load_lexicon_from_source", _no_yaml)
+    assert lexicon_loader.get_lexicon("sk") == expected
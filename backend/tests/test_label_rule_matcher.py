@@ -0,0 +1,112 @@
+import os
+
+import yaml
+
+import services.label_rule_matcher as label_rule_matcher
+from services.bpmn_svc import json_to_bpmn
+from services.label_rule_matcher import LabelRuleMatcher, get_label_matcher
+
+
+def _rule(rule_id, patterns, positive, negative, locale="sk"):
+    return {
+        "id": rule_id,
+        "locale": locale,
+        "patterns": patterns,
+        "gateway": "exclusive",
+        "labels": {"positive": positive, "negative": negative},
+    }
+
+
+RULES = [
+    _rule("budget", [{"value": "schválenie rozpočtu", "mode": "plain"}], "Schválené", "Zamietnuté"),
+    _rule("limit", [{"value": r"suma\s*>\s*\d+", "mode": "regex"}], "Nad limit", "Pod limit"),
+    _rule("any_sum", [{"value": r"(suma|cena)", "mode": "regex"}], "Suma", "Bez sumy"),
+    _rule("en", [{"value": "approve", "mode": "plain"}], "Approved", "Rejected", locale="en"),
+]
+
+
+def test_matcher_batches_plain_and_regex_rules_with_file_priority():
+    matcher = LabelRuleMatcher(RULES, "sk")
+    assert matcher.match_many(
+        ["Schvalenie rozpoctu?", "Je suma > 500?", "Aká je cena?", "", "approve?"]
+    ) == [
+        ("Schválené", "Zamietnuté"),
+        ("Nad limit", "Pod limit"),
+        ("Suma", "Bez sumy"),
+        None,
+        None,
+    ]
+    # frazy nepreskakuju hranicu medzi textami davky
+    assert matcher.match_many(["schválenie", "rozpočtu"]) == [None, None]
+
+
+def test_matcher_is_recompiled_when_rules_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(label_rule_matcher, "KB_DIR", tmp_path)
+    path = tmp_path / "label_rules.sk.yaml"
+    path.write_text(yaml.safe_dump({"label_rules": RULES[:1]}, allow_unicode=True), encoding="utf-8")
+    first = get_label_matcher("sk")
+    assert get_label_matcher("sk") is first
+    path.write_text(yaml.safe_dump({"label_rules": RULES}, allow_unicode=True), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert get_label_matcher("sk") is not first
+    assert get_label_matcher("sk").match("suma > 10") == ("Nad limit", "Pod limit")
+
+
+def test_json_to_bpmn_uses_label_rules_for_gateway_branches(tmp_path, monkeypatch):
+    monkeypatch.setattr(label_rule_matcher, "KB_DIR", tmp_path)
+    (tmp_path / "label_rules.sk.yaml").write_text(
+        yaml.safe_dump({"label_rules": RULES}, allow_unicode=True), encoding="utf-8"
+    )
+    engine = {
+        "locale": "sk",
+        "lanes": [{"id": "L1", "name": "Lane"}],
+        "nodes": [
+            {"id": "s", "type": "startEvent", "name": "Start", "laneId": "L1"},
+            {"id": "g1", "type": "exclusiveGateway", "name": "Je suma > 1000?", "laneId": "L1"},
+            {"id": "a", "type": "task", "name": "A", "laneId": "L1"},
+            {"id": "b", "type": "task", "name": "B", "laneId": "L1"},
+            {"id": "g2", "type": "exclusiveGateway", "name": "Hotovo?", "laneId": "L1"},
+            {"id": "c", "type": "task", "name": "C", "laneId": "L1"},
+            {"id": "d", "type": "task", "name": "D", "laneId": "L1"},
+            {"id": "e", "type": "endEvent", "name": "Koniec", "laneId": "L1"},
+        ],
+        "flows": [
+            {"id": "f1", "source": "s", "target": "g1"},
+            {"id": "f2", "source": "g1", "target": "a"},
+            {"id": "f3", "source": "g1", "target": "b"},
+            {"id": "f4", "source": "a", "target": "g2"},
+            {"id": "f5", "source": "g2", "target": "c"},
+            {"id": "f6", "source": "g2", "target": "d"},
+            {"id": "f7", "source": "d", "target": "e"},
+        ],
+    }
+    xml = json_to_bpmn(engine)
+    assert 'name="Nad limit"' in xml and 'name="Pod limit"' in xml
+    assert 'name="Áno"' in xml and 'name="Nie"' in xml
+
+
+def test_matcher_anchors_apply_to_each_text():
+    matcher = LabelRuleMatcher(
+        [
+            _rule("start", [{"value": "^schval", "mode": "regex"}], "Schválené", "Zamietnuté"),
+            _rule("end", [{"value": "ok$", "mode": "regex"}], "OK", "Nie OK"),
+            _rule("space", [{"value": r"x\s+y", "mode": "regex"}], "XY", "Nie XY"),
+        ],
+        "sk",
+    )
+    assert matcher.match_many(["schvaliť?", "schvaliť?"]) == [("Schválené", "Zamietnuté")] * 2
+    assert matcher.match_many(["is ok", "is ok", "x"]) == [("OK", "Nie OK"), ("OK", "Nie OK"), None]
+    # regex s \s neprejde z jedneho textu do druheho
+    assert matcher.match_many(["x", "y"]) == [None, None]
+
+
+def test_inline_flag_regex_does_not_break_other_rules():
+    matcher = LabelRuleMatcher(
+        [
+            _rule("flag", [{"value": "(?i)ok", "mode": "regex"}], "OK", "Nie OK"),
+            _rule("limit", [{"value": r"suma\s*>\s*\d+", "mode": "regex"}], "Nad limit", "Pod limit"),
+        ],
+        "sk",
+    )
+    assert matcher.match_many(["Je to OK?", "suma > 5"]) == [("OK", "Nie OK"), ("Nad limit", "Pod limit")]
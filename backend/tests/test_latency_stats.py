@@ -0,0 +1,40 @@
+from services.latency_stats import HistogramRegistry, LatencyHistogram, summarize_latencies
+from services.stage_timing import StageTimer
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram(buckets_ms=(1, 10, 100))
+    for value in [0.5] * 90 + [50] * 9 + [400]:
+        histogram.observe(value)
+    snap = histogram.snapshot()
+    assert snap["count"] == 100
+    assert snap["p50"] == 1
+    assert snap["p95"] == 100
+    assert snap["p99"] == 100
+    assert snap["max"] == 400
+    assert snap["buckets"] == {"le_1": 90, "le_10": 0, "le_100": 9, "inf": 1}
+
+
+def test_histogram_percentiles_never_exceed_observed_max():
+    histogram = LatencyHistogram(buckets_ms=(1, 100))
+    for value in (2.0, 3.0, 7.5):
+        histogram.observe(value)
+    snap = histogram.snapshot()
+    assert snap["p50"] == snap["p99"] == snap["max"] == 7.5
+
+
+def test_stage_timer_records_into_registry():
+    registry = HistogramRegistry()
+    timer = StageTimer("demo", registry=registry)
+    with timer.stage("parse"):
+        pass
+    timings = timer.finish()
+    assert list(timings) == ["parse", "total"]
+    assert timer.server_timing().startswith("parse;dur=")
+    assert set(registry.snapshot()) == {"demo.parse", "demo.total"}
+    registry.reset()
+    assert registry.snapshot() == {}
+
+
+def test_summarize_latencies_empty():
+    assert summarize_latencies([])["count"] == 0
@@ -0,0 +1,123 @@
+import shutil
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mentor import ab_eval
+from routers.mentor_router import router as mentor_router
+from services import kb_loader
+
+
+@pytest.fixture()
+def kb_dir(tmp_path, monkeypatch):
+    target = tmp_path / "kb"
+    shutil.copytree(kb_loader.KB_DIR, target, ignore=shutil.ignore_patterns("compiled"))
+    monkeypatch.setattr(kb_loader, "KB_DIR", target)
+    monkeypatch.setattr(ab_eval, "KB_DIR", target)
+    monkeypatch.setenv("BPMN_KB_SNAPSHOT_DIR", str(tmp_path / "compiled"))
+    return target
+
+
+def test_load_corpus_respects_window(kb_dir):
+    corpus = ab_eval.load_corpus("sk")
+    assert len(corpus) >= 3
+    assert ab_eval.load_corpus("sk", window=2) == corpus[-2:]
+
+
+def test_identical_variants_report_no_structural_changes(kb_dir):
+    result = ab_eval.evaluate_ab("main", "main", window=3, workers=1)
+
+    assert result["corpus_size"] == 3
+    assert result["changed"] == 0
+    assert result["items"] == []
+    assert result["totals"]["base"]["nodes"] == result["totals"]["candidate"]["nodes"]
+    assert result["latency_ms"]["base"]["count"] == 3
+    assert result["throughput_per_s"] > 0
+
+
+def test_candidate_variant_changes_lane_assignment(kb_dir):
+    roles = (kb_dir / "roles.sk.yaml").read_text(encoding="utf-8")
+    (kb_dir / "roles.beta.sk.yaml").write_text(
+        roles.replace('primary_process_lane: "Systém"', 'primary_process_lane: "Proces"'),
+        encoding="utf-8",
+    )
+    (kb_dir / "ab_corpus.sk.yaml").write_text(
+        "texts:\n  - id: t1\n    text: Pripraví podklady. Skontroluje výsledok.\n",
+        encoding="utf-8",
+    )
+
+    result = ab_eval.evaluate_ab("main", "beta", workers=1)
+
+    assert result["variants"]["candidate"] == {"requested": "beta", "resolved": "beta"}
+    assert result["changed"] == 1
+    lane_changes = result["items"][0]["lane_changes"]
+    assert lane_changes["Pripraví podklady"] == {"base": "Systém", "candidate": "Proces"}
+
+
+def test_ab_eval_endpoint(kb_dir, monkeypatch):
+    app = FastAPI()
+    app.include_router(mentor_router)
+    client = TestClient(app)
+
+    resp = client.get("/ab-eval", params={"base": "main", "candidate": "main", "window": 2, "workers": 1})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["base"] == "main"
+    assert body["delta"]["corpus_size"] == 2
+
+    monkeypatch.setenv("MENTOR_AB_CORPUS", str(kb_dir / "missing.yaml"))
+    resp = client.get("/ab-eval", params={"base": "main", "candidate": "beta"})
+    assert resp.status_code == 404
+    assert client.get("/ab-eval", params={"base": "main", "candidate": "main", "locale": "../../etc/x"}).status_code == 400
+    assert client.get("/ab-eval", params={"base": "../main", "candidate": "main"}).status_code == 400
+
+
+def test_process_pool_matches_sequential_run(kb_dir, monkeypatch):
+    monkeypatch.setattr(ab_eval.os, "cpu_count", lambda: 2)
+    sequential = ab_eval.evaluate_ab("main", "main", window=3, workers=1)
+    pooled = ab_eval.evaluate_ab("main", "main", window=3, workers=2)
+
+    assert pooled["workers"] == 2
+    assert pooled["corpus_size"] == sequential["corpus_size"] == 3
+    assert pooled["totals"] == sequential["totals"]
+    assert pooled["latency_ms"]["base"]["count"] == 3
+    ab_eval.shutdown_pool()
+
+
+def test_load_corpus_rejects_duplicate_ids(kb_dir):
+    (kb_dir / "ab_corpus.sk.yaml").write_text(
+        "texts:\n  - id: t1\n    text: Prvy text.\n  - id: t1\n    text: Druhy text.\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError, match="Duplicate corpus id"):
+        ab_eval.load_corpus("sk")
+
+
+def test_concurrent_evaluations_are_capped(kb_dir, monkeypatch):
+    monkeypatch.setattr(ab_eval, "_SLOTS", ab_eval.threading.BoundedSemaphore(1))
+    ab_eval._SLOTS.acquire()
+    try:
+        with pytest.raises(ab_eval.EvaluationBusyError):
+            ab_eval.evaluate_ab("main", "main", window=1, workers=1)
+    finally:
+        ab_eval._SLOTS.release()
+    assert ab_eval.evaluate_ab("main", "main", window=1, workers=1)["corpus_size"] == 1
+
+
+def test_validate_reports_kpi_delta_for_variant(kb_dir):
+    from mentor.validator import kpi_delta
+
+    assert kpi_delta("main", "20260101T000000Z")["delta"] == 0
+    roles = (kb_dir / "roles.sk.yaml").read_text(encoding="utf-8")
+    (kb_dir / "roles.beta.sk.yaml").write_text(
+        roles.replace('primary_process_lane: "Systém"', 'primary_process_lane: "Proces"'),
+        encoding="utf-8",
+    )
+    (kb_dir / "ab_corpus.sk.yaml").write_text(
+        "texts:\n  - id: t1\n    text: Pripraví podklady. Skontroluje výsledok.\n",
+        encoding="utf-8",
+    )
+    result = kpi_delta("main", "beta")
+    assert result["delta"] == 1
+    assert result["corpus_size"] == 1
@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from auth.db import run_auth_migrations
+from auth.service import register_user
+from mentor.batch_review import ReviewCache, engine_hash, review_models, ruleset_version
+from mentor.rule_engine import run_rules
+
+from tests.test_org_activity_log import _authed_client, _restore_env, _set_env
+
+
+def _engine(task_name: str = "") -> dict:
+    return {
+        "nodes": [
+            {"id": "start", "type": "startEvent", "name": "Start", "laneId": "l1"},
+            {"id": "task", "type": "task", "name": task_name, "laneId": "l1"},
+        ],
+        "flows": [{"id": "f1", "type": "sequenceFlow", "source": "start", "target": "task"}],
+        "lanes": [{"id": "l1", "name": "Oddelenie"}],
+    }
+
+
+def test_review_models_caches_by_engine_hash():
+    models = {
+        "a": {"name": "A", "engine_json": _engine()},
+        "b": {"name": "B", "engine_json": _engine("Schval")},
+    }
+
+    def _load(model_id):
+        if model_id not in models:
+            raise FileNotFoundError(model_id)
+        return models[model_id]
+
+    cache = ReviewCache(max_size=8)
+    first = list(review_models(["a", "b", "missing"], _load, workers=1, cache=cache))
+    results = {line["model_id"]: line for line in first[:-1]}
+    assert results["a"]["cached"] is False
+    assert results["a"]["engine_hash"] == engine_hash(models["a"]["engine_json"])
+    assert results["a"]["findings"] == [f.model_dump() for f in run_rules(models["a"]["engine_json"])]
+    assert results["missing"]["error"].startswith("FileNotFoundError")
+    assert first[-1]["summary"]["models"] == 3
+    assert first[-1]["summary"]["reviewed"] == 2
+    assert first[-1]["summary"]["errors"] == 1
+
+    models["b"]["engine_json"] = _engine("Zamietni")
+    second = list(review_models(["a", "b"], _load, workers=1, cache=cache))
+    assert [line["cached"] for line in second[:-1]] == [True, False]
+    assert second[-1]["summary"]["cached"] == 1
+    assert second[-1]["summary"]["reviewed"] == 1
+
+
+def test_ruleset_version_covers_shared_rule_helpers(monkeypatch):
+    ruleset_version.cache_clear()
+    before = ruleset_version()
+    original = Path.read_bytes
+
+    def _read_bytes(path):
+        data = original(path)
+        return data + b"\n# zmena" if path.name == "common.py" else data
+
+    monkeypatch.setattr(Path, "read_bytes", _read_bytes)
+    ruleset_version.cache_clear()
+    try:
+        assert ruleset_version() != before
+    finally:
+        monkeypatch.undo()
+        ruleset_version.cache_clear()
+    assert ruleset_version() == before
+
+
+def test_org_mentor_review_streams_ndjson(tmp_path):
+    previous = _set_env(tmp_path)
+    try:
+        run_auth_migrations()
+        register_user("owner@example.com", "password123")
+        client: TestClient = _authed_client("owner@example.com")
+        org_id = client.post("/api/orgs", json={"name": "Org Review"}).json()["id"]
+        nodes = []
+        for name in ("Proces 1", "Proces 2"):
+            created = client.post(
+                f"/api/orgs/models?org_id={org_id}",
+                json={"name": name, "engine_json": _engine(), "diagram_xml": "<definitions />"},
+            )
+            assert created.status_code == 200
+            node = client.post(
+                f"/api/org-model/process-from-org-model?org_id={org_id}",
+                json={"parentId": "root", "modelId": created.json()["org_model_id"], "name": name},
+            )
+            assert node.status_code == 200, node.text
+            nodes.append(node.json()["node"])
+        # nova verzia procesu 1: stara verzia ostava na disku, ale nereviduje sa
+        base_id = nodes[0]["processRef"]["modelId"]
+        version = client.post(
+            f"/api/orgs/models?org_id={org_id}",
+            json={
+                "name": "Proces 1",
+                "engine_json": _engine("Schval"),
+                "diagram_xml": "<definitions />",
+                "tree_node_id": nodes[0]["id"],
+                "base_model_id": base_id,
+            },
+        )
+        assert version.status_code == 200, version.text
+        version_id = version.json()["org_model_id"]
+        moved = client.patch(
+            f"/api/org-model/process/{nodes[0]['id']}/model-ref?org_id={org_id}",
+            json={"modelId": version_id, "baseModelId": base_id},
+        )
+        assert moved.status_code == 200, moved.text
+
+        response = client.post("/api/orgs/models/mentor-review", json={"org_id": org_id, "workers": 1})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        assert len(lines) == 3
+        assert {line["name"] for line in lines[:-1]} == {"Proces 1", "Proces 2"}
+        assert base_id not in {line["model_id"] for line in lines[:-1]}
+        assert version_id in {line["model_id"] for line in lines[:-1]}
+        assert lines[-1]["summary"]["models"] == 2
+
+        missing = client.post(
+            "/api/orgs/models/mentor-review", json={"org_id": org_id, "folder_id": "nope"}
+        )
+        assert missing.status_code == 404
+    finally:
+        _restore_env(previous)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import copy
+import random
+
+from fastapi.testclient import TestClient
+
+from main import app
+from mentor.incremental import review_incremental
+from mentor.json_patch import apply_json_patch
+from mentor.rule_engine import run_rules
+
+client = TestClient(app)
+
+_TYPES = [
+    "task",
+    "startEvent",
+    "endEvent",
+    "exclusiveGateway",
+    "parallelGateway",
+    "subProcess",
+    "boundaryEvent",
+    "textAnnotation",
+]
+
+
+def _engine():
+    return {
+        "lanes": [{"id": "lane_1", "name": "Sales"}, {"id": "lane_2", "name": ""}],
+        "nodes": [
+            {"id": "start", "type": "startEvent", "name": "Start", "laneId": "lane_1"},
+            {"id": "gw", "type": "exclusiveGateway", "name": "Ok?", "laneId": "lane_1"},
+            {"id": "a", "type": "task", "name": "Schval", "laneId": "lane_1"},
+            {"id": "b", "type": "task", "name": "", "laneId": "lane_2"},
+            {"id": "end", "type": "endEvent", "name": "Koniec", "laneId": "lane_1"},
+        ],
+        "flows": [
+            {"id": "f1", "source": "start", "target": "gw"},
+            {"id": "f2", "source": "gw", "target": "a", "name": "ano"},
+            {"id": "f3", "source": "gw", "target": "b"},
+            {"id": "f4", "source": "a", "target": "end"},
+        ],
+    }
+
+
+def _random_patch(rng: random.Random, doc):
+    ops = []
+    for _ in range(rng.randint(1, 3)):
+        coll = rng.choice(["nodes", "flows", "lanes"])
+        items = doc[coll]
+        roll = rng.random()
+        if not items or roll < 0.2:
+            if coll == "nodes":
+                value = {"id": f"n{rng.randrange(99)}", "type": rng.choice(_TYPES)}
+            elif coll == "flows":
+                ids = [node["id"] for node in doc["nodes"]] or ["x"]
+                value = {"id": f"f{rng.randrange(99)}", "source": rng.choice(ids), "target": rng.choice(ids)}
+            else:
+                value = {"id": f"lane_{rng.randrange(9)}", "name": rng.choice(["", "Ops"])}
+            op = {"op": "add", "path": f"/{coll}/{rng.randint(0, len(items))}", "value": value}
+        elif roll < 0.35:
+            op = {"op": "remove", "path": f"/{coll}/{rng.randrange(len(items))}"}
+        else:
+            pos = rng.randrange(len(items))
+            ids = [node["id"] for node in doc["nodes"]] or ["x"]
+            field, value = rng.choice(
+                {
+                    "nodes": [("name", ""), ("type", rng.choice(_TYPES)), ("laneId", "lane_2")],
+                    "flows": [("name", ""), ("source", rng.choice(ids)), ("type", "messageFlow")],
+                    "lanes": [("name", ""), ("poolId", "pool_2")],
+                }[coll]
+            )
+            op = {"op": "add", "path": f"/{coll}/{pos}/{field}", "value": value}
+        ops.append(op)
+        doc = apply_json_patch(doc, [op])
+    return ops
+
+
+def test_incremental_review_matches_full_run():
+    for seed in range(300):
+        rng = random.Random(seed)
+        doc = _engine()
+        previous = run_rules(doc)
+        for _ in range(3):
+            patch = _random_patch(rng, doc)
+            before = copy.deepcopy(doc)
+            patched, findings, _ = review_incremental(doc, patch, previous)
+            assert doc == before
+            assert findings == run_rules(patched), (seed, patch)
+            doc, previous = patched, findings
+
+
+def test_rename_reruns_only_touched_node():
+    doc = _engine()
+    previous = run_rules(doc)
+    patch = [{"op": "replace", "path": "/nodes/3/name", "value": "Eskaluj"}]
+    patched, findings, stats = review_incremental(doc, patch, previous)
+    assert stats == {
+        "mode": "incremental",
+        "dirty_nodes": 1,
+        "dirty_flows": 1,
+        "dirty_lanes": 1,
+        "global_rerun": False,
+    }
+    assert "activity_requires_name:b" in {f.id for f in previous}
+    assert "activity_requires_name:b" not in {f.id for f in findings}
+
+
+def test_incremental_review_endpoint():
+    doc = _engine()
+    previous = client.post("/mentor/review", json={"engine_json": doc}).json()["findings"]
+    resp = client.post(
+        "/mentor/review/incremental",
+        json={
+            "engine_json": doc,
+            "patch": [{"op": "remove", "path": "/flows/2"}],
+            "previousFindings": previous,
+        },
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["meta"]["incremental"]["global_rerun"] is True
+    full = client.post(
+        "/mentor/review",
+        json={"engine_json": apply_json_patch(doc, [{"op": "remove", "path": "/flows/2"}])},
+    ).json()
+    assert data["findings"] == full["findings"]
+
+    bad = client.post(
+        "/mentor/review/incremental",
+        json={"engine_json": doc, "patch": [{"op": "remove", "path": "/nodes/42"}]},
+    )
+    assert bad.status_code == 400
@@ -0,0 +1,126 @@
+import pytest
+import yaml
+
+import mentor.applier as applier
+from mentor.kb_index import FullLintJob, KbIndex
+from mentor.kb_write_queue import KbWriteQueue
+from mentor.models import MentorApplyRequest
+from mentor.validator import detect_conflicts, lint_kb
+from tests.test_mentor_kb_queue import _repo
+
+
+def _rule(rule_id):
+    return {
+        "id": rule_id,
+        "locale": "sk",
+        "patterns": [{"value": "schvalit", "mode": "plain"}],
+        "gateway": "exclusive",
+        "labels": {"positive": "Ano", "negative": "Nie"},
+    }
+
+
+def _state():
+    return {
+        "label_rules": {"label_rules": [_rule(f"r{i}") for i in range(3)]},
+        "aliases": {"locale": "sk", "aliases": {"Uctaren": ["uctovnik"], "Sklad": ["skladnik"]}},
+    }
+
+
+def test_delta_check_matches_full_lint():
+    state = _state()
+    index = KbIndex.build(state)
+    assert index.issues == []
+    assert index.alias_owner == {"uctovnik": "Uctaren", "skladnik": "Sklad"}
+
+    assert index.check_delta([_rule("r1")], {}) == ["label_rules duplicate id r1"]
+    conflicts = index.check_delta([], {"Sklad": ["skladnik", "Uctovnik"]})
+    combined = {"aliases": {"Uctaren": ["uctovnik"], "Sklad": ["skladnik", "Uctovnik"]}}
+    assert conflicts == detect_conflicts(combined)
+
+    new_rules, roles = [_rule("r3")], {"Uctaren": ["uctovnicka"], "Predaj": ["obchodnik"]}
+    assert index.check_delta(new_rules, roles) == []
+    merged = {
+        "label_rules": {"label_rules": state["label_rules"]["label_rules"] + new_rules},
+        "aliases": {"aliases": {**state["aliases"]["aliases"], **roles}},
+    }
+    assert lint_kb(merged["label_rules"], merged["aliases"]) + detect_conflicts(merged["aliases"]) == []
+    index.advance(merged, new_rules, roles)
+    assert "uctovnik" not in index.alias_owner
+    assert index.alias_owner["obchodnik"] == "Predaj"
+    assert index.rule_count == 4 and "r3" in index.rule_ids
+
+
+def test_full_lint_job_runs_in_background():
+    state = _state()
+    state["aliases"]["aliases"]["Sklad"].append("")
+    job = FullLintJob()
+    assert job.start(state)["state"] == "running"
+    job.join(timeout=5)
+    status = job.status()
+    assert status["state"] == "done"
+    assert status["issues"] == ["aliases[Sklad] contains empty alias"]
+
+
+def _alias_proposal(proposal_id, role, aliases):
+    return {
+        "id": proposal_id,
+        "type": "alias",
+        "summary": "alias",
+        "match": {"locale": "sk", "patterns": [], "context": []},
+        "action": {"op": "add_alias", "params": {"role": role, "aliases": aliases}},
+    }
+
+
+def test_apply_validates_only_delta_through_index(tmp_path, monkeypatch):
+    queue = KbWriteQueue(_repo(tmp_path), {}, _state, coalesce_s=60, copier=applier._copy_state)
+    monkeypatch.setattr(applier, "KB_QUEUE", queue)
+    monkeypatch.setattr(applier, "_KB_INDEX", None)
+
+    builds = []
+    original_build = KbIndex.build.__func__
+
+    def _counting_build(cls, state):
+        builds.append(1)
+        return original_build(cls, state)
+
+    monkeypatch.setattr(KbIndex, "build", classmethod(_counting_build))
+
+    first = applier.apply_proposals(
+        MentorApplyRequest(proposals=[_alias_proposal("p1", "Predaj", ["obchodnik"])])
+    )
+    assert first.audit.pending_commit_id
+    with pytest.raises(applier.MentorApplyConflict, match="already assigned to role 'Predaj'"):
+        applier.apply_proposals(
+            MentorApplyRequest(proposals=[_alias_proposal("p2", "Sklad", ["Obchodnik"])])
+        )
+    assert queue.snapshot()["aliases"]["aliases"]["Predaj"] == ["obchodnik"]
+    issues, _ = applier.kb_validation_status()
+    assert issues == []
+    assert len(builds) == 1
+    assert queue.flush(timeout=5)
+    assert queue.status(first.audit.pending_commit_id)["state"] == "committed"
+
+
+def test_validation_sees_kb_files_changed_on_disk(tmp_path, monkeypatch):
+    label_rules, aliases = tmp_path / "label_rules.sk.yaml", tmp_path / "aliases.sk.yaml"
+    label_rules.write_text(yaml.safe_dump({"label_rules": [_rule("r1")]}), encoding="utf-8")
+    aliases.write_text(yaml.safe_dump({"aliases": {"Uctaren": ["uctovnik"]}}), encoding="utf-8")
+    monkeypatch.setattr(applier, "KB_DIR", tmp_path)
+    monkeypatch.setattr(applier, "LABEL_RULES_FILE", label_rules)
+    monkeypatch.setattr(applier, "ALIASES_FILE", aliases)
+    queue = KbWriteQueue(
+        tmp_path, {"label_rules": label_rules, "aliases": aliases}, applier._load_state, coalesce_s=60
+    )
+    monkeypatch.setattr(applier, "KB_QUEUE", queue)
+    monkeypatch.setattr(applier, "_KB_INDEX", None)
+    monkeypatch.setattr(applier, "FULL_LINT", FullLintJob())
+    assert applier.kb_validation_status()[0] == []
+
+    # rucna uprava (alebo iny worker): duplicitne id pravidla
+    label_rules.write_text(yaml.safe_dump({"label_rules": [_rule("r1"), _rule("r1")]}), encoding="utf-8")
+    issues, _ = applier.kb_validation_status()
+    assert issues == ["label_rules duplicate id r1"]
+
+    applier.start_full_lint()
+    applier.FULL_LINT.join(timeout=5)
+    assert applier.FULL_LINT.status()["issues"] == ["label_rules duplicate id r1"]
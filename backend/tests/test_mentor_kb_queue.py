@@ -0,0 +1,140 @@
+import subprocess
+
+import pytest
+import yaml
+
+from mentor.kb_write_queue import KbWriteQueue
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+def _repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "kb@example.com")
+    _git(tmp_path, "config", "user.name", "kb")
+    (tmp_path / "kb").mkdir()
+    (tmp_path / "kb" / "aliases.yaml").write_text("aliases: {}\n", encoding="utf-8")
+    _git(tmp_path, "add", "kb")
+    _git(tmp_path, "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+def _add_alias(role, alias):
+    def _mutate(current, preview):
+        if alias in (current["aliases"]["aliases"].get(role) or []):
+            raise ValueError("duplicate")
+        preview["aliases"]["aliases"].setdefault(role, []).append(alias)
+        return ["aliases"], [f"prop_{alias}"]
+
+    return _mutate
+
+
+def test_updates_are_visible_immediately_and_committed_in_one_batch(tmp_path):
+    repo = _repo(tmp_path)
+    path = repo / "kb" / "aliases.yaml"
+    queue = KbWriteQueue(
+        repo,
+        {"aliases": path},
+        lambda: {"aliases": yaml.safe_load(path.read_text(encoding="utf-8"))},
+        coalesce_s=0.2,
+    )
+
+    first = queue.update(_add_alias("Ucteln", "uctovnik"))
+    second = queue.update(_add_alias("Ucteln", "uctovnicka"))
+    assert queue.snapshot()["aliases"]["aliases"]["Ucteln"] == ["uctovnik", "uctovnicka"]
+    assert queue.status(first)["state"] == "pending"
+
+    with pytest.raises(ValueError):
+        queue.update(_add_alias("Ucteln", "uctovnik"))
+
+    assert queue.flush(timeout=10)
+    status_first, status_second = queue.status(first), queue.status(second)
+    assert status_first["state"] == "committed"
+    assert status_first["commit_id"] == status_second["commit_id"] == _git(repo, "rev-parse", "HEAD").strip()
+    assert status_first["batch_size"] == 2
+    assert _git(repo, "log", "-1", "--format=%s").strip() == "mentor: apply prop_uctovnik, prop_uctovnicka"
+    saved = yaml.safe_load(path.read_text(encoding="utf-8"))
+    assert saved["aliases"]["Ucteln"] == ["uctovnik", "uctovnicka"]
+
+
+def _queue(repo, **kwargs):
+    path = repo / "kb" / "aliases.yaml"
+    return KbWriteQueue(
+        repo,
+        {"aliases": path},
+        lambda: {"aliases": yaml.safe_load(path.read_text(encoding="utf-8"))},
+        **kwargs,
+    )
+
+
+def test_changes_from_other_workers_and_manual_edits_are_not_overwritten(tmp_path):
+    repo = _repo(tmp_path)
+    path = repo / "kb" / "aliases.yaml"
+    first, second = _queue(repo, coalesce_s=0.3), _queue(repo, coalesce_s=0)
+    assert first.snapshot()["aliases"]["aliases"] == {}
+
+    # rucna uprava, kym first nic nezapisuje -> nacita sa znova
+    path.write_text("aliases:\n  Sklad: [skladnik]\n", encoding="utf-8")
+    assert first.snapshot()["aliases"]["aliases"] == {"Sklad": ["skladnik"]}
+
+    # dalsi worker zapise medzi update a commitom -> davka sa prehra nad diskom
+    ticket = first.update(_add_alias("Ucteln", "uctovnik"))
+    second.update(_add_alias("Predaj", "obchodnik"))
+    assert second.flush(timeout=10) and first.flush(timeout=10)
+    saved = yaml.safe_load(path.read_text(encoding="utf-8"))["aliases"]
+    assert saved == {"Sklad": ["skladnik"], "Predaj": ["obchodnik"], "Ucteln": ["uctovnik"]}
+    assert first.status(ticket)["state"] == "committed"
+    assert "Ucteln" in _git(repo, "show", "HEAD:kb/aliases.yaml")
+
+
+def test_failed_commit_is_retried_then_reported_and_marks_queue_dirty(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    queue = _queue(repo, coalesce_s=0, retry_delay_s=0)
+    calls = []
+    original = queue._run_git
+
+    def _failing_git(*args, **kwargs):
+        if args[0] == "commit":
+            calls.append(args)
+            raise RuntimeError("hook rejected")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(queue, "_run_git", _failing_git)
+    ticket = queue.update(_add_alias("Ucteln", "uctovnik"))
+    assert queue.flush(timeout=10)
+    assert len(calls) == 3
+    assert queue.status(ticket) == {"state": "failed", "commit_id": None, "error": "hook rejected"}
+    assert queue.dirty
+
+    monkeypatch.setattr(queue, "_run_git", original)
+    later = queue.update(_add_alias("Predaj", "obchodnik"))
+    assert queue.flush(timeout=10)
+    assert queue.status(later)["state"] == "committed" and not queue.dirty
+    assert "uctovnik" in _git(repo, "show", "HEAD:kb/aliases.yaml")
+
+
+def test_kb_commit_endpoint_resolves_pending_commit_id(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import mentor.applier as applier
+    from routers.mentor_router import router as mentor_router
+
+    repo = _repo(tmp_path)
+    queue = _queue(repo, coalesce_s=0)
+    monkeypatch.setattr(applier, "KB_QUEUE", queue)
+    app = FastAPI()
+    app.include_router(mentor_router)
+    client = TestClient(app)
+
+    ticket = queue.update(_add_alias("Ucteln", "uctovnik"))
+    assert queue.flush(timeout=10)
+    resp = client.get(f"/mentor/kb-commit/{ticket}")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["pending_commit_id"] == ticket
+    assert body["state"] == "committed"
+    assert body["commit_id"] == _git(repo, "rev-parse", "HEAD").strip()
+    assert client.get("/mentor/kb-commit/kbq_missing").status_code == 404
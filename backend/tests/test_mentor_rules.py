@@ -449,3 +449,105 @@ def test_gateway_requires_incoming_merge_valid():
     ]
     findings = run_rules(_engine(nodes, flows))
     assert not _by_rule(findings, "gateway_requires_incoming")
+
+
+def test_index_analyses_are_computed_once():
+    from mentor.rule_engine import build_index
+
+    engine = _engine(
+        nodes=[
+            {"id": "s", "type": "startEvent", "laneId": "lane_1"},
+            {"id": "g", "type": "exclusiveGateway", "laneId": "lane_1"},
+            {"id": "a", "type": "task", "laneId": "lane_1"},
+            {"id": "b", "type": "task", "laneId": "lane_1"},
+            {"id": "e", "type": "endEvent", "laneId": "lane_1"},
+            {"id": "x", "type": "task", "laneId": "lane_2"},
+        ],
+        flows=[
+            {"id": "f1", "source": "s", "target": "g"},
+            {"id": "f2", "source": "g", "target": "a"},
+            {"id": "f3", "source": "g", "target": "b"},
+            {"id": "f4", "source": "a", "target": "e"},
+            {"id": "f5", "source": "b", "target": "e"},
+            {"id": "m1", "source": "x", "target": "a", "type": "messageFlow"},
+        ],
+    )
+    index = build_index(engine)
+    assert index.components is index.components
+    assert [sorted(c) for c in index.components] == [["a", "b", "e", "g", "s"], ["x"]]
+    assert index.reachable_from_start == {"s", "g", "a", "b", "e"}
+    assert index.gateway_degrees == {"g": (1, 2)}
+    assert index.topological_levels["e"] == 3
+    assert index.lane_node_ids["lane_2"] == ["x"]
+
+
+def test_rule_stats_and_selection():
+    from mentor.rule_engine import RULE_IDS, run_rules_with_stats
+
+    engine = _engine(
+        nodes=[
+            {"id": "t1", "type": "task", "name": "", "laneId": "lane_1"},
+            {"id": "g1", "type": "exclusiveGateway", "laneId": "lane_1"},
+        ],
+        flows=[{"id": "f1", "source": "t1", "target": "g1"}],
+    )
+    findings, stats = run_rules_with_stats(engine)
+    assert list(stats) == list(RULE_IDS)
+    assert sum(entry["findings"] for entry in stats.values()) == len(findings)
+    assert stats["rightmost_not_end_event"]["findings"] == 1
+
+    hard, hard_stats = run_rules_with_stats(engine, min_severity="HARD")
+    assert "rightmost_not_end_event" not in hard_stats
+    assert {f.severity for f in hard} == {"HARD"}
+
+    only, only_stats = run_rules_with_stats(engine, rule_ids=["activity_requires_name"])
+    assert list(only_stats) == ["activity_requires_name"]
+    assert [f.id for f in only] == ["activity_requires_name:t1"]
+
+
+def test_review_endpoint_reports_rule_stats():
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    engine = _engine(nodes=[{"id": "t1", "type": "task", "laneId": "lane_1"}], flows=[])
+    resp = client.post(
+        "/mentor/review", json={"engine_json": engine, "min_severity": "SOFT"}
+    )
+    assert resp.status_code == 200
+    assert "rightmost_not_end_event" not in resp.json()["meta"]["rule_stats"]
+
+    bad = client.post("/mentor/review", json={"engine_json": engine, "rules": ["nope"]})
+    assert bad.status_code == 400
+
+    stats = client.get("/mentor/rule-stats").json()["rules"]
+    assert stats["activity_is_isolated"]["count"] >= 1
+
+
+def test_apply_reuses_review_findings_and_copies_on_write(monkeypatch):
+    import mentor.rule_service as rule_service
+    from mentor.models import MentorReviewRequest
+
+    engine = _engine(
+        nodes=[
+            {"id": "t1", "type": "task", "laneId": "lane_1"},
+            {"id": "t2", "type": "task", "name": "Ok", "laneId": "lane_1"},
+        ],
+        flows=[],
+    )
+    service = rule_service.MentorRuleService()
+    rule_service.FINDINGS_CACHE.clear()
+    findings, _ = service.review(MentorReviewRequest(engine_json=engine))
+    fix = next(f for f in findings if f.autofix and f.fix_payload)
+
+    def _no_rerun(_engine_json):
+        raise AssertionError("apply nema znova spustat pravidla")
+
+    monkeypatch.setattr(rule_service, "run_rules", _no_rerun)
+    patched, audit = service.apply(engine, [fix.id], {})
+    assert [entry.id for entry in audit] == [fix.id]
+    assert patched["nodes"][0]["name"] == fix.fix_payload["value"]
+    assert "name" not in engine["nodes"][0]
+    assert patched["nodes"][1] is engine["nodes"][1]
+    assert patched["lanes"] is engine["lanes"]
@@ -0,0 +1,100 @@
+import json
+import os
+
+import services.model_index as model_index
+from services import model_storage, org_models_storage
+
+
+def _count_reads(monkeypatch):
+    reads = []
+    original = model_index._read_entry
+
+    def _counting(entry, summarize):
+        reads.append(entry.name)
+        return original(entry, summarize)
+
+    monkeypatch.setattr(model_index, "_read_entry", _counting)
+    return reads
+
+
+def test_list_models_reads_index_and_tracks_save_and_delete(tmp_path, monkeypatch):
+    model_storage.set_base_dir(tmp_path / "models")
+    engine = {"nodes": [], "flows": [], "lanes": []}
+    first = model_storage.save_model("Prvy", engine, "<xml/>", user_id="u1")
+    model_storage.save_model("Druhy", engine, "<xml/>", user_id="u1")
+    reads = _count_reads(monkeypatch)
+
+    listed = model_storage.list_models(user_id="u1")
+    assert {m["name"] for m in listed} == {"Prvy", "Druhy"}
+    assert len(reads) == 2  # prve listovanie postavi index
+    index_path = model_storage.get_user_models_dir("u1") / model_index.INDEX_NAME
+    assert index_path.exists()
+
+    model_storage.save_model("Prvy v2", engine, "<xml/>", model_id=first["id"], user_id="u1")
+    model_storage.save_model("Treti", engine, "<xml/>", user_id="u1")
+    model_storage.delete_model(first["id"], user_id="u1")
+    reads.clear()
+    listed = model_storage.list_models(user_id="u1")
+    assert [m["name"] for m in listed] == ["Treti", "Druhy"]
+    assert set(listed[0]) == {"id", "name", "created_at", "updated_at", "process_meta"}
+    assert reads == []
+    assert model_storage.list_models(search="tret", user_id="u1")[0]["name"] == "Treti"
+
+
+def test_org_index_rebuilds_when_corrupt_and_sees_external_writes(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(tmp_path / "models"))
+    model_id = org_models_storage.save_org_model_copy("org1", {"name": "A", "tree_node_id": "prc_1"})
+    assert org_models_storage.list_org_models("org1")[0]["tree_node_id"] == "prc_1"
+
+    directory = org_models_storage.org_models_dir("org1")
+    (directory / model_index.INDEX_NAME).write_text("{broken", encoding="utf-8")
+    assert [m["id"] for m in org_models_storage.list_org_models("org1")] == [model_id]
+
+    # zapis mimo storage vrstvy (iny proces) sa prejavi cez zmenu mtime
+    path = directory / f"{model_id}.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["name"] = "Externe"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert org_models_storage.list_org_models("org1")[0]["name"] == "Externe"
+    assert org_models_storage.list_org_model_ids("org1") == [model_id]
+
+
+def test_query_models_pages_sorts_and_searches_in_storage(tmp_path, monkeypatch):
+    model_storage.set_base_dir(tmp_path / "models")
+    engine = {"nodes": [], "flows": [], "lanes": []}
+    names = ["Objednavka", "Faktura", "Reklamacia objednavky", "Nabor", "Fa"]
+    for name in names:
+        model_storage.save_model(name, engine, "<xml/>", user_id="u1")
+    model_storage.list_models(user_id="u1")  # postavi index
+    directory = model_storage.get_user_models_dir("u1")
+    stat = directory.stat()
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+    page, total = model_storage.query_models(user_id="u1", limit=2, offset=0)
+    assert total == 5
+    assert [m["name"] for m in page] == ["Fa", "Nabor"]
+    page, _ = model_storage.query_models(user_id="u1", limit=2, offset=4)
+    assert [m["name"] for m in page] == ["Objednavka"]
+    page, _ = model_storage.query_models(user_id="u1", sort="name", descending=False, limit=3)
+    assert [m["name"] for m in page] == ["Fa", "Faktura", "Nabor"]
+
+    page, total = model_storage.query_models(search="OBJEDN", user_id="u1", sort="name", descending=False)
+    assert total == 2
+    assert [m["name"] for m in page] == ["Objednavka", "Reklamacia objednavky"]
+    assert model_storage.query_models(search="fa", user_id="u1")[1] == 2
+    assert model_storage.query_models(search="xyz", user_id="u1") == ([], 0)
+
+    # kym sa adresar nezmeni, dotaz nesiahne na disk
+    scans = []
+    original = model_index._model_files
+    monkeypatch.setattr(model_index, "_model_files", lambda d: scans.append(d) or original(d))
+    model_storage.query_models(user_id="u1", limit=1)
+    assert scans == []
+
+    renamed = model_storage.query_models(search="nabor", user_id="u1")[0][0]
+    model_storage.save_model("Onboarding", engine, "<xml/>", model_id=renamed["id"], user_id="u1")
+    assert model_storage.query_models(search="nabor", user_id="u1")[1] == 0
+    page, total = model_storage.query_models(search="board", user_id="u1")
+    assert (total, page[0]["id"]) == (1, renamed["id"])
@@ -0,0 +1,112 @@
+import json
+
+from services import blob_store, model_parts, model_storage, org_models_storage
+
+
+def _engine() -> dict:
+    return {"nodes": [{"id": "t1", "type": "task", "name": "Schval"}], "flows": [], "lanes": []}
+
+
+def test_save_splits_parts_and_loads_lazily(tmp_path):
+    model_storage.set_base_dir(tmp_path / "models")
+    saved = model_storage.save_model("Model", _engine(), "<definitions/>", user_id="u1", process_meta={"v": 1})
+    path = model_storage.get_user_models_dir("u1") / f"{saved['id']}.json"
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    assert "engine_json" not in meta and "diagram_xml" not in meta
+    blobs = meta["_parts"]["blobs"]
+    assert sorted(blobs) == ["diagram_xml", "engine_json"]
+    assert blob_store.get_blob(tmp_path / "models", blobs["diagram_xml"]) == "<definitions/>"
+
+    full = model_storage.load_model(saved["id"], user_id="u1")
+    assert full["engine_json"] == _engine()
+    assert full["diagram_xml"] == "<definitions/>"
+    assert "_parts" not in full
+    light = model_storage.load_model(saved["id"], user_id="u1", parts=())
+    assert light["process_meta"] == {"v": 1} and "engine_json" not in light
+    assert set(model_storage.load_model(saved["id"], user_id="u1", parts=["engine_json"])) >= {"engine_json"}
+
+    model_storage.update_model_meta(saved["id"], {"name": "Premenovany"}, user_id="u1")
+    assert json.loads(path.read_text(encoding="utf-8"))["_parts"]["blobs"] == blobs
+    assert model_storage.list_models(user_id="u1")[0]["name"] == "Premenovany"
+
+    model_storage.save_model("Model", _engine(), "<definitions id='2'/>", model_id=saved["id"], user_id="u1")
+    assert model_storage.load_model(saved["id"], user_id="u1")["diagram_xml"] == "<definitions id='2'/>"
+
+    model_storage.delete_model(saved["id"], user_id="u1")
+    assert not path.exists()
+
+
+def test_legacy_single_file_models_are_read_and_migrated_online(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(tmp_path / "models"))
+    directory = org_models_storage.org_models_dir("org1")
+    legacy = {}
+    for model_id in ("a", "b"):
+        legacy[model_id] = {
+            "id": model_id,
+            "name": f"Legacy {model_id}",
+            "engine_json": _engine(),
+            "diagram_xml": "<definitions/>",
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+        (directory / f"{model_id}.json").write_text(json.dumps(legacy[model_id]), encoding="utf-8")
+    (directory.parent / "notes.json").write_text('{"notes": []}', encoding="utf-8")
+
+    assert org_models_storage.load_org_model("org1", "a") == legacy["a"]
+    assert "diagram_xml" not in org_models_storage.load_org_model("org1", "a", parts=("engine_json",))
+    assert {m["id"] for m in org_models_storage.list_org_models("org1")} == {"a", "b"}
+
+    assert model_parts.migrate_directory(directory, limit=1) == {"migrated": 1, "remaining": 1}
+    assert model_parts.migrate_directory(directory) == {"migrated": 1, "remaining": 0}
+    assert model_parts.migrate_directory(directory.parent) == {"migrated": 0, "remaining": 0}
+    for model_id, data in legacy.items():
+        assert org_models_storage.load_org_model("org1", model_id) == data
+        assert "blobs" in json.loads((directory / f"{model_id}.json").read_text(encoding="utf-8"))["_parts"]
+    assert json.loads((directory.parent / "notes.json").read_text(encoding="utf-8")) == {"notes": []}
+
+
+def test_compressed_parts_coexist_with_plain_ones(tmp_path, monkeypatch):
+    model_storage.set_base_dir(tmp_path / "models")
+    plain = model_storage.save_model("Plain", _engine(), "<definitions/>" * 50, user_id="u1")
+    monkeypatch.setenv("MODEL_STORAGE_COMPRESSION", "gzip")
+    packed = model_storage.save_model("Packed", {**_engine(), "name": "x"}, "<definitions/>" * 40, user_id="u1")
+    directory = model_storage.get_user_models_dir("u1")
+
+    def _codecs(model_id):
+        meta = json.loads((directory / f"{model_id}.json").read_text(encoding="utf-8"))
+        return {blob_store.peek_codec(tmp_path / "models", digest) for digest in meta["_parts"]["blobs"].values()}
+
+    assert _codecs(plain["id"]) == {"none"}
+    assert _codecs(packed["id"]) == {"gzip"}
+    for saved in (plain, packed):
+        loaded = model_storage.load_model(saved["id"], user_id="u1")
+        assert loaded["engine_json"] == saved["engine_json"]
+        assert loaded["diagram_xml"] == saved["diagram_xml"]
+
+    assert model_parts.migrate_directory(directory) == {"migrated": 0, "remaining": 0}
+    assert model_parts.migrate_storage(tmp_path / "models", codec="gzip") == {"migrated": 1, "remaining": 0}
+    assert _codecs(plain["id"]) == {"gzip"}
+    assert model_storage.load_model(plain["id"], user_id="u1")["diagram_xml"] == "<definitions/>" * 50
+
+
+def test_identical_parts_are_stored_once_and_gc_reclaims_unreferenced(tmp_path, monkeypatch):
+    root = tmp_path / "models"
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(root))
+    model_storage.set_base_dir(root)
+    user_model = model_storage.save_model("Model", _engine(), "<definitions/>", user_id="u1")
+    first = org_models_storage.save_org_model_copy("org1", user_model)
+    second = org_models_storage.save_org_model_copy("org1", user_model, name_override="Kopia")
+    assert len(list(blob_store.iter_blobs(root))) == 2  # engine + diagram, raz
+
+    org_models_storage.save_org_model("org1", second, {**user_model, "diagram_xml": "<definitions id='v2'/>"})
+    assert len(list(blob_store.iter_blobs(root))) == 3
+    model_storage.delete_model(user_model["id"], user_id="u1")
+    (org_models_storage.org_model_path("org1", first)).unlink()
+
+    fresh = model_parts.collect_garbage(root)  # v ochrannej lehote sa nic nemaze
+    assert fresh["deleted"] == 0 and fresh["references"] == 2
+    stats = model_parts.collect_garbage(root, grace_s=0)
+    assert (stats["blobs"], stats["referenced"], stats["deleted"]) == (3, 2, 1)
+    loaded = org_models_storage.load_org_model("org1", second)
+    assert loaded["diagram_xml"] == "<definitions id='v2'/>"
+    assert loaded["engine_json"] == _engine()
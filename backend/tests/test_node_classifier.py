@@ -1,6 +1,7 @@
 import pytest
 
-from services.node_classifier import determine_node_type
+from services.node_classifier import determine_node_type, determine_node_types
+from services.phrase_automaton import PhraseAutomaton
 
 
 @pytest.mark.parametrize(
@@ -49,3 +50,44 @@ def test_inclusive_gateway_detection(text: str, lang: str) -> None:
 def test_manual_task_detection(text: str, lang: str) -> None:
     result = determine_node_type(text, lang=lang)
     assert result["type"] == "manual_task"
+
+
+def test_phrases_match_at_punctuation_and_without_diacritics() -> None:
+    assert determine_node_type("Rucna uloha.", lang="sk")["type"] == "manual_task"
+    assert determine_node_type("Blok: kontrola faktúr", lang="sk")["type"] == "subProcess"
+    assert determine_node_type("Podproces spracuje vstup", lang="sk")["type"] == "subProcess"
+
+
+def test_phrase_must_match_whole_words() -> None:
+    # "po" (timer_event) nesmie zasiahnuť slovo "potvrdí"
+    result = determine_node_type("Zákazník potvrdí objednávku", lang="sk")
+    assert result == {"type": "task", "meta": {"source": "fallback"}}
+
+
+def test_category_priority_and_ak_inak_bonus() -> None:
+    result = determine_node_type("Ak je suma vysoká, schváľ, inak zamietni", lang="sk")
+    assert result["meta"] == {"source": "lexicon+pattern", "pattern": "ak/inak"}
+    # control token má prednosť pred slovníkom
+    assert determine_node_type("[AND] ak príde platba", lang="sk")["type"] == "parallelGateway"
+    timer = determine_node_type("[TIMER: 48h] počkaj", lang="sk")
+    assert timer["meta"]["timer"]["iso8601"] == "PT48H"
+
+
+def test_batch_classification_matches_single_calls() -> None:
+    texts = [
+        "Paralelná brána spustí oba kroky naraz.",
+        "Pri chybe zastav spracovanie",
+        "Počkaj 2 dni na odpoveď",
+        "Vystav faktúru",
+    ]
+    assert determine_node_types(texts, lang="sk") == [
+        determine_node_type(text, lang="sk") for text in texts
+    ]
+
+
+def test_phrase_automaton_reports_overlapping_phrases() -> None:
+    automaton = PhraseAutomaton(
+        [("počkaj na", "wait"), ("na odpoveď", "reply"), ("odpoveď", "any")]
+    )
+    assert automaton.search("Počkaj na odpoved.") == {"wait", "reply", "any"}
+    assert automaton.search("čakaj na") == set()
@@ -1,3 +1,4 @@
+import json
 import os
 
 from fastapi import FastAPI, HTTPException, Request
@@ -10,6 +11,7 @@ from core.auth_config import get_auth_config
 from routers.auth_router import router as auth_router
 from routers.org_model_router import router as org_model_router
 from routers.orgs_router import router as orgs_router
+from services import org_activity_log
 
 
 def _set_env(tmp_path):
@@ -105,6 +107,11 @@ def test_org_activity_lists_key_events(tmp_path):
         assert items[0]["event_type"] == "delete_requested"
         assert items[0]["actor_email"] == "member@example.com"
         assert items[0]["metadata"]["reason"] == "Proces je duplicitny."
+
+        first = owner_client.get(f"/api/orgs/activity?org_id={org_id}&limit=1").json()
+        older = owner_client.get(f"/api/orgs/activity?org_id={org_id}&limit=50&cursor={first['next_cursor']}").json()
+        assert [first["items"][0], *older["items"]] == items and older["next_cursor"] is None
+        assert owner_client.get(f"/api/orgs/activity?org_id={org_id}&cursor=bad").status_code == 400
     finally:
         _restore_env(previous)
 
@@ -244,3 +251,54 @@ def test_member_cannot_approve_delete_request(tmp_path):
         assert approve.status_code == 403
     finally:
         _restore_env(previous)
+
+
+def _record(org_id: str, event_type: str, **metadata):
+    return org_activity_log.record_org_event(
+        org_id,
+        actor_user_id="u1",
+        actor_email="Owner@Example.com",
+        event_type=event_type,
+        entity_type="request",
+        entity_id="n1",
+        entity_name="Proces",
+        metadata=metadata,
+    )
+
+
+def test_activity_log_appends_segments_indexes_and_pages_with_cursor(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(tmp_path / "models"))
+    monkeypatch.setenv("ORG_ACTIVITY_SEGMENT_BYTES", "1500")
+    monkeypatch.setattr(org_activity_log, "_TAIL_BLOCK", 37)  # riadky cez hranice blokov
+    legacy = org_activity_log._legacy_log_path("org1")
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps([{"id": "old-1", "event_type": "member_added"}]), encoding="utf-8")
+
+    events = [_record("org1", f"event_{idx}") for idx in range(20)]
+    request = _record("org1", "delete_requested")
+    resolution = _record("org1", "delete_request_rejected", request_id=request["id"])
+    directory = org_activity_log._activity_dir("org1")
+    segments = org_activity_log._segment_numbers(directory)
+    assert not legacy.exists() and segments[0] == 0 and len(segments) > 3
+
+    assert org_activity_log.get_org_event("org1", "old-1")["event_type"] == "member_added"
+    assert org_activity_log.get_org_event("org1", events[3]["id"]) == events[3]
+    assert org_activity_log.get_org_request_resolution("org1", request["id"]) == resolution
+    assert org_activity_log.get_org_request_resolution("org1", events[3]["id"]) is None
+    # uzavrete segmenty maju index, aktivny nie
+    assert all(org_activity_log._index_path(directory, number).exists() for number in segments[:-1])
+    assert not org_activity_log._index_path(directory, segments[-1]).exists()
+
+    # rozpisany riadok na konci (subezny zapis) sa ignoruje
+    with org_activity_log._segment_path(directory, segments[-1]).open("a", encoding="utf-8") as handle:
+        handle.write('{"id": "partial"')
+    expected = [resolution, request, *reversed(events), {"id": "old-1", "event_type": "member_added"}]
+    seen, cursor = [], None
+    while True:
+        items, cursor = org_activity_log.page_org_events("org1", limit=7, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+    assert seen == expected
+    assert org_activity_log.list_org_events("org1", limit=2) == expected[:2]
+    assert org_activity_log.get_org_event("org1", "partial") is None
@@ -0,0 +1,146 @@
+import os
+import time
+from collections import Counter
+
+from fastapi.testclient import TestClient
+
+from auth.db import run_auth_migrations
+from auth.service import register_user
+from services import blob_store, model_parts, org_models_storage
+
+from tests.test_org_activity_log import _authed_client, _restore_env, _set_env
+
+
+def _engine(version: int) -> dict:
+    nodes = [{"id": f"task_{idx}", "type": "task", "name": f"Krok {idx}", "laneId": "l1"} for idx in range(60)]
+    nodes[version % 60]["name"] = f"Krok upraveny v{version}"
+    return {"name": "Proces", "lanes": [{"id": "l1", "name": "Uctaren"}], "nodes": nodes, "flows": []}
+
+
+def _diagram(version: int) -> str:
+    lines = [f'  <task id="task_{idx}" name="Krok {idx}" />' for idx in range(60)]
+    lines.insert(version % 60, f'  <task id="extra_{version}" />')
+    return "\n".join(["<definitions>", *lines, "</definitions>"])
+
+
+def _version(version: int, base_model_id: str | None) -> dict:
+    model = {"name": f"Proces v{version}", "engine_json": _engine(version), "diagram_xml": _diagram(version)}
+    if base_model_id:
+        model["base_model_id"] = base_model_id
+    return model
+
+
+def _is_delta(root, digest: str) -> bool:
+    return blob_store.delta_base(root, digest) is not None
+
+
+def test_version_chain_is_stored_as_deltas_with_periodic_snapshots(tmp_path, monkeypatch):
+    root = tmp_path / "models"
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(root))
+    monkeypatch.setenv("ORG_HISTORY_SNAPSHOT_EVERY", "4")
+    ids = []
+    for version in range(9):
+        ids.append(org_models_storage.save_org_model_copy("org1", _version(version, ids[-1] if ids else None)))
+
+    digests = [model_parts.blob_digests(org_models_storage.org_model_path("org1", model_id)) for model_id in ids]
+    # plny snapshot kazde 4 verzie, medzi nimi delty
+    assert [_is_delta(root, refs["engine_json"]) for refs in digests] == [False, True, True, True] * 2 + [False]
+    assert [_is_delta(root, refs["diagram_xml"]) for refs in digests] == [False, True, True, True] * 2 + [False]
+    full = blob_store.blob_path(root, digests[0]["engine_json"]).stat().st_size
+    assert blob_store.blob_path(root, digests[3]["engine_json"]).stat().st_size < full / 4
+
+    blob_store._cached_text.cache_clear()
+    for version, model_id in enumerate(ids):
+        loaded = org_models_storage.load_org_model("org1", model_id)
+        assert loaded["engine_json"] == _engine(version)
+        assert loaded["diagram_xml"] == _diagram(version)
+
+    # zmazane medziverzie: GC necha bloby, na ktorych stoja delty zijucich verzii
+    for model_id in ids[:3]:
+        org_models_storage.org_model_path("org1", model_id).unlink()
+    stats = model_parts.collect_garbage(root, grace_s=0)
+    assert stats["deleted"] == 0
+    org_models_storage.org_model_path("org1", ids[3]).unlink()
+    assert model_parts.collect_garbage(root, grace_s=0)["deleted"] == 8
+    blob_store._cached_text.cache_clear()
+    assert org_models_storage.load_org_model("org1", ids[5])["engine_json"] == _engine(5)
+
+    history = org_models_storage.list_org_model_history("org1", ids[-1])
+    assert [item["id"] for item in history] == ids[:3:-1]
+
+
+def test_org_model_history_endpoint_walks_base_model_chain(tmp_path):
+    previous = _set_env(tmp_path)
+    try:
+        run_auth_migrations()
+        register_user("owner@example.com", "password123")
+        client: TestClient = _authed_client("owner@example.com")
+        org_id = client.post("/api/orgs", json={"name": "Org History"}).json()["id"]
+        ids = []
+        for version in range(3):
+            created = client.post(f"/api/orgs/models?org_id={org_id}", json=_version(version, ids[-1] if ids else None))
+            assert created.status_code == 200, created.text
+            ids.append(created.json()["org_model_id"])
+
+        response = client.get(f"/api/orgs/models/{ids[-1]}/history?org_id={org_id}")
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [item["id"] for item in items] == ids[::-1]
+        assert [item["base_model_id"] for item in items] == [ids[1], ids[0], None]
+        assert client.get(f"/api/orgs/models/{ids[-1]}/history?org_id={org_id}&limit=1").json()["items"][0]["id"] == ids[-1]
+
+        old = client.get(f"/api/orgs/models/{ids[0]}?org_id={org_id}").json()
+        assert old["diagram_xml"] == _diagram(0)
+        assert old["engine_json"] == _engine(0)
+        assert client.get(f"/api/orgs/models/missing/history?org_id={org_id}").status_code == 404
+    finally:
+        _restore_env(previous)
+
+
+def test_large_diagram_diff_stays_fast_and_falls_back_to_snapshot(tmp_path):
+    lines = [line for idx in range(4000) for line in (f'  <task id="t{idx}">', "    <incoming>f</incoming>", "  </task>")]
+    base = "\n".join(lines)
+    base_digest = blob_store.put_blob(tmp_path, base, "none")
+
+    # lokalna zmena v 12k riadkoch: orezanie spolocnych koncov -> mala delta
+    local = lines[:6000] + [f'  <task id="new{idx}" />' for idx in range(20)] + lines[6000:]
+    started = time.perf_counter()
+    local_digest = blob_store.put_delta_blob(tmp_path, "\n".join(local), base_digest, "text", "none", every=10)
+    assert blob_store.delta_base(tmp_path, local_digest) == base_digest
+
+    # rozhadzane zmeny po celom diagrame: diff by bol kvadraticky -> snapshot
+    scattered = list(lines)
+    for idx in range(20):
+        scattered.insert(idx * 600, f'  <task id="new{idx}" />')
+    scattered_digest = blob_store.put_delta_blob(
+        tmp_path, "\n".join(scattered), base_digest, "text", "none", every=10
+    )
+    assert time.perf_counter() - started < 2.0
+    assert blob_store.delta_base(tmp_path, scattered_digest) is None
+    assert blob_store.get_blob(tmp_path, local_digest) == "\n".join(local)
+    assert blob_store.get_blob(tmp_path, scattered_digest) == "\n".join(scattered)
+
+
+def test_gc_keeps_blob_reused_by_a_writer_during_collection(tmp_path, monkeypatch):
+    base_text, delta_text = _diagram(0), _diagram(1)
+    base = blob_store.put_blob(tmp_path, base_text, "none")
+    delta = blob_store.put_delta_blob(tmp_path, delta_text, base, "text", "none", every=10)
+    assert blob_store.delta_base(tmp_path, delta) == base
+    for digest in (base, delta):
+        os.utime(blob_store.blob_path(tmp_path, digest), (1, 1))
+
+    original = blob_store._unlink_unchanged
+
+    def _writer_dedups_first(path, mtime_ns):
+        if path.name == delta:
+            blob_store.put_blob(tmp_path, delta_text, "none")  # subezne ulozenie rovnakeho obsahu
+        return original(path, mtime_ns)
+
+    monkeypatch.setattr(blob_store, "_unlink_unchanged", _writer_dedups_first)
+    stats = blob_store.collect_garbage(tmp_path, Counter(), grace_s=0)
+    assert stats["deleted"] == 0
+    blob_store._cached_text.cache_clear()
+    assert blob_store.get_blob(tmp_path, delta) == delta_text
+
+    monkeypatch.setattr(blob_store, "_unlink_unchanged", original)
+    assert blob_store.collect_garbage(tmp_path, Counter(), grace_s=0)["deleted"] == 2
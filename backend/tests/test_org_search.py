@@ -0,0 +1,134 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from auth.db import run_auth_migrations
+from auth.service import register_user
+from services import org_models_storage, org_search_index
+
+from tests.test_org_activity_log import _authed_client, _restore_env, _set_env
+
+
+def _model(name: str, task: str, lane: str = "Uctaren", condition: str = "") -> dict:
+    return {
+        "name": name,
+        "engine_json": {
+            "name": name,
+            "lanes": [{"id": "l1", "name": lane}],
+            "nodes": [
+                {"id": "start", "type": "startEvent", "name": "Start", "laneId": "l1"},
+                {"id": "task", "type": "task", "name": task, "laneId": "l1"},
+            ],
+            "flows": [{"id": "f1", "source": "start", "target": "task", "condition": condition}],
+        },
+        "diagram_xml": "<definitions />",
+    }
+
+
+def test_search_index_folds_diacritics_ranks_and_tracks_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(tmp_path / "models"))
+    invoice = org_models_storage.save_org_model_copy("org1", _model("Fakturácia", "Vystavit faktúru"))
+    task_only = org_models_storage.save_org_model_copy("org1", _model("Nakup", "Kontrola fakturácie"))
+    org_models_storage.save_org_model_copy("org1", _model("Nabor", "Pohovor", condition="schvalene"))
+    directory = org_models_storage.org_models_dir("org1")
+
+    hits = org_search_index.search_models(directory, "fakturacia")
+    assert [hit[0] for hit in hits] == [invoice]
+    hits = org_search_index.search_models(directory, "faktur")
+    assert [hit[0] for hit in hits] == [invoice, task_only]  # nazov modelu vazi viac
+    assert hits[0][2][0] == {"field": "model", "text": "Fakturácia"}
+    assert [hit[0] for hit in org_search_index.search_models(directory, "FAKTÚR uctaren")] == [invoice, task_only]
+    assert org_search_index.search_models(directory, "schval")[0][2] == [{"field": "flow", "text": "schvalene"}]
+    assert org_search_index.search_models(directory, "faktura pohovor") == []
+
+    updated = _model("Nakup", "Objednat tovar")
+    org_models_storage.save_org_model(
+        "org1", task_only, {**updated, "created_at": None}
+    )
+    assert [hit[0] for hit in org_search_index.search_models(directory, "faktur")] == [invoice]
+
+    # subor zmazany a zmeneny mimo storage vrstvy sa dorovna podla mtime
+    (directory / f"{invoice}.json").unlink()
+    path = directory / f"{task_only}.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["name"] = "Fakturacia dodavatelov"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert [hit[0] for hit in org_search_index.search_models(directory, "fakturacia")] == [task_only]
+
+    # novy proces (bez pamate) obnovi index zo suboru
+    org_search_index.forget_directory(directory)
+    assert [hit[0] for hit in org_search_index.search_models(directory, "dodavatel")] == [task_only]
+
+
+def test_org_search_endpoint_returns_tree_nodes(tmp_path):
+    previous = _set_env(tmp_path)
+    try:
+        run_auth_migrations()
+        register_user("owner@example.com", "password123")
+        client: TestClient = _authed_client("owner@example.com")
+        org_id = client.post("/api/orgs", json={"name": "Org Search"}).json()["id"]
+        model_ids = []
+        for name, task in (("Fakturácia", "Vystavit fakturu"), ("Nakup", "Objednat")):
+            created = client.post(f"/api/orgs/models?org_id={org_id}", json=_model(name, task))
+            model_ids.append(created.json()["org_model_id"])
+        created = client.post(
+            f"/api/org-model/process-from-org-model?org_id={org_id}",
+            json={"parentId": "root", "modelId": model_ids[0], "name": "Fakturacia proces"},
+        )
+        assert created.status_code == 200, created.text
+        node = created.json()["node"]
+        # model bez uzla v strome (napr. stara verzia) sa nevracia
+        response = client.get(f"/api/orgs/search?org_id={org_id}&q=Fakturácia")
+        assert response.status_code == 200
+        body = response.json()
+        assert [item["tree_node_id"] for item in body["items"]] == [node["id"]]
+        assert body["items"][0]["org_model_id"] == model_ids[0]
+        assert body["items"][0]["name"] == "Fakturacia proces"
+        assert body["ms"] >= 0
+
+        assert client.get(f"/api/orgs/search?org_id={org_id}&q=%20").status_code == 400
+    finally:
+        _restore_env(previous)
+
+
+def test_superseded_versions_leave_the_index_and_saves_append_to_log(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(org_search_index, "COMPACT_MIN_ENTRIES", 8)
+    first = org_models_storage.save_org_model_copy("org1", _model("Fakturácia", "Vystavit faktúru"))
+    directory = org_models_storage.org_models_dir("org1")
+    snapshot = directory / org_search_index.INDEX_NAME
+    log = directory / org_search_index.LOG_NAME
+    assert not snapshot.exists() and len(log.read_text(encoding="utf-8").splitlines()) == 1
+
+    versions = [first]
+    for _ in range(3):
+        versions.append(
+            org_models_storage.save_org_model_copy(
+                "org1", {**_model("Fakturácia", "Vystavit faktúru"), "base_model_id": versions[-1]}
+            )
+        )
+    index = org_search_index._index_for(directory)
+    assert set(index.docs) == {versions[-1]}
+    assert set(index.superseded) == set(versions[:-1])
+    assert [hit[0] for hit in org_search_index.search_models(directory, "faktur")] == [versions[-1]]
+
+    # strom stale ukazuje na staru verziu -> pri hladani sa znova zaindexuje
+    hits = org_search_index.search_models(directory, "faktur", include={versions[0]: "node"})
+    assert [hit[0] for hit in hits] == [versions[0]]
+
+    for _ in range(3):
+        versions.append(
+            org_models_storage.save_org_model_copy(
+                "org1", {**_model("Fakturácia", "Vystavit faktúru"), "base_model_id": versions[-1]}
+            )
+        )
+    assert snapshot.exists()  # log prerastol index -> zluceny do snapshotu
+    assert len(log.read_text(encoding="utf-8").splitlines()) < 8
+
+    org_search_index.forget_directory(directory)
+    restored = org_search_index._index_for(directory)
+    assert set(restored.docs) == {versions[0], versions[-1]}
+    assert set(restored.superseded) == set(versions[1:-1])
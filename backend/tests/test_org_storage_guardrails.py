@@ -1,5 +1,7 @@
+import json
 import os
 
+import pytest
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.testclient import TestClient
 
@@ -10,6 +12,7 @@ from core.auth_config import get_auth_config
 from routers.auth_router import router as auth_router
 from routers.org_model_router import router as org_model_router
 from routers.orgs_router import router as orgs_router
+from services import org_model_storage
 from services.model_storage import load_model as load_global_model
 from services.org_models_storage import load_org_model
 
@@ -309,3 +312,121 @@ def test_viewer_cannot_mutate_org_tree(tmp_path):
         assert "upravovať model organizácie" in (rename_process.json().get("detail") or "").lower()
     finally:
         _restore_env(previous)
+
+
+def test_org_tree_is_cached_indexed_and_revalidated_against_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("BPMN_MODELS_DIR", str(tmp_path / "models"))
+    outer = org_model_storage.create_folder("org1", "root", "Outer")
+    inner = org_model_storage.create_folder("org1", outer["id"], "Inner")
+    other = org_model_storage.create_folder("org1", "root", "Other")
+    path = org_model_storage.org_tree_path("org1")
+    assert "\n" not in path.read_text(encoding="utf-8")  # kompaktny zapis
+
+    reads = []
+    original = json.loads
+    monkeypatch.setattr(org_model_storage.json, "loads", lambda text: reads.append(1) or original(text))
+    tree = org_model_storage.get_tree("org1")
+    assert org_model_storage.get_node("org1", inner["id"])["name"] == "Inner"
+    assert org_model_storage.get_tree("org1") is tree and reads == []
+
+    with pytest.raises(ValueError):
+        org_model_storage.move_node("org1", outer["id"], inner["id"])
+    with pytest.raises(ValueError):
+        org_model_storage.move_node("org1", outer["id"], outer["id"])
+    org_model_storage.move_node("org1", inner["id"], other["id"])
+    org_model_storage.move_node("org1", outer["id"], other["id"])
+    assert org_model_storage.list_process_model_ids("org1", other["id"]) == []
+    org_model_storage.delete_node("org1", inner["id"])
+    assert org_model_storage.get_node("org1", inner["id"]) is None
+    assert reads == []
+
+    # zmena z ineho workera (nahradenie suboru) sa prejavi pri dalsom citani
+    on_disk = original(path.read_text(encoding="utf-8"))
+    assert on_disk == tree
+    on_disk["children"][0]["name"] = "Renamed elsewhere"
+    path.write_text(json.dumps(on_disk), encoding="utf-8")
+    assert org_model_storage.get_node("org1", other["id"])["name"] == "Renamed elsewhere"
+    assert org_model_storage.get_node("org1", outer["id"])["name"] == "Outer"
+    assert len(reads) == 1
+
+
+def test_org_tree_edits_use_etag_if_match_and_model_ref_compare_and_swap(tmp_path):
+    previous = _set_env(tmp_path)
+    try:
+        run_auth_migrations()
+        register_user("owner@example.com", "password123")
+        client = _authed_client("owner@example.com")
+        org_id = client.post("/api/orgs", json={"name": "Org ETag"}).json()["id"]
+        loaded = client.get(f"/api/org-model?org_id={org_id}")
+        etag = loaded.headers["ETag"]
+
+        created = client.post(
+            f"/api/org-model/process?org_id={org_id}",
+            json={"parentId": "root", "name": "Process"},
+            headers={"If-Match": etag},
+        )
+        assert created.status_code == 200
+        node = created.json()["node"]
+        assert created.headers["ETag"] != etag
+
+        # zastarany ETag: 412 s aktualnym ETagom, strom sa nezmeni
+        stale = client.patch(
+            f"/api/org-model/node/{node['id']}?org_id={org_id}",
+            json={"name": "Renamed"},
+            headers={"If-Match": etag},
+        )
+        assert stale.status_code == 412
+        assert stale.headers["ETag"] == created.headers["ETag"]
+        renamed = client.patch(
+            f"/api/org-model/node/{node['id']}?org_id={org_id}",
+            json={"name": "Renamed"},
+            headers={"If-Match": stale.headers["ETag"]},
+        )
+        assert renamed.status_code == 200 and renamed.json()["node"]["name"] == "Renamed"
+        assert client.get(f"/api/org-model?org_id={org_id}").headers["ETag"] == renamed.headers["ETag"]
+
+        current_model_id = node["processRef"]["modelId"]
+        new_model_id = client.post(
+            f"/api/orgs/models?org_id={org_id}",
+            json={
+                "name": "Process v2",
+                "engine_json": {"nodes": [], "flows": [], "lanes": []},
+                "diagram_xml": "<definitions />",
+                "tree_node_id": node["id"],
+                "base_model_id": current_model_id,
+            },
+        ).json()["org_model_id"]
+        swapped = client.patch(
+            f"/api/org-model/process/{node['id']}/model-ref?org_id={org_id}",
+            json={"modelId": new_model_id, "baseModelId": current_model_id},
+        )
+        assert swapped.status_code == 200
+        lost = client.patch(
+            f"/api/org-model/process/{node['id']}/model-ref?org_id={org_id}",
+            json={"modelId": current_model_id, "baseModelId": current_model_id},
+        )
+        assert lost.status_code == 409
+
+        model = client.get(f"/api/orgs/models/{new_model_id}?org_id={org_id}")
+        body = {"name": "Process v2b", "engine_json": model.json()["engine_json"], "diagram_xml": "<definitions />"}
+        saved = client.put(
+            f"/api/orgs/models/{new_model_id}?org_id={org_id}", json=body, headers={"If-Match": model.headers["ETag"]}
+        )
+        assert saved.status_code == 200
+        conflict = client.put(
+            f"/api/orgs/models/{new_model_id}?org_id={org_id}", json=body, headers={"If-Match": model.headers["ETag"]}
+        )
+        assert conflict.status_code == 412
+        assert conflict.headers["ETag"] == saved.headers["ETag"]
+        # ulozenie bez If-Match tiez vrati novy ETag pre dalsi podmieneny zapis
+        unconditional = client.put(f"/api/orgs/models/{new_model_id}?org_id={org_id}", json=body)
+        assert unconditional.status_code == 200
+        assert client.put(
+            f"/api/orgs/models/{new_model_id}?org_id={org_id}", json=body, headers={"If-Match": unconditional.headers["ETag"]}
+        ).status_code == 200
+        assert client.get(f"/api/org-model?org_id={org_id}", headers={"If-Match": "x"}).status_code == 200
+        assert client.patch(
+            f"/api/org-model/node/{node['id']}?org_id={org_id}", json={"name": "X"}, headers={"If-Match": '"abc"'}
+        ).status_code == 400
+    finally:
+        _restore_env(previous)
@@ -0,0 +1,82 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+import mentor.telemetry as telemetry
+from mentor.telemetry import TelemetrySink
+
+
+def _submission(run_id, events):
+    return {
+        "run_id": run_id,
+        "kb_version": "kb_1",
+        "telemetry": {"metrics": {"nodes": 3}, "events": events, "tags": {"locale": "sk"}},
+    }
+
+
+def test_sink_flushes_rotated_segments_and_aggregates(tmp_path):
+    sink = TelemetrySink(tmp_path, max_buffer=100, flush_s=60, segment_bytes=60)
+    for idx in range(4):
+        sink.offer([{"ts": 1.0, "type": "draft", "latency_ms": float(idx + 1)}])
+        sink.flush()
+    sink.offer([{"ts": 1.0, "type": "preview"}])  # este v bufferi
+
+    segments = sorted(tmp_path.glob("events-*.jsonl"))
+    assert len(segments) >= 2
+    lines = [json.loads(line) for seg in segments for line in seg.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 4
+
+    result = sink.query()
+    assert result["events"]["draft"]["count"] == 4
+    assert result["events"]["draft"]["latency_ms"]["p50"] == 2.0
+    assert result["events"]["draft"]["latency_ms"]["max"] == 4.0
+    assert result["events"]["preview"]["count"] == 1
+    assert set(sink.query(event_type="preview")["events"]) == {"preview"}
+
+
+def test_segments_are_per_process_and_pruned_by_count_and_age(tmp_path):
+    old = tmp_path / "events-20000101T000000-1-0000.jsonl"
+    old.write_text(json.dumps({"ts": 1.0, "type": "old"}) + "\n", encoding="utf-8")
+    os.utime(old, (1, 1))
+    sink = TelemetrySink(tmp_path, max_buffer=100, flush_s=60, segment_bytes=1, max_segments=3, retention_s=3600)
+    for idx in range(5):
+        sink.offer([{"ts": 1.0, "type": "draft", "latency_ms": float(idx)}])
+        sink.flush()
+
+    segments = sorted(tmp_path.glob("events-*.jsonl"))
+    assert len(segments) == 3 and old not in segments
+    assert all(f"-{os.getpid()}-" in segment.name for segment in segments)
+    assert sink.query()["events"]["draft"]["count"] == 3
+
+
+def test_sink_drops_instead_of_blocking_when_full(tmp_path):
+    sink = TelemetrySink(tmp_path, max_buffer=3, flush_s=60)
+    assert sink.offer([{"type": "a"}] * 5) == 3
+    assert sink.dropped == 2
+
+
+def test_submit_and_query_endpoints(tmp_path, monkeypatch):
+    from main import app
+
+    monkeypatch.setattr(telemetry, "_SINK", TelemetrySink(tmp_path, flush_s=60))
+    client = TestClient(app)
+    resp = client.post(
+        "/telemetry/submit",
+        json=_submission(
+            "run_1",
+            [
+                {"name": "generate", "metadata": {"latency_ms": 120}},
+                {"name": "generate", "metadata": {"latency_ms": 80}},
+                {"name": "render_ms", "value": 15},
+            ],
+        ),
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ok", "accepted": 4, "dropped": 0}
+
+    events = client.get("/telemetry/query").json()["events"]
+    assert events["run"]["count"] == 1
+    assert events["generate"]["count"] == 2
+    assert events["generate"]["latency_ms"]["p95"] == 120.0
+    assert events["render_ms"]["latency_ms"]["max"] == 15.0